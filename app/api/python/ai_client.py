@@ -0,0 +1,214 @@
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import json
+import os
+import random
+import httpx
+from .metrics import span
+
+AI_API_KEY = os.getenv("AI_API_KEY")
+AI_ENDPOINT = os.getenv("AI_ENDPOINT", "https://api.anthropic.com/v1/messages")
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", "20"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "120"))
+AI_CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "10"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_BACKOFF_BASE = float(os.getenv("AI_BACKOFF_BASE", "0.5"))
+AI_BACKOFF_MAX = float(os.getenv("AI_BACKOFF_MAX", "20"))
+
+# 529 is the model API's "overloaded" status
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+class AIServiceError(Exception):
+    def __init__(self, detail: str, status_code: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+class AIClient:
+    """
+    Long-lived HTTP client for the model endpoint.
+
+    One keep-alive connection pool is shared by every request, concurrent
+    upstream calls are capped by a semaphore, and 429/5xx responses are
+    retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = AI_ENDPOINT,
+        api_key: Optional[str] = AI_API_KEY,
+        max_connections: int = AI_MAX_CONNECTIONS,
+        max_concurrency: int = AI_MAX_CONCURRENCY,
+        timeout: float = AI_TIMEOUT,
+        max_retries: int = AI_MAX_RETRIES,
+        backoff_base: float = AI_BACKOFF_BASE,
+        backoff_max: float = AI_BACKOFF_MAX,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = http2
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key or "",
+            "anthropic-version": "2023-06-01"
+        }
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            transport=self.transport,
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=AI_CONNECT_TIMEOUT)
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than a server Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    async def create_message(self, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        """POST a messages request and return the decoded JSON body."""
+        await self.start()
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                with span("ai.create_message"):
+                    return await self._post_with_retries(payload, timeout)
+            finally:
+                self._in_flight -= 1
+
+    async def _post_with_retries(self, payload: Dict, timeout: Optional[float]) -> Dict:
+        request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        for attempt in range(self.max_retries + 1):
+            self._requests += 1
+            retry_after = None
+            try:
+                response = await self._client.post(self.endpoint, json=payload, timeout=request_timeout)
+            except httpx.TransportError as e:
+                error = AIServiceError(f"Model endpoint unreachable: {e}")
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                error = AIServiceError(
+                    f"Model endpoint returned {response.status_code}",
+                    status_code=response.status_code
+                )
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+                retry_after = response.headers.get("retry-after")
+
+            if attempt == self.max_retries:
+                break
+            self._retries += 1
+            await asyncio.sleep(self.backoff(attempt, retry_after))
+
+        self._failures += 1
+        raise error
+
+    async def stream_message(self, payload: Dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        POST a streaming messages request and yield text deltas as they arrive.
+
+        Retries only happen before any text has been yielded; a stream that
+        breaks midway raises AIServiceError.
+        """
+        await self.start()
+        request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                with span("ai.stream_message"):
+                    for attempt in range(self.max_retries + 1):
+                        self._requests += 1
+                        retry_after = None
+                        started = False
+                        try:
+                            async with self._client.stream(
+                                "POST",
+                                self.endpoint,
+                                json={**payload, "stream": True},
+                                timeout=request_timeout
+                            ) as response:
+                                if response.status_code == 200:
+                                    async for line in response.aiter_lines():
+                                        if not line.startswith("data:"):
+                                            continue
+                                        event = json.loads(line[5:])
+                                        if event.get("type") == "error":
+                                            raise AIServiceError(f"Model stream error: {event.get('error')}")
+                                        delta = event.get("delta") or {}
+                                        if event.get("type") == "content_block_delta" and delta.get("type") == "text_delta":
+                                            started = True
+                                            yield delta["text"]
+                                    return
+                                error = AIServiceError(
+                                    f"Model endpoint returned {response.status_code}",
+                                    status_code=response.status_code
+                                )
+                                if response.status_code not in RETRYABLE_STATUS_CODES:
+                                    break
+                                retry_after = response.headers.get("retry-after")
+                        except httpx.TransportError as e:
+                            if started:
+                                self._failures += 1
+                                raise AIServiceError(f"Model stream interrupted: {e}")
+                            error = AIServiceError(f"Model endpoint unreachable: {e}")
+
+                        if attempt == self.max_retries:
+                            break
+                        self._retries += 1
+                        await asyncio.sleep(self.backoff(attempt, retry_after))
+
+                    self._failures += 1
+                    raise error
+            finally:
+                self._in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "requests": self._requests,
+            "retries": self._retries,
+            "failures": self._failures
+        }
+
+
+ai_client = AIClient()
@@ -1,23 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
-from typing import Dict, List
-import httpx
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Tuple
 import json
 import os
+import time
+from .ai_client import ai_client
 from .auth import check_roles
-from .models import ComplianceReportCreate
-from prisma import Prisma
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from io import BytesIO
+from .models import ComplianceReportCreate, ReportStatus, SortOrder
+from .database import db, PoolTimeoutError
+from .jobs import JobQueue, QueueFullError
+from .pdf import cached_file_response, etag_matches, pdf_cache, render_pdf
+from .prompt_builder import (
+    REPORT_PROMPT_TOKEN_BUDGET, REPORT_RECENT_LOGS, Prompt, build_prompt, estimate_raw_tokens,
+    grouped_statistics, prompt_stats
+)
+from .report_cache import report_cache, report_fingerprint, serialize_asset
+from .report_queries import fetch_report_page, parse_fields
+from .report_stream import SectionStreamParser, stream_metrics
+from .response_cache import response_cache
 from datetime import datetime
 
 router = APIRouter()
-prisma = Prisma()
 
-AI_API_KEY = os.getenv("AI_API_KEY")
-AI_ENDPOINT = "https://api.anthropic.com/v1/messages"
+AI_MODEL = "claude-3-opus-20240229"
 
 REPORT_TEMPLATES = {
     "POLICY": {
@@ -133,90 +138,409 @@ REPORT_TEMPLATES = {
     }
 }
 
-async def generate_report_content(asset_data: Dict, report_type: str) -> Dict:
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": AI_API_KEY,
-        "anthropic-version": "2023-06-01"
-    }
-    
+def build_report_prompt(asset_data: Dict, report_type: str) -> Prompt:
+    """The template plus a compact, token-budgeted asset payload; see prompt_builder."""
     template = REPORT_TEMPLATES.get(report_type)
     if not template:
         raise HTTPException(status_code=400, detail="Invalid report type")
-    
-    message = {
+
+    prompt = build_prompt(template["system_prompt"], asset_data, report_type)
+    prompt_stats.record(prompt)
+    return prompt
+
+def report_message(prompt: Prompt) -> Dict:
+    return {
         "messages": [{
             "role": "user",
-            "content": f"{template['system_prompt']}\n\nAsset details: {json.dumps(asset_data, indent=2)}"
+            "content": prompt.text
         }],
-        "model": "claude-3-opus-20240229",
+        "model": AI_MODEL,
         "max_tokens": 4000,
         "response_format": { "type": "json" }
     }
+
+def build_report_message(asset_data: Dict, report_type: str) -> Dict:
+    return report_message(build_report_prompt(asset_data, report_type))
+
+async def generate_report_content(asset_data: Dict, report_type: str) -> Dict:
+    message = build_report_message(asset_data, report_type)
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(AI_ENDPOINT, json=message, headers=headers)
-            if response.status_code != 200:
-                raise HTTPException(status_code=500, detail="Error generating report")
-            
-            report_content = response.json()["content"][0]["text"]
-            return json.loads(report_content)
+        response = await ai_client.create_message(message)
+        report_content = response["content"][0]["text"]
+        return json.loads(report_content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Relations a report prompt reads; older maintenance logs only feed the statistics
+REPORT_INCLUDE = {
+    "department": True,
+    "maintenanceLogs": {"take": REPORT_RECENT_LOGS, "order_by": {"date": "desc"}},
+    "financialPlans": True
+}
+
+# Maintenance log counts and costs per asset, type and year
+MAINTENANCE_GROUPS_SQL = '''
+SELECT l."assetId", l."type"::text AS "type", EXTRACT(YEAR FROM l."date")::int AS "year",
+       COUNT(*)::int AS "count", SUM(l."cost") AS "cost",
+       COALESCE(SUM(l."cost") FILTER (WHERE l."date" >= NOW() - INTERVAL '365 days'), 0) AS "cost12Months",
+       MIN(l."date") AS "firstDate", MAX(l."date") AS "lastDate"
+FROM "MaintenanceLog" AS l
+WHERE l."assetId" = ANY($1::text[])
+GROUP BY l."assetId", l."type", EXTRACT(YEAR FROM l."date")
+'''
+
+async def load_maintenance_statistics(asset_ids: List[str]) -> Dict[str, Dict]:
+    """Maintenance statistics per asset id, aggregated in the database."""
+    if not asset_ids:
+        return {}
+    rows = await db.query_raw(MAINTENANCE_GROUPS_SQL, list(asset_ids))
+    groups: Dict[str, List[Dict]] = {asset_id: [] for asset_id in asset_ids}
+    for row in rows:
+        groups[row["assetId"]].append(row)
+    return {asset_id: grouped_statistics(asset_groups) for asset_id, asset_groups in groups.items()}
+
+async def load_report_inputs(asset_id: str, report_type: str) -> Tuple[Dict, str]:
+    """Load and serialize an asset for a report; returns (asset_payload, fingerprint)."""
+    template = REPORT_TEMPLATES.get(report_type)
+    if not template:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+
+    asset = await db.asset.find_unique(where={"id": asset_id}, include=REPORT_INCLUDE)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    statistics = await load_maintenance_statistics([asset.id])
+    asset_payload = serialize_asset(asset, statistics[asset.id])
+    return asset_payload, report_fingerprint(asset_payload, report_type, template, AI_MODEL)
+
+async def resolve_report_content(asset_id: str, report_type: str, force: bool = False) -> Tuple[Dict, str, Optional[Dict]]:
+    """
+    Load an asset and produce report content for it.
+
+    Returns (content, fingerprint, cached). `cached` is the matching cache entry
+    when a completed report for identical inputs exists and `force` is not set;
+    otherwise the model is called and `cached` is None.
+    """
+    asset_payload, fingerprint = await load_report_inputs(asset_id, report_type)
+    if not force:
+        cached = await report_cache.get(fingerprint)
+        if cached:
+            return cached["content"], fingerprint, cached
+
+    content = await generate_report_content(asset_payload, report_type)
+    return content, fingerprint, None
+
 @router.post("/reports/generate/{asset_id}")
 async def generate_compliance_report(
     asset_id: str,
     report_type: str,
+    force: bool = False,
     user: dict = Depends(check_roles(["admin", "finance_director"]))
 ):
+    """
+    Generate a report for an asset.
+
+    A completed report generated from identical asset data, template and model
+    is returned from cache unless `force` is set.
+    """
     try:
-        # Fetch asset data
-        asset = await prisma.asset.find_unique(
-            where={"id": asset_id},
-            include={
-                "department": True,
-                "maintenanceLogs": True,
-                "financialPlans": True
-            }
-        )
-        
-        if not asset:
-            raise HTTPException(status_code=404, detail="Asset not found")
-        
-        # Generate report content using AI
-        report_content = await generate_report_content(asset, report_type)
+        report_content, fingerprint, cached = await resolve_report_content(asset_id, report_type, force)
+        if cached:
+            return {**cached, "status": "COMPLETED", "cached": True}
         
         # Create report record in database
-        report = await prisma.complianceReport.create(
+        report = await db.complianceReport.create(
             data={
                 "reportType": report_type,
                 "content": report_content,
                 "status": "COMPLETED",
                 "assetId": asset_id,
+                "fingerprint": fingerprint,
                 "dueDate": datetime.now(),
                 "submissionDate": datetime.now()
             }
         )
+        report_cache.put(fingerprint, {
+            "id": report.id,
+            "content": report_content,
+            "generated_at": report.createdAt
+        })
+        await response_cache.invalidate("reports")
         
         return {
             "id": report.id,
             "content": report_content,
             "status": "COMPLETED",
-            "generated_at": report.createdAt
+            "generated_at": report.createdAt,
+            "cached": False
         }
         
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/reports/generate/{asset_id}/stream")
+async def stream_compliance_report(
+    asset_id: str,
+    report_type: str,
+    force: bool = False,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """
+    Generate a report and stream each section over server-sent events as soon
+    as the model finishes writing it.
+
+    Events: `section` per completed section, then `done` with the saved report
+    id and time to first section, or `error`. The assembled report is persisted
+    once the model finishes. If the model's output was cut off, the sections
+    received are saved as a REJECTED report, never cached, and the stream
+    ends with `error` carrying that report's id.
+    """
+    asset_payload, fingerprint = await load_report_inputs(asset_id, report_type)
+    cached = None if force else await report_cache.get(fingerprint)
+
+    async def events():
+        started = time.perf_counter()
+        if cached:
+            for section in cached["content"].get("sections", []):
+                yield _sse("section", section)
+            yield _sse("done", {"id": cached["id"], "cached": True, "time_to_first_section": 0.0})
+            return
+
+        parser = SectionStreamParser()
+        first_section = None
+        prompt = None
+        try:
+            prompt = build_report_prompt(asset_payload, report_type)
+            async for text in ai_client.stream_message(report_message(prompt)):
+                for section in parser.feed(text):
+                    if first_section is None:
+                        first_section = time.perf_counter() - started
+                    yield _sse("section", section)
+
+            report_content = parser.result()
+            if not parser.complete:
+                # Keep what arrived for inspection, but not as a finished report
+                report = await db.complianceReport.create(
+                    data={
+                        "reportType": report_type,
+                        "content": report_content,
+                        "status": "REJECTED",
+                        "assetId": asset_id,
+                        "dueDate": datetime.now(),
+                        "findings": f"Model output was incomplete after {len(parser.sections)} sections"
+                    }
+                )
+                await response_cache.invalidate("reports")
+                yield _sse("error", {"detail": "Model output was incomplete", "id": report.id, "partial": True})
+                return
+
+            report = await db.complianceReport.create(
+                data={
+                    "reportType": report_type,
+                    "content": report_content,
+                    "status": "COMPLETED",
+                    "assetId": asset_id,
+                    "fingerprint": fingerprint,
+                    "dueDate": datetime.now(),
+                    "submissionDate": datetime.now()
+                }
+            )
+            report_cache.put(fingerprint, {
+                "id": report.id,
+                "content": report_content,
+                "generated_at": report.createdAt
+            })
+            await response_cache.invalidate("reports")
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        finally:
+            stream_metrics.record(first_section, time.perf_counter() - started)
+
+        yield _sse("done", {
+            "id": report.id,
+            "cached": False,
+            "title": report_content.get("title"),
+            "time_to_first_section": first_section,
+            "prompt_tokens": prompt.tokens
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/reports/stream/metrics")
+async def get_report_stream_metrics(user: dict = Depends(check_roles(["admin"]))):
+    """Time-to-first-section for streamed report generation."""
+    return stream_metrics.stats()
+
+@router.get("/reports/prompt/{asset_id}")
+async def preview_report_prompt(
+    asset_id: str,
+    report_type: str,
+    user: dict = Depends(check_roles(["admin"]))
+):
+    """Estimated tokens of the prompt a report would send, without calling the model."""
+    try:
+        asset_payload, _ = await load_report_inputs(asset_id, report_type)
+        instructions = REPORT_TEMPLATES[report_type]["system_prompt"]
+        prompt = build_prompt(instructions, asset_payload, report_type)
+        return {
+            "tokens": prompt.tokens,
+            "raw_tokens": estimate_raw_tokens(instructions, asset_payload),
+            "budget": REPORT_PROMPT_TOKEN_BUDGET,
+            "reductions": prompt.reductions,
+            "prompt": prompt.text
+        }
+    except (HTTPException, PoolTimeoutError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_report_job(job: Dict) -> Dict:
+    """Job handler: moves the job's ComplianceReport from PENDING to COMPLETED or REJECTED."""
+    payload = job["payload"]
+    report_id = payload["report_id"]
+    await db.complianceReport.update(
+        where={"id": report_id},
+        data={"status": "IN_PROGRESS"}
+    )
+    await response_cache.invalidate("reports")
+    try:
+        report_content, fingerprint, cached = await resolve_report_content(
+            payload["asset_id"], payload["report_type"], payload.get("force", False)
+        )
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        await db.complianceReport.update(
+            where={"id": report_id},
+            data={"status": "REJECTED", "findings": f"Report generation failed: {detail}"}
+        )
+        await response_cache.invalidate("reports")
+        raise
+
+    report = await db.complianceReport.update(
+        where={"id": report_id},
+        data={
+            "content": report_content,
+            "status": "COMPLETED",
+            "fingerprint": fingerprint,
+            "submissionDate": datetime.now()
+        }
+    )
+    report_cache.put(fingerprint, {
+        "id": report.id,
+        "content": report_content,
+        "generated_at": report.createdAt
+    })
+    await response_cache.invalidate("reports")
+    return {"report_id": report.id, "cached": cached is not None}
+
+report_jobs = JobQueue(
+    "reports",
+    handler=run_report_job,
+    store_path=os.getenv("REPORT_JOB_STORE", "report_jobs.sqlite3"),
+    workers=int(os.getenv("REPORT_JOB_WORKERS", "4")),
+    max_depth=int(os.getenv("REPORT_JOB_MAX_DEPTH", "1000")),
+    stale_after=float(os.getenv("REPORT_JOB_STALE_AFTER", "120"))
+)
+
+@router.post("/reports/jobs", status_code=202)
+async def enqueue_report_job(
+    asset_id: str,
+    report_type: str,
+    force: bool = False,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """
+    Queue report generation and return immediately with a job id.
+
+    The PENDING ComplianceReport is created up front; poll the job (or its
+    events stream) to follow it through IN_PROGRESS to COMPLETED or REJECTED.
+    """
+    if report_type not in REPORT_TEMPLATES:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+    if not await db.asset.find_unique(where={"id": asset_id}):
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    report = await db.complianceReport.create(
+        data={
+            "reportType": report_type,
+            "content": {},
+            "status": "PENDING",
+            "assetId": asset_id,
+            "dueDate": datetime.now()
+        }
+    )
+    await response_cache.invalidate("reports")
+    try:
+        job = await report_jobs.enqueue({
+            "asset_id": asset_id,
+            "report_type": report_type,
+            "force": force,
+            "report_id": report.id
+        })
+    except QueueFullError as e:
+        await db.complianceReport.update(
+            where={"id": report.id},
+            data={"status": "REJECTED", "findings": str(e)}
+        )
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "job_id": job["id"],
+        "report_id": report.id,
+        "status": job["status"]
+    }
+
+@router.get("/reports/jobs/metrics")
+async def get_report_job_metrics(user: dict = Depends(check_roles(["admin"]))):
+    """Queue depth, worker utilization and job latency."""
+    return report_jobs.metrics()
+
+@router.get("/reports/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """Current state of a report generation job."""
+    job = await report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/reports/jobs/{job_id}/events")
+async def stream_report_job(
+    job_id: str,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """Server-sent events with the job's state on every change, until it finishes."""
+    if not await report_jobs.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for job in report_jobs.subscribe(job_id):
+            yield _sse(job["status"].lower(), job)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @router.get("/reports/{report_id}/pdf")
 async def export_report_pdf(
     report_id: str,
+    request: Request,
     user: dict = Depends(check_roles(["admin", "finance_director"]))
 ):
-    """Export a report as PDF and store in Firebase Storage."""
-    report = await prisma.complianceReport.find_unique(
+    """
+    Export a report as PDF and store in Firebase Storage.
+
+    Rendered PDFs are cached on disk per report version (id + updatedAt) and
+    served with an ETag, so repeat downloads are a 304 or a file read.
+    """
+    report = await db.complianceReport.find_unique(
         where={"id": report_id},
         include={
             "asset": True
@@ -225,123 +549,109 @@ async def export_report_pdf(
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-    
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    styles.add(ParagraphStyle(
-        name='CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30
-    ))
-    
-    styles.add(ParagraphStyle(
-        name='SectionHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=12
-    ))
-    
-    story = []
-    
-    # Title
-    content = report.content
-    title = Paragraph(content["title"], styles['CustomTitle'])
-    story.append(title)
-    
-    # Metadata
-    metadata = [
-        ["Asset", report.asset.name],
-        ["Report Type", report.reportType],
-        ["Generated", report.createdAt.strftime("%Y-%m-%d %H:%M:%S")],
-        ["Status", report.status]
-    ]
-    
-    meta_table = Table(metadata, colWidths=[100, 400])
-    meta_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (-1, -1), colors.white),
-        ('TEXTCOLOR', (1, 0), (-1, -1), colors.black),
-        ('FONTNAME', (1, 0), (-1, -1), 'Helvetica'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    story.append(meta_table)
-    story.append(Spacer(1, 20))
-    
-    # Sections
-    for section in content["sections"]:
-        heading = Paragraph(section["heading"], styles['SectionHeading'])
-        story.append(heading)
-        
-        content_para = Paragraph(section["content"], styles['Normal'])
-        story.append(content_para)
-        story.append(Spacer(1, 12))
-    
-    # Build PDF
-    doc.build(story)
-    
-    # Get PDF content
-    pdf_content = buffer.getvalue()
-    buffer.close()
+    if report.status != ReportStatus.COMPLETED:
+        # Pending and in-progress reports have no content to render yet
+        raise HTTPException(status_code=409, detail="Only completed reports can be exported")
 
-    # Update report with PDF URL if it doesn't exist
+    # Update report with PDF URL if it doesn't exist. Done before caching so
+    # the cache key uses the updatedAt that later downloads will see.
     if not report.pdfUrl:
         try:
-            # Store PDF content and get URL
-            pdf_blob = pdf_content
-            
-            # Update report with PDF URL
-            await prisma.complianceReport.update(
+            report = await db.complianceReport.update(
                 where={"id": report_id},
                 data={
                     "pdfUrl": f"/api/reports/{report_id}/pdf",  # Store API endpoint as URL
                     "updatedAt": datetime.now()
+                },
+                include={
+                    "asset": True
                 }
             )
+            await response_cache.invalidate("reports")
         except Exception as e:
             print(f"Error storing PDF: {str(e)}")
             # Continue to serve PDF even if storage fails
-    
-    return Response(
-        content=pdf_content,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=report-{report_id}.pdf"
-        }
-    )
+
+    key = pdf_cache.key(report.id, report.updatedAt)
+    etag = f'"{key}"'
+    headers = {
+        "Content-Disposition": f"attachment; filename=report-{report_id}.pdf"
+    }
+    if etag_matches(request, etag):
+        return cached_file_response(request, None, etag, "application/pdf", headers)
+
+    pdf_content = await pdf_cache.get(key)
+    if pdf_content is None:
+        pdf_content = await render_pdf({
+            "title": report.content.get("title") or f"{report.reportType} Report",
+            "sections": report.content.get("sections", []),
+            "asset_name": report.asset.name,
+            "report_type": report.reportType,
+            "generated": report.createdAt.strftime("%Y-%m-%d %H:%M:%S"),
+            "status": str(report.status)
+        })
+        await pdf_cache.put(key, pdf_content)
+
+    return cached_file_response(request, pdf_content, etag, "application/pdf", headers)
 
 @router.get("/reports")
-async def get_reports(user: dict = Depends(check_roles(["admin", "finance_director"]))):
-    """Fetch all reports."""
+async def get_reports(
+    request: Request,
+    take: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.desc,
+    assetId: Optional[str] = None,
+    reportType: Optional[str] = None,
+    status: Optional[ReportStatus] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """
+    List report metadata, one keyset page at a time.
+
+    The content JSON is never included (its title is exposed as `title`);
+    fetch a single report for the full content. `fields` narrows the
+    projection further, e.g. `fields=reportType,status,title`.
+    """
+    projection = parse_fields(fields)
+    filters = {
+        "take": take,
+        "cursor": cursor,
+        "order": order.value,
+        "asset_id": assetId,
+        "report_type": reportType,
+        "status": status.value if status else None,
+        "created_after": created_after,
+        "created_before": created_before
+    }
+
+    async def load():
+        return await fetch_report_page(projection, **filters)
+
     try:
-        reports = await prisma.complianceReport.find_many(
-            order_by={
-                "createdAt": "desc"
-            }
+        return await response_cache.respond(
+            request, "reports", {**filters, "fields": projection}, user, ["reports"], load
         )
-        return reports
+    except (HTTPException, PoolTimeoutError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/reports/{report_id}")
 async def get_report(
     report_id: str,
+    request: Request,
     user: dict = Depends(check_roles(["admin", "finance_director"]))
 ):
     """Fetch a specific report."""
-    report = await prisma.complianceReport.find_unique(
-        where={"id": report_id}
-    )
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    return report
\ No newline at end of file
+    async def load():
+        report = await db.complianceReport.find_unique(
+            where={"id": report_id}
+        )
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        return report
+
+    return await response_cache.respond(request, "report", {"id": report_id}, user, ["reports"], load)
@@ -0,0 +1,246 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from datetime import datetime
+from enum import Enum
+import csv
+import io
+import json
+import os
+from .auth import check_roles
+from .database import db
+from .models import AssetType, AssetStatus
+from .serialization import dumps
+
+router = APIRouter()
+
+EXPORT_CHUNK_SIZE = int(os.getenv("ASSET_EXPORT_CHUNK_SIZE", "5000"))
+
+# Scalar Asset columns only; relations are left to the warehouse to join
+EXPORT_COLUMNS = [
+    ("id", "string"),
+    ("name", "string"),
+    ("type", "string"),
+    ("status", "string"),
+    ("location", "string"),
+    ("coordinates", "json"),
+    ("value", "float"),
+    ("purchaseDate", "timestamp"),
+    ("condition", "string"),
+    ("expectedLifespan", "int"),
+    ("manufacturer", "string"),
+    ("serialNumber", "string"),
+    ("warrantyExpiry", "timestamp"),
+    ("lastInspection", "timestamp"),
+    ("nextInspection", "timestamp"),
+    ("riskLevel", "string"),
+    ("priority", "string"),
+    ("departmentId", "string"),
+    ("userId", "string"),
+    ("createdAt", "timestamp"),
+    ("updatedAt", "timestamp")
+]
+EXPORT_FIELDS = [name for name, _ in EXPORT_COLUMNS]
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _normalize(row: Dict) -> Dict:
+    """Raw query rows -> plain JSON-safe values in EXPORT_FIELDS order."""
+    normalized = {}
+    for name, kind in EXPORT_COLUMNS:
+        value = row.get(name)
+        if kind == "timestamp" and value is not None:
+            value = _to_datetime(value).isoformat()
+        elif kind == "json" and isinstance(value, str):
+            value = json.loads(value)
+        normalized[name] = value
+    return normalized
+
+
+async def iter_asset_chunks(
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> AsyncIterator[List[Dict]]:
+    """
+    Walk the Asset table in primary-key order, one bounded chunk per query.
+
+    Keyset paging on id keeps every round trip an index range scan and only
+    one chunk is held in memory at a time. Columns are selected explicitly
+    so no relations or unused fields are loaded.
+    """
+    columns = ", ".join(f'"{name}"' for name in EXPORT_FIELDS)
+    conditions = ['"id" > $1']
+    params: List = []
+    if type:
+        params.append(type.value)
+        conditions.append(f'"type" = ${len(params) + 1}::"AssetType"')
+    if status:
+        params.append(status.value)
+        conditions.append(f'"status" = ${len(params) + 1}::"AssetStatus"')
+    query = (
+        f'SELECT {columns} FROM "Asset" WHERE {" AND ".join(conditions)} '
+        f'ORDER BY "id" LIMIT {int(chunk_size)}'
+    )
+
+    last_id = ""
+    while True:
+        rows = await db.query_raw(query, last_id, *params)
+        if not rows:
+            return
+        yield [_normalize(row) for row in rows]
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+async def _ndjson(chunks: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+async def _csv(chunks: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    async for rows in chunks:
+        for row in rows:
+            writer.writerow({
+                name: json.dumps(value) if kind == "json" and value is not None else value
+                for (name, kind), value in zip(EXPORT_COLUMNS, row.values())
+            })
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file object whose bytes are drained after each record batch."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(pa):
+    types = {
+        "string": pa.string(),
+        "json": pa.string(),
+        "float": pa.float64(),
+        "int": pa.int32(),
+        "timestamp": pa.timestamp("ms", tz="UTC")
+    }
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+
+def _record_batch(pa, schema, rows: Iterable[Dict]):
+    rows = list(rows)
+    arrays = []
+    for name, kind in EXPORT_COLUMNS:
+        values = [row[name] for row in rows]
+        if kind == "json":
+            values = [None if value is None else json.dumps(value) for value in values]
+        elif kind == "timestamp":
+            values = [_to_datetime(value) for value in values]
+        arrays.append(pa.array(values, type=schema.field(name).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def _columnar(chunks: AsyncIterator[List[Dict]], format: ExportFormat) -> AsyncIterator[bytes]:
+    # Imported lazily: pyarrow is only needed for columnar exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = _ByteSink()
+    if format == ExportFormat.parquet:
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    async for rows in chunks:
+        batch = _record_batch(pa, schema, rows)
+        if format == ExportFormat.parquet:
+            # One row group per chunk keeps writer memory bounded
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream"
+}
+
+
+@router.get("/assets/export")
+async def export_assets(
+    format: ExportFormat = ExportFormat.ndjson,
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
+):
+    """
+    Stream the whole asset inventory as NDJSON, CSV, Parquet or Arrow IPC.
+
+    Rows are read in keyset-ordered chunks and written out as they arrive,
+    so memory use does not grow with inventory size.
+    """
+    if format in (ExportFormat.parquet, ExportFormat.arrow):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail=f"{format.value} export requires pyarrow")
+
+    chunks = iter_asset_chunks(type=type, status=status)
+    if format == ExportFormat.ndjson:
+        body = _ndjson(chunks)
+    elif format == ExportFormat.csv:
+        body = _csv(chunks)
+    else:
+        body = _columnar(chunks, format)
+
+    extension = "arrows" if format == ExportFormat.arrow else format.value
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename=assets-{datetime.now():%Y%m%d}.{extension}"
+        }
+    )
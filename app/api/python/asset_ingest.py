@@ -0,0 +1,277 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from enum import Enum
+import codecs
+import csv
+import json
+import os
+from pydantic import ValidationError
+from .asset_queries import asset_count_cache
+from .auth import check_roles
+from .database import db, PoolTimeoutError
+from .models import AssetCreate
+from .geohash import spatial_fields
+from .projection_store import apply_new_assets
+from .risk import assess_risk
+from .response_cache import response_cache
+
+router = APIRouter()
+
+INGEST_CHUNK_SIZE = int(os.getenv("ASSET_INGEST_CHUNK_SIZE", "1000"))
+# Set in milliseconds; one chunk's create_many plus its checkpoint commit
+# together, which takes longer than Prisma's 5 s default for large chunks
+INGEST_TX_TIMEOUT = timedelta(milliseconds=int(os.getenv("ASSET_INGEST_TX_TIMEOUT", "60000")))
+INGEST_TX_MAX_WAIT = timedelta(milliseconds=int(os.getenv("ASSET_INGEST_TX_MAX_WAIT", "10000")))
+
+# CSV cells holding JSON values
+JSON_FIELDS = {"coordinates", "attachments"}
+
+
+class IngestFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+async def _lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[Optional[Dict], Optional[str]]]:
+    """Yield (row, parse_error) per CSV record; the first record is the header."""
+    header = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        # A quoted field may span lines; wait until the quotes balance
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        try:
+            row = {}
+            for name, value in zip(header, values):
+                if value == "":
+                    continue
+                row[name] = json.loads(value) if name in JSON_FIELDS else value
+        except ValueError as e:
+            yield None, f"Could not parse row: {e}"
+        else:
+            yield row, None
+    if record:
+        yield None, "Unterminated quoted field"
+
+
+async def _ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[Optional[Dict], Optional[str]]]:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield None, f"Could not parse row: {e}"
+            continue
+        if isinstance(row, dict):
+            yield row, None
+        else:
+            yield None, "Row must be an object"
+
+
+async def _numbered_chunks(
+    rows: AsyncIterator[Tuple[Optional[Dict], Optional[str]]],
+    chunk_size: int
+) -> AsyncIterator[List[Tuple[int, Optional[Dict], Optional[str]]]]:
+    """Group rows into chunks of (row_number, row, parse_error)."""
+    chunk = []
+    number = 0
+    async for row, error in rows:
+        number += 1
+        chunk.append((number, row, error))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validation_errors(error: ValidationError) -> List[Dict]:
+    return [
+        {"field": ".".join(str(part) for part in item["loc"]), "message": item["msg"]}
+        for item in error.errors()
+    ]
+
+
+async def _validate_chunk(
+    chunk: List[Tuple[int, Optional[Dict], Optional[str]]],
+    seen_serials: Set[str]
+) -> Tuple[List[Tuple[int, AssetCreate]], List[Dict]]:
+    """Validate rows and screen out duplicate serial numbers and unknown departments."""
+    valid = []
+    errors = []
+    for number, row, parse_error in chunk:
+        if parse_error:
+            errors.append({"row": number, "errors": [{"field": None, "message": parse_error}]})
+            continue
+        try:
+            asset = AssetCreate(**row)
+        except ValidationError as e:
+            errors.append({"row": number, "errors": _validation_errors(e)})
+            continue
+        if asset.serialNumber:
+            if asset.serialNumber in seen_serials:
+                errors.append({
+                    "row": number,
+                    "errors": [{"field": "serialNumber", "message": "Duplicate serialNumber in upload"}]
+                })
+                continue
+            seen_serials.add(asset.serialNumber)
+        valid.append((number, asset))
+
+    serials = [asset.serialNumber for _, asset in valid if asset.serialNumber]
+    existing = set()
+    if serials:
+        rows = await db.asset.find_many(where={"serialNumber": {"in": serials}})
+        existing = {row.serialNumber for row in rows}
+
+    department_ids = list({asset.departmentId for _, asset in valid})
+    departments = set()
+    if department_ids:
+        rows = await db.department.find_many(where={"id": {"in": department_ids}})
+        departments = {row.id for row in rows}
+
+    accepted = []
+    for number, asset in valid:
+        if asset.serialNumber in existing:
+            errors.append({
+                "row": number,
+                "errors": [{"field": "serialNumber", "message": "serialNumber already exists"}]
+            })
+        elif asset.departmentId not in departments:
+            errors.append({
+                "row": number,
+                "errors": [{"field": "departmentId", "message": "Department not found"}]
+            })
+        else:
+            accepted.append((number, asset))
+    return accepted, errors
+
+
+@router.post("/assets/import")
+async def import_assets(
+    request: Request,
+    format: IngestFormat = IngestFormat.csv,
+    ingest_id: Optional[str] = None,
+    chunk_size: int = Query(INGEST_CHUNK_SIZE, ge=1, le=10000),
+    user: dict = Depends(check_roles(["admin"]))
+):
+    """
+    Bulk-create assets from a streamed CSV or NDJSON request body.
+
+    Rows are validated with AssetCreate in chunks, and valid rows are written
+    with create_many. Each chunk's checkpoint is advanced inside the same
+    transaction. To resume an interrupted upload, send the same file with
+    `ingest_id`; chunks already committed are skipped. The response lists
+    every rejected row with its errors.
+    """
+    if ingest_id:
+        ingest = await db.assetIngest.find_unique(where={"id": ingest_id})
+        if not ingest:
+            raise HTTPException(status_code=404, detail="Ingest not found")
+        if ingest.format != format.value:
+            raise HTTPException(status_code=400, detail=f"Ingest {ingest_id} was started as {ingest.format}")
+        # Chunk boundaries must match the original upload for the checkpoint to line up
+        chunk_size = ingest.chunkSize
+    else:
+        ingest = await db.assetIngest.create(
+            data={
+                "userId": user["user_id"],
+                "format": format.value,
+                "chunkSize": chunk_size
+            }
+        )
+
+    parse = _csv_rows if format == IngestFormat.csv else _ndjson_rows
+    rows = parse(_lines(request.stream()))
+    seen_serials: Set[str] = set()
+    errors: List[Dict] = []
+    inserted = 0
+    chunk_index = 0
+
+    async for chunk in _numbered_chunks(rows, chunk_size):
+        chunk_index += 1
+        if chunk_index <= ingest.chunksCommitted:
+            continue
+
+        accepted, chunk_errors = await _validate_chunk(chunk, seen_serials)
+        errors.extend(chunk_errors)
+        try:
+            async with db.tx(timeout=INGEST_TX_TIMEOUT, max_wait=INGEST_TX_MAX_WAIT) as tx:
+                if accepted:
+                    risk_levels = assess_risk([asset for _, asset in accepted], datetime.now().year)
+                    await tx.asset.create_many(
+                        data=[
+                            {
+                                **asset.dict(),
+                                **spatial_fields(asset.coordinates),
+                                "userId": user["user_id"],
+                                "riskLevel": level,
+                                "priority": "MEDIUM"
+                            }
+                            for (_, asset), level in zip(accepted, risk_levels)
+                        ]
+                    )
+                    await apply_new_assets(tx, [asset for _, asset in accepted])
+                ingest = await tx.assetIngest.update(
+                    where={"id": ingest.id},
+                    data={
+                        "chunksCommitted": chunk_index,
+                        "rowsInserted": {"increment": len(accepted)},
+                        "rowsRejected": {"increment": len(chunk_errors)}
+                    }
+                )
+        except PoolTimeoutError:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": f"Chunk {chunk_index} failed and was rolled back: {e}",
+                    "ingest_id": ingest.id,
+                    "chunks_committed": chunk_index - 1,
+                    "errors": errors
+                }
+            )
+        inserted += len(accepted)
+        if accepted:
+            # Committed even if a later chunk fails
+            asset_count_cache.clear()
+
+    ingest = await db.assetIngest.update(
+        where={"id": ingest.id},
+        data={"status": "COMPLETED"}
+    )
+    await response_cache.invalidate("assets")
+    return {
+        "ingest_id": ingest.id,
+        "chunks_committed": ingest.chunksCommitted,
+        "rows_inserted": inserted,
+        "rows_rejected": len(errors),
+        "total_rows_inserted": ingest.rowsInserted,
+        "errors": errors
+    }
@@ -0,0 +1,24 @@
+import os
+from .cache import TTLCache
+from .database import db
+from .response_cache import response_cache
+
+# Filtered asset counts, so paging does not rescan the table on every request.
+# Anything that adds or removes assets clears it. Keys include the "assets"
+# tag version, so writes in other workers (see response_cache) retire them too.
+asset_count_cache = TTLCache(maxsize=256, ttl=float(os.getenv("ASSET_COUNT_CACHE_TTL", "30")))
+
+
+async def count_assets(where: dict) -> int:
+    try:
+        version = (await response_cache.backend.tag_versions(["assets"]))[0]
+    except Exception:
+        version = None
+    if version is None:
+        return await db.asset.count(where=where)
+    key = (version, *sorted((field, str(value)) for field, value in where.items()))
+    total = asset_count_cache.get(key)
+    if total is None:
+        total = await db.asset.count(where=where)
+        asset_count_cache.set(key, total)
+    return total
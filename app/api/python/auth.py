@@ -1,14 +1,19 @@
 from typing import Optional, List
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-import jwt
+from jose import jwt, JWTError
+import hashlib
 import os
+import time
 from datetime import datetime
-from prisma import Prisma
+from .cache import TTLCache
+from .database import db, PoolTimeoutError
+from .metrics import span
+from .response_cache import response_cache
 
 security = HTTPBearer()
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
-CLERK_PEM_PUBLIC_KEY = """-----BEGIN PUBLIC KEY-----
+CLERK_PEM_PUBLIC_KEY = os.getenv("CLERK_PEM_PUBLIC_KEY") or """-----BEGIN PUBLIC KEY-----
 MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEA0f3qKl6NqPNHYpWGYGQV
 YsQwOJe9yZ9RHO/VF8z3QvhZc1Fz0Jk8nxeqwgKDxZ0IjP4z7KqVmtGZqPP4Dsog
 x5kJXx1Edx9zO9tPqy4zBx1tL8Bv/9zckG4Qc5kHxPR6HJ8Ry5pTzwXdRyYYbqz9
@@ -17,46 +22,104 @@ hGpI4UJy5UYUzX+RlKUqhPYZVaUxXl5tZrCJz1ub6U1VGz2qJz8xO+KhN1Z7oXQY
 wGEKo1ph9GqQZE0HkxQE4M4ghrUy0qKQEk5YLlXX6Rk7qwIDAQAB
 -----END PUBLIC KEY-----"""
 
-prisma = Prisma()
+# Verified tokens keyed by token hash, user role records keyed by Clerk `sub`.
+# Entries never outlive the token's `exp`. User records carry the version of
+# their "auth-user:<sub>" tag in the response cache backend, so an
+# invalidation in any worker (shared with Redis) retires them everywhere.
+token_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+)
+user_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_USER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+)
+
 
 class AuthError(HTTPException):
     def __init__(self, detail: str):
         super().__init__(status_code=401, detail=detail)
 
-async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
+def _seconds_until_expiry(payload: dict) -> float:
+    exp = payload.get("exp")
+    return float("inf") if exp is None else exp - time.time()
+
+def _user_tag(clerk_id: str) -> str:
+    return f"auth-user:{clerk_id}"
+
+async def _user_version(clerk_id: str) -> Optional[int]:
     try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            CLERK_PEM_PUBLIC_KEY,
-            algorithms=["RS256"],
-            audience="bolt-2.0",
-            options={"verify_exp": True}
-        )
+        return (await response_cache.backend.tag_versions([_user_tag(clerk_id)]))[0]
+    except Exception:
+        # Backend unreachable: an invalidation could be missed, so skip the cache
+        return None
+
+async def invalidate_user(clerk_id: str):
+    """Drop a cached user record, e.g. after their role changes or they are removed."""
+    user_cache.pop(clerk_id)
+    await response_cache.invalidate(_user_tag(clerk_id))
+
+def auth_cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats()
+    }
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
+    token = credentials.credentials
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(token_key)
+    if payload is not None:
         return payload
+
+    try:
+        with span("auth.verify_token"):
+            payload = jwt.decode(
+                token,
+                CLERK_PEM_PUBLIC_KEY,
+                algorithms=["RS256"],
+                audience="bolt-2.0",
+                options={"verify_exp": True}
+            )
     except jwt.ExpiredSignatureError:
         raise AuthError("Token has expired")
-    except jwt.InvalidTokenError:
+    except JWTError:
         raise AuthError("Invalid token")
 
+    token_cache.set(token_key, payload, ttl=_seconds_until_expiry(payload))
+    return payload
+
 async def get_current_user(payload: dict = Depends(verify_token)) -> dict:
+    version = await _user_version(payload.get("sub"))
+    cached = user_cache.get(payload.get("sub"))
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+
     try:
         # Get user from database
-        user = await prisma.user.find_unique(
-            where={"clerk_id": payload.get("sub")}
-        )
+        with span("auth.get_current_user"):
+            user = await db.user.find_unique(
+                where={"clerk_id": payload.get("sub")}
+            )
         
         if not user:
             raise AuthError("User not found")
             
-        return {
+        current_user = {
             "user_id": user.clerk_id,
             "email": user.email,
             "role": user.role
         }
+    except PoolTimeoutError:
+        # Overload, not a bad token: let the 503 handler answer
+        raise
     except Exception as e:
         raise AuthError(f"Could not validate user: {str(e)}")
 
+    if version is not None:
+        user_cache.set(payload.get("sub"), (version, current_user), ttl=_seconds_until_expiry(payload))
+    return current_user
+
 def check_roles(allowed_roles: List[str]):
     async def role_checker(user: dict = Depends(get_current_user)):
         if user["role"] not in allowed_roles:
@@ -0,0 +1,63 @@
+"""
+Compare two load test results and flag regressions.
+
+    python -m app.api.python.benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+A scenario regresses when any latency percentile grows, or throughput
+drops, by more than the threshold, or when it starts returning errors.
+Exits 1 if any scenario regressed, so it can gate CI.
+"""
+from typing import Dict, List
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> float:
+    if not before:
+        return 0.0 if not after else float("inf")
+    return (after - before) / before
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float = 0.10) -> List[Dict]:
+    """One row per scenario present in both results, with relative changes."""
+    rows = []
+    for name, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(name)
+        if after is None:
+            continue
+        changes = {key: _change(before[key], after[key]) for key in LATENCY_KEYS}
+        changes["throughput_rps"] = _change(before["throughput_rps"], after["throughput_rps"])
+        regressed = (
+            any(changes[key] > threshold for key in LATENCY_KEYS)
+            or changes["throughput_rps"] < -threshold
+            or (after["errors"] > 0 and before["errors"] == 0)
+        )
+        rows.append({"scenario": name, "changes": changes, "errors": after["errors"], "regressed": regressed})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative change, e.g. 0.10 for 10%%")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f'{(baseline.get("commit") or "?")[:10]} -> {(candidate.get("commit") or "?")[:10]}')
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        changes = "  ".join(f"{key} {value:+.1%}" for key, value in row["changes"].items())
+        print(f'{row["scenario"]:18} {changes}  errors {row["errors"]}{"  REGRESSED" if row["regressed"] else ""}')
+    sys.exit(1 if any(row["regressed"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
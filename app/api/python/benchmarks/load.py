@@ -0,0 +1,231 @@
+"""
+Load test of the running API against a seeded Postgres and a stub model.
+
+Seeds the database (see benchmarks/query_shapes.py), starts the stub model
+endpoint in-process, launches the real app under uvicorn with a throwaway
+token-signing key, and drives each scenario at a fixed concurrency:
+
+    DATABASE_URL=postgresql://.../bench python -m app.api.python.benchmarks.load \
+        --assets 20000 --concurrency 32 --duration 30 --output load.json
+
+Results are JSON keyed by scenario (throughput, error count, p50/p95/p99 in
+ms) together with the commit and settings they were taken at; compare two
+runs with benchmarks/compare.py. Run from the repository root.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import httpx
+from ..database import db
+from ..projection_store import rebuild_aggregates
+from .query_shapes import seed
+from .stub_model import StubModel, StubServer
+from .tokens import generate_keypair, mint_token
+
+BENCH_CLERK_ID = "bench-user"
+
+SCENARIOS = ["assets_list", "projections", "projections_live", "reports_list", "report_generate", "pdf_export"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Throughput and latency percentiles (ms) for one scenario."""
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2)
+    }
+
+
+async def prepare(assets: int) -> Dict[str, List[str]]:
+    """Seed data, create the benchmark user and return ids to request."""
+    await db.connect(warm=1)
+    try:
+        await seed(assets)
+        await db.execute_raw(
+            'INSERT INTO "users" ("id", "clerk_id", "email", "role", "created_at", "updated_at") '
+            "VALUES ($1, $1, 'bench@example.com', 'admin', NOW(), NOW()) "
+            "ON CONFLICT (\"clerk_id\") DO UPDATE SET \"role\" = 'admin'",
+            BENCH_CLERK_ID
+        )
+        await rebuild_aggregates()
+        asset_rows = await db.query_raw('SELECT "id" FROM "Asset" WHERE "id" LIKE \'bench-asset-%\' LIMIT 500')
+        report_rows = await db.query_raw(
+            'SELECT "id" FROM "ComplianceReport" WHERE "id" LIKE \'bench-report-%\' LIMIT 200'
+        )
+    finally:
+        await db.disconnect()
+    return {"assets": [row["id"] for row in asset_rows], "reports": [row["id"] for row in report_rows]}
+
+
+def request_factories(ids: Dict[str, List[str]]) -> Dict[str, Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]]:
+    """One coroutine factory per scenario, each issuing a single request."""
+    return {
+        "assets_list": lambda client: client.get("/api/assets", params={"take": 50}),
+        "projections": lambda client: client.get(
+            "/api/financial-plans/projections", params={"years": 10, "source": "materialized"}
+        ),
+        "projections_live": lambda client: client.get(
+            "/api/financial-plans/projections", params={"years": 10, "source": "live"}
+        ),
+        "reports_list": lambda client: client.get("/api/reports", params={"take": 50}),
+        "report_generate": lambda client: client.post(
+            f"/api/reports/generate/{random.choice(ids['assets'])}",
+            params={"report_type": "POLICY", "force": "true"}
+        ),
+        "pdf_export": lambda client: client.get(f"/api/reports/{random.choice(ids['reports'])}/pdf")
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    send: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    concurrency: int,
+    duration: float,
+    warmup: float
+) -> Dict:
+    """Run `concurrency` closed-loop workers; only requests started after warmup count."""
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while True:
+            began = time.perf_counter()
+            if began >= stop_at:
+                return
+            try:
+                response = await send(client)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if began < measure_from:
+                continue
+            if ok:
+                latencies.append(time.perf_counter() - began)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - measure_from)
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"API at {base_url} did not become healthy")
+
+
+async def run_scenarios(base_url: str, token: str, ids: Dict, args) -> Dict[str, Dict]:
+    factories = request_factories(ids)
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=args.request_timeout
+    ) as client:
+        await wait_until_healthy(base_url)
+        for name in args.scenarios:
+            results[name] = await drive(client, factories[name], args.concurrency, args.duration, args.warmup)
+            print(f"{name:18} {json.dumps(results[name])}")
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--assets", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--model-latency", type=float, default=0.5, help="Seconds the stub model takes per call")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the API")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    ids = asyncio.run(prepare(args.assets))
+    private_pem, public_pem = generate_keypair()
+    token = mint_token(private_pem, BENCH_CLERK_ID, ttl=args.duration * len(args.scenarios) * 4 + 600)
+
+    stub = StubServer(StubModel(latency=args.model_latency), port=args.stub_port)
+    stub.start()
+    env = {
+        **os.environ,
+        "CLERK_PEM_PUBLIC_KEY": public_pem,
+        "AI_ENDPOINT": stub.url,
+        "AI_API_KEY": "stub"
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.api.python.main:app",
+            "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+        ],
+        env=env
+    )
+    try:
+        scenarios = asyncio.run(run_scenarios(f"http://127.0.0.1:{args.port}", token, ids, args))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        stub.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "assets": args.assets,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "model_latency": args.model_latency,
+            "workers": args.workers,
+            "python": sys.version.split()[0]
+        },
+        "scenarios": scenarios
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
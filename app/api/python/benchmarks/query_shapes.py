@@ -0,0 +1,236 @@
+"""
+EXPLAIN plans and p50/p99 latency for every cataloged query shape, with the
+secondary indexes dropped ("before") and then recreated ("after").
+
+Run against a scratch Postgres database that has the schema applied:
+
+    DATABASE_URL=postgresql://.../bench python -m app.api.python.benchmarks.query_shapes \
+        --assets 100000 --runs 200 --output query_shapes.json
+
+Seeding is skipped if the database already holds at least --assets assets.
+The indexes are always recreated before the harness exits.
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import time
+from ..database import db
+from ..geohash import cover, radius_boxes
+from ..maintenance import REFRESH_SQL
+from ..query_shapes import INDEXES, QUERY_SHAPES
+
+SEED_STATEMENTS = [
+    '''
+    INSERT INTO "Department" ("id", "name", "code", "budget", "updatedAt")
+    SELECT 'bench-dept-' || n, 'Department ' || n, 'BENCH' || n, 1000000, NOW()
+    FROM generate_series(1, 20) AS n
+    ON CONFLICT DO NOTHING
+    ''',
+    '''
+    INSERT INTO "Asset" (
+        "id", "name", "type", "status", "location", "value", "purchaseDate", "condition",
+        "expectedLifespan", "lastInspection", "nextInspection", "userId", "departmentId", "createdAt", "updatedAt"
+    )
+    SELECT
+        'bench-asset-' || lpad(n::text, 8, '0'),
+        'Asset ' || n,
+        (ARRAY['BUILDING','VEHICLE','EQUIPMENT','INFRASTRUCTURE','LAND','IT_SYSTEM','UTILITY'])[1 + n % 7]::"AssetType",
+        -- Mostly active, as in a live inventory
+        (ARRAY['ACTIVE','ACTIVE','ACTIVE','ACTIVE','ACTIVE','ACTIVE','MAINTENANCE','INACTIVE','PLANNED','DISPOSED'])[1 + n % 10]::"AssetStatus",
+        'Site ' || (n % 500),
+        1000 + (n * 7919) % 5000000,
+        NOW() - ((n % 60) || ' years')::interval,
+        (ARRAY['EXCELLENT','GOOD','FAIR','POOR','CRITICAL'])[1 + n % 5]::"AssetCondition",
+        5 + n % 50,
+        NOW() - ((n % 365) || ' days')::interval,
+        NOW() + ((n % 365) || ' days')::interval,
+        'bench',
+        'bench-dept-' || (1 + n % 20),
+        NOW() - (n || ' minutes')::interval,
+        NOW()
+    FROM generate_series($1::int, $2::int) AS n
+    ''',
+    '''
+    INSERT INTO "MaintenanceLog" ("id", "date", "type", "description", "cost", "performedBy", "assetId", "updatedAt")
+    SELECT
+        'bench-log-' || a || '-' || k,
+        NOW() - ((k * 37 + a % 30) || ' days')::interval,
+        (ARRAY['PREVENTIVE','CORRECTIVE','INSPECTION'])[1 + k % 3]::"MaintenanceType",
+        'Routine work',
+        100 + (a * k) % 10000,
+        'crew',
+        'bench-asset-' || lpad(a::text, 8, '0'),
+        NOW()
+    FROM generate_series($1::int, $2::int) AS a, generate_series(1, 10) AS k
+    ''',
+    '''
+    INSERT INTO "FinancialPlan" (
+        "id", "year", "budget", "allocated", "spent", "fundingSource", "description",
+        "startDate", "endDate", "status", "assetId", "updatedAt"
+    )
+    SELECT
+        'bench-plan-' || a || '-' || k,
+        2020 + (a + k) % 10,
+        50000, 25000, 10000, 'capital', 'Plan',
+        NOW(), NOW() + INTERVAL '1 year',
+        (ARRAY['DRAFT','PENDING_APPROVAL','APPROVED','REJECTED','COMPLETED'])[1 + (a + k) % 5]::"PlanStatus",
+        'bench-asset-' || lpad(a::text, 8, '0'),
+        NOW()
+    FROM generate_series($1::int, $2::int) AS a, generate_series(1, 3) AS k
+    ''',
+    '''
+    INSERT INTO "InsuranceDetail" (
+        "id", "policyNumber", "provider", "coverage", "startDate", "endDate", "assetId", "updatedAt"
+    )
+    SELECT
+        'bench-policy-' || a, 'BENCH-POLICY-' || a, 'insurer', 1000000,
+        NOW(), NOW() + INTERVAL '1 year',
+        'bench-asset-' || lpad(a::text, 8, '0'),
+        NOW()
+    FROM generate_series($1::int, $2::int) AS a
+    ''',
+    '''
+    INSERT INTO "ComplianceReport" (
+        "id", "reportType", "content", "status", "dueDate", "assetId", "fingerprint", "createdAt", "updatedAt"
+    )
+    SELECT
+        'bench-report-' || a || '-' || k,
+        (ARRAY['maintenance','compliance','financial'])[1 + k % 3],
+        jsonb_build_object('title', 'Report ' || a || '-' || k, 'sections', '[]'::jsonb),
+        'COMPLETED',
+        NOW(),
+        'bench-asset-' || lpad(a::text, 8, '0'),
+        md5(a || '-' || k),
+        NOW() - ((a * 5 + k) || ' minutes')::interval,
+        NOW()
+    FROM generate_series($1::int, $2::int) AS a, generate_series(1, 5) AS k
+    '''
+]
+
+
+async def seed(assets: int, batch: int = 20_000):
+    await db.execute_raw(SEED_STATEMENTS[0])
+    existing = (await db.query_raw('SELECT COUNT(*)::int AS n FROM "Asset" WHERE "id" LIKE \'bench-asset-%\''))[0]["n"]
+    for start in range(existing + 1, assets + 1, batch):
+        end = min(start + batch - 1, assets)
+        for statement in SEED_STATEMENTS[1:]:
+            await db.execute_raw(statement, start, end)
+    await db.execute_raw(REFRESH_SQL.format(where=""))
+    for table in ("Asset", "AssetMaintenanceSummary", "MaintenanceLog", "FinancialPlan", "InsuranceDetail", "ComplianceReport"):
+        await db.execute_raw(f'ANALYZE "{table}"')
+
+
+async def _bindings() -> Dict[str, object]:
+    """Concrete values for the catalog's ":name" placeholders, taken from seeded rows."""
+    middle = (await db.query_raw(
+        'SELECT "id", "departmentId" FROM "Asset" ORDER BY "id" OFFSET '
+        '(SELECT COUNT(*) / 2 FROM "Asset") LIMIT 1'
+    ))[0]
+    report = (await db.query_raw(
+        'SELECT "id", "fingerprint" FROM "ComplianceReport" WHERE "assetId" = $1 LIMIT 1', middle["id"]
+    ))
+    page = await db.query_raw('SELECT "id" FROM "Asset" ORDER BY "createdAt", "id" LIMIT 10')
+    # A 500 m circle in the area benchmarks/spatial.py seeds coordinates into
+    (min_lat, min_lng, max_lat, max_lng), = radius_boxes(49.25, -123.1, 500)
+    geohash_low, geohash_high = cover([(min_lat, min_lng, max_lat, max_lng)])[0]
+    return {
+        ":asset": middle["id"],
+        ":asset_page": [row["id"] for row in page],
+        ":department": middle["departmentId"],
+        ":report": report[0]["id"] if report else "",
+        ":fingerprint": report[0]["fingerprint"] if report else "",
+        ":plan_year": 2024,
+        ":clerk_id": "bench-user",
+        ":geohash_low": geohash_low,
+        ":geohash_high": geohash_high,
+        ":min_lat": min_lat,
+        ":max_lat": max_lat,
+        ":min_lng": min_lng,
+        ":max_lng": max_lng
+    }
+
+
+def _percentile(timings: List[float], percentile: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))]
+
+
+async def measure(shape: Dict, bindings: Dict, runs: int) -> Optional[Dict]:
+    if not shape["sql"]:
+        return None
+    params = [bindings.get(param, param) for param in shape["params"]]
+    plan = await db.query_raw(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {shape["sql"]}', *params)
+    plan = plan[0]["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await db.query_raw(shape["sql"], *params)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    root = plan[0]["Plan"]
+    return {
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p99_ms": round(_percentile(timings, 99), 3),
+        "plan": _plan_summary(root),
+        "execution_ms": plan[0].get("Execution Time")
+    }
+
+
+def _plan_summary(node: Dict) -> str:
+    """Compact one-line plan: node types with the index each one uses."""
+    label = node["Node Type"]
+    if node.get("Index Name"):
+        label += f' using {node["Index Name"]}'
+    children = [_plan_summary(child) for child in node.get("Plans", [])]
+    return f'{label} -> ({", ".join(children)})' if children else label
+
+
+async def run(assets: int, runs: int) -> Dict:
+    await db.connect(warm=1)
+    results: Dict[str, Dict] = {shape["name"]: {"index": shape["index"]} for shape in QUERY_SHAPES}
+    try:
+        await seed(assets)
+        bindings = await _bindings()
+
+        for name in INDEXES:
+            await db.execute_raw(f'DROP INDEX IF EXISTS "{name}"')
+        for shape in QUERY_SHAPES:
+            results[shape["name"]]["before"] = await measure(shape, bindings, runs)
+    finally:
+        for statement in INDEXES.values():
+            await db.execute_raw(statement)
+
+    try:
+        for shape in QUERY_SHAPES:
+            results[shape["name"]]["after"] = await measure(shape, bindings, runs)
+    finally:
+        await db.disconnect()
+    return {"assets": assets, "runs": runs, "shapes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--assets", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.assets, args.runs))
+    for name, result in report["shapes"].items():
+        before, after = result.get("before"), result.get("after")
+        if before and after:
+            print(
+                f'{name:34} p50 {before["p50_ms"]:>9.3f} -> {after["p50_ms"]:>8.3f} ms   '
+                f'p99 {before["p99_ms"]:>9.3f} -> {after["p99_ms"]:>8.3f} ms   {after["plan"]}'
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
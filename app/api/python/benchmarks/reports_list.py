@@ -0,0 +1,143 @@
+"""
+Payload size and latency of the report listing at growing table sizes.
+
+Compares the previous behaviour (every report with its content JSON) with
+the paginated, projected listing, against a scratch Postgres database:
+
+    DATABASE_URL=postgresql://.../bench python -m app.api.python.benchmarks.reports_list \
+        --sizes 10000 100000 1000000
+
+Seeded rows are tagged with a BENCH- id prefix and removed afterwards. The
+full legacy listing is skipped above --legacy-max rows, where it no longer
+fits comfortably in memory.
+"""
+from typing import Dict, List
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from ..database import db
+from ..report_queries import DEFAULT_REPORT_FIELDS, fetch_report_page
+
+SEED_SQL = '''
+INSERT INTO "ComplianceReport" ("id", "reportType", "content", "status", "dueDate", "assetId", "createdAt", "updatedAt")
+SELECT
+    'BENCH-' || lpad(n::text, 8, '0'),
+    (ARRAY['maintenance', 'compliance', 'financial'])[1 + n % 3],
+    jsonb_build_object(
+        'title', 'Benchmark report ' || n,
+        'sections', (
+            SELECT jsonb_agg(jsonb_build_object('heading', 'Section ' || s, 'content', repeat('Lorem ipsum dolor sit amet. ', 40)))
+            FROM generate_series(1, 6) AS s
+        )
+    ),
+    'COMPLETED',
+    NOW(),
+    $1,
+    NOW() - (n || ' seconds')::interval,
+    NOW()
+FROM generate_series($2::int, $3::int) AS n
+'''
+
+
+async def _seed(size: int, asset_id: str, existing: int) -> int:
+    batch = 50_000
+    for start in range(existing + 1, size + 1, batch):
+        await db.execute_raw(SEED_SQL, asset_id, start, min(start + batch - 1, size))
+    return size
+
+
+async def _fixture_asset() -> str:
+    department = await db.department.upsert(
+        where={"code": "BENCH"},
+        data={"create": {"name": "Benchmark", "code": "BENCH", "budget": 0}, "update": {}}
+    )
+    asset = await db.asset.find_first(where={"departmentId": department.id})
+    if asset:
+        return asset.id
+    now = datetime.now()
+    asset = await db.asset.create(data={
+        "name": "Benchmark asset", "type": "BUILDING", "status": "ACTIVE", "location": "-",
+        "value": 1.0, "purchaseDate": now, "condition": "GOOD", "expectedLifespan": 10,
+        "lastInspection": now, "nextInspection": now, "userId": "bench", "departmentId": department.id
+    })
+    return asset.id
+
+
+async def _timed(call, runs: int):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, timings
+
+
+def _summary(timings: List[float], payload) -> Dict:
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "payload_bytes": len(json.dumps(payload, default=str).encode())
+    }
+
+
+async def run(sizes: List[int], runs: int, page_size: int, legacy_max: int) -> List[Dict]:
+    await db.connect(warm=1)
+    results = []
+    try:
+        asset_id = await _fixture_asset()
+        seeded = 0
+        for size in sorted(sizes):
+            seeded = await _seed(size, asset_id, seeded)
+            await db.execute_raw('ANALYZE "ComplianceReport"')
+            result = {"reports": size}
+
+            if size <= legacy_max:
+                rows, timings = await _timed(
+                    lambda: db.query_raw(
+                        'SELECT * FROM "ComplianceReport" WHERE "id" LIKE \'BENCH-%\' ORDER BY "createdAt" DESC'
+                    ),
+                    runs
+                )
+                result["legacy_full_listing"] = _summary(timings, rows)
+
+            page, timings = await _timed(lambda: fetch_report_page(DEFAULT_REPORT_FIELDS, page_size), runs)
+            result["first_page"] = _summary(timings, page)
+
+            # Deep pages cost the same as the first with keyset paging
+            cursor = page["next_cursor"]
+            for _ in range(20):
+                if not cursor:
+                    break
+                page = await fetch_report_page(DEFAULT_REPORT_FIELDS, page_size, cursor=cursor)
+                cursor = page["next_cursor"]
+            if cursor:
+                deep, timings = await _timed(
+                    lambda: fetch_report_page(DEFAULT_REPORT_FIELDS, page_size, cursor=cursor),
+                    runs
+                )
+                result["page_21"] = _summary(timings, deep)
+
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        await db.execute_raw('DELETE FROM "ComplianceReport" WHERE "id" LIKE \'BENCH-%\'')
+        await db.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.runs, args.page_size, args.legacy_max))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Wall time of Monte Carlo budget projections by portfolio size.
+
+Runs the same process pool the API uses over a synthetic inventory; no
+database is needed:
+
+    python -m app.api.python.benchmarks.risk --assets 10000 100000 --trials 10000
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from ..projections import CONDITIONS, AssetColumns
+from ..risk import RISK_SIMULATION_WORKERS, run_simulation, shutdown_simulator
+
+
+def make_columns(count: int, seed: int = 7) -> AssetColumns:
+    rng = np.random.default_rng(seed)
+    return AssetColumns(
+        ids=[f"asset-{n:08d}" for n in range(count)],
+        names=[f"Asset {n}" for n in range(count)],
+        value=rng.uniform(1_000, 5_000_000, count),
+        purchase_year=rng.integers(1960, 2025, count),
+        lifespan=rng.integers(5, 61, count),
+        condition=rng.integers(0, len(CONDITIONS), count)
+    )
+
+
+async def run(counts: List[int], trials: int, years: int) -> Dict:
+    results = {}
+    try:
+        for count in counts:
+            columns = make_columns(count)
+            started = time.perf_counter()
+            await run_simulation(columns, 2024, years, trials)
+            results[count] = {"seconds": round(time.perf_counter() - started, 3)}
+    finally:
+        shutdown_simulator()
+    return {"trials": trials, "years": years, "workers": RISK_SIMULATION_WORKERS, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--assets", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--trials", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.assets, args.trials, args.years))
+    for count, result in report["results"].items():
+        print(f'{count:>8} assets  {report["trials"]} trials  {report["workers"]} workers  {result["seconds"]:>8.3f} s')
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
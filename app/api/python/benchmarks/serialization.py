@@ -0,0 +1,157 @@
+"""
+CPU time and payload size of the previous and the current JSON paths.
+
+"before" is what FastAPI did with Prisma objects: jsonable_encoder over the
+full models, then the standard-library json module. "after" is lean
+projection onto the response schema plus orjson. No database is needed;
+objects are synthetic stand-ins with the same fields as the Prisma models:
+
+    python -m app.api.python.benchmarks.serialization --items 100 1000 10000
+"""
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import argparse
+import gzip
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from ..compression import brotli
+from ..models import AssetListItem, DepartmentRef, FinancialPlanItem, MaintenanceSummaryRef
+from ..serialization import dumps, lean
+
+
+class Department(DepartmentRef):
+    budget: float
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class MaintenanceSummary(MaintenanceSummaryRef):
+    assetId: str
+    updatedAt: datetime
+
+
+class Asset(AssetListItem):
+    manufacturer: Optional[str]
+    serialNumber: Optional[str]
+    warrantyExpiry: Optional[datetime]
+    notes: Optional[str]
+    attachments: Optional[List[str]]
+    userId: str
+    updatedAt: datetime
+    department: Optional[Department]
+    maintenanceSummary: Optional[MaintenanceSummary]
+
+
+class FinancialPlan(FinancialPlanItem):
+    createdAt: datetime
+    updatedAt: datetime
+    asset: Optional[Asset]
+
+
+def make_assets(count: int) -> List[Asset]:
+    now = datetime(2024, 6, 1, 12, 30)
+    department = Department(
+        id="dept-1", name="Public Works", code="PW", budget=5_000_000, createdAt=now, updatedAt=now
+    )
+    return [
+        Asset(
+            id=f"asset-{n:08d}",
+            name=f"Asset {n}",
+            type=["BUILDING", "VEHICLE", "EQUIPMENT"][n % 3],
+            status="ACTIVE",
+            location=f"Site {n % 500}",
+            coordinates={"lat": 49.2 + n * 1e-5, "lng": -123.1 - n * 1e-5},
+            value=1000.0 + n * 7.5,
+            purchaseDate=now - timedelta(days=n % 9000),
+            condition=["EXCELLENT", "GOOD", "FAIR", "POOR", "CRITICAL"][n % 5],
+            expectedLifespan=5 + n % 50,
+            manufacturer="Acme",
+            serialNumber=f"SN-{n}",
+            warrantyExpiry=now + timedelta(days=365),
+            lastInspection=now - timedelta(days=n % 365),
+            nextInspection=now + timedelta(days=n % 365),
+            riskLevel="LOW",
+            priority="MEDIUM",
+            notes="Inspection notes. " * 40,
+            attachments=[f"https://files.example.com/{n}/{k}.jpg" for k in range(5)],
+            userId="user-1",
+            departmentId="dept-1",
+            createdAt=now,
+            updatedAt=now,
+            department=department,
+            maintenanceSummary=MaintenanceSummary(
+                assetId=f"asset-{n:08d}", logCount=12, totalCost=12_500.0, cost12Months=2_300.0,
+                lastMaintenanceDate=now, lastMaintenanceType="PREVENTIVE", lastMaintenanceCost=450.0, updatedAt=now
+            )
+        )
+        for n in range(count)
+    ]
+
+
+def make_plans(assets: List[Asset]) -> List[FinancialPlan]:
+    now = datetime(2024, 6, 1)
+    return [
+        FinancialPlan(
+            id=f"plan-{asset.id}", year=2025, budget=50_000, allocated=25_000, spent=10_000, fundingSource="capital",
+            description="Replacement reserve. " * 10, startDate=now, endDate=now + timedelta(days=365),
+            status="APPROVED", assetId=asset.id, createdAt=now, updatedAt=now, asset=asset
+        )
+        for asset in assets
+    ]
+
+
+def measure(fn: Callable[[], bytes], runs: int) -> Dict:
+    """Median CPU time (ms) of `fn` over `runs` and the size of what it returns."""
+    timings = []
+    for _ in range(runs):
+        started = time.process_time()
+        body = fn()
+        timings.append((time.process_time() - started) * 1000)
+    timings.sort()
+    sizes = {"bytes": len(body), "gzip_bytes": len(gzip.compress(body, 6))}
+    if brotli is not None:
+        sizes["br_bytes"] = len(brotli.compress(body, quality=4))
+    return {"cpu_ms": round(timings[len(timings) // 2], 3), **sizes}
+
+
+def run(counts: List[int], runs: int) -> Dict:
+    results = {}
+    for count in counts:
+        assets = make_assets(count)
+        plans = make_plans(assets)
+        results[count] = {
+            "assets": {
+                "before": measure(lambda: json.dumps(jsonable_encoder({"items": assets})).encode(), runs),
+                "after": measure(lambda: dumps({"items": lean(AssetListItem, assets)}), runs)
+            },
+            "financial_plans": {
+                "before": measure(lambda: json.dumps(jsonable_encoder(plans)).encode(), runs),
+                "after": measure(lambda: dumps(lean(FinancialPlanItem, plans)), runs)
+            }
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args.items, args.runs)
+    for count, routes in results.items():
+        for route, result in routes.items():
+            before, after = result["before"], result["after"]
+            print(
+                f'{route:16} {count:>7} items  cpu {before["cpu_ms"]:>9.2f} -> {after["cpu_ms"]:>8.2f} ms   '
+                f'size {before["bytes"]:>10} -> {after["bytes"]:>9} B   gzip {after["gzip_bytes"]:>9} B'
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Radius, bounding-box and nearest-neighbour queries: geohash index vs scans.
+
+Seeds assets (see benchmarks/query_shapes.py), scatters their coordinates
+over a metro-sized area and backfills the spatial columns, then times each
+query three ways: through the geohash index, as a sequential SQL scan, and
+as the client-side filter it replaces (download every asset's coordinates,
+filter in Python):
+
+    DATABASE_URL=postgresql://.../bench python -m app.api.python.benchmarks.spatial \
+        --assets 300000 --queries 50 --output spatial.json
+"""
+from typing import Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import random
+import time
+from ..database import db
+from ..geohash import haversine_m, parse_coordinates
+from ..spatial import DISTANCE_SQL, backfill_geohashes, find_near, find_nearest, find_within
+from .query_shapes import _percentile, seed
+
+# Vancouver-sized area: 0.5 degrees of latitude by 0.8 of longitude
+AREA = (49.0, -123.3, 49.5, -122.5)
+
+SCATTER_SQL = f'''
+UPDATE "Asset"
+SET "coordinates" = jsonb_build_object(
+    'lat', {AREA[0]} + (hashtext("id") & 65535) / 65535.0 * {AREA[2] - AREA[0]},
+    'lng', {AREA[1]} + ((hashtext("id") >> 16) & 65535) / 65535.0 * {AREA[3] - AREA[1]}
+)
+WHERE "id" LIKE 'bench-asset-%' AND "coordinates" IS NULL
+'''
+
+
+def _random_point(rng: random.Random):
+    return rng.uniform(AREA[0], AREA[2]), rng.uniform(AREA[1], AREA[3])
+
+
+async def _download_all() -> List:
+    rows = await db.query_raw('SELECT "id", "coordinates" FROM "Asset" WHERE "coordinates" IS NOT NULL')
+    points = []
+    for row in rows:
+        coordinates = row["coordinates"]
+        point = parse_coordinates(json.loads(coordinates) if isinstance(coordinates, str) else coordinates)
+        if point:
+            points.append((row["id"], *point))
+    return points
+
+
+async def client_near(lat: float, lng: float, radius_m: float) -> List:
+    return [row for row in await _download_all() if haversine_m(lat, lng, row[1], row[2]) <= radius_m]
+
+
+async def client_within(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List:
+    return [row for row in await _download_all() if min_lat <= row[1] <= max_lat and min_lng <= row[2] <= max_lng]
+
+
+async def client_nearest(lat: float, lng: float, k: int) -> List:
+    return sorted(await _download_all(), key=lambda row: haversine_m(lat, lng, row[1], row[2]))[:k]
+
+
+async def scan_near(lat: float, lng: float, radius_m: float) -> List:
+    return await db.query_raw(
+        f'SELECT "id", {DISTANCE_SQL} AS "distance_m" FROM "Asset" WHERE "latitude" IS NOT NULL '
+        f'AND {DISTANCE_SQL} <= $3::float8 ORDER BY "distance_m"',
+        lat, lng, radius_m
+    )
+
+
+async def scan_within(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List:
+    return await db.query_raw(
+        'SELECT "id" FROM "Asset" WHERE "latitude" BETWEEN $1::float8 AND $2::float8 '
+        'AND "longitude" BETWEEN $3::float8 AND $4::float8',
+        min_lat, max_lat, min_lng, max_lng
+    )
+
+
+async def scan_nearest(lat: float, lng: float, k: int) -> List:
+    return await db.query_raw(
+        f'SELECT "id", {DISTANCE_SQL} AS "distance_m" FROM "Asset" WHERE "latitude" IS NOT NULL '
+        f'ORDER BY "distance_m" LIMIT {int(k)}',
+        lat, lng
+    )
+
+
+async def _time(calls: List[Callable[[], Awaitable[List]]]) -> Dict:
+    timings, sizes = [], []
+    for call in calls:
+        started = time.perf_counter()
+        rows = await call()
+        timings.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(rows))
+    return {
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p99_ms": round(_percentile(timings, 99), 3),
+        "mean_rows": round(sum(sizes) / len(sizes), 1)
+    }
+
+
+async def run(assets: int, queries: int, client_queries: int, radius_m: float, box_m: float, k: int) -> Dict:
+    await db.connect(warm=1)
+    try:
+        await seed(assets)
+        await db.execute_raw(SCATTER_SQL)
+        await backfill_geohashes()
+        await db.execute_raw('ANALYZE "Asset"')
+
+        rng = random.Random(42)
+        points = [_random_point(rng) for _ in range(queries)]
+        half = box_m / 2 / 111_320
+        boxes = [(lat - half, lng - half * 1.5, lat + half, lng + half * 1.5) for lat, lng in points]
+
+        results = {}
+        for name, indexed, scanned, client in (
+            ("radius", lambda p, b: find_near(*p, radius_m, 10_000), lambda p, b: scan_near(*p, radius_m),
+             lambda p, b: client_near(*p, radius_m)),
+            ("bbox", lambda p, b: find_within(b, 10_000), lambda p, b: scan_within(*b),
+             lambda p, b: client_within(*b)),
+            ("knn", lambda p, b: find_nearest(*p, k), lambda p, b: scan_nearest(*p, k),
+             lambda p, b: client_nearest(*p, k))
+        ):
+            pairs = list(zip(points, boxes))
+            results[name] = {
+                "geohash_index": await _time([lambda p=p, b=b: indexed(p, b) for p, b in pairs]),
+                "sql_scan": await _time([lambda p=p, b=b: scanned(p, b) for p, b in pairs]),
+                # Downloads the whole inventory per query, so fewer runs
+                "client_filter": await _time([lambda p=p, b=b: client(p, b) for p, b in pairs[:client_queries]])
+            }
+    finally:
+        await db.disconnect()
+    return {"assets": assets, "queries": queries, "radius_m": radius_m, "box_m": box_m, "k": k, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--assets", type=int, default=300_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--client-queries", type=int, default=3)
+    parser.add_argument("--radius", type=float, default=500.0, help="Radius query size in metres")
+    parser.add_argument("--box", type=float, default=2000.0, help="Bounding box height in metres")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.assets, args.queries, args.client_queries, args.radius, args.box, args.k))
+    for name, modes in report["results"].items():
+        for mode, result in modes.items():
+            print(f'{name:7} {mode:14} p50 {result["p50_ms"]:>10.3f} ms   p99 {result["p99_ms"]:>10.3f} ms   '
+                  f'rows {result["mean_rows"]}')
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
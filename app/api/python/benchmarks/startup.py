@@ -0,0 +1,172 @@
+"""
+Import time and memory per API worker: eager vs lazy imports, spawned vs preforked workers.
+
+Imports: fresh interpreters import the app, either with ReportLab imported
+first ("eager", what every worker paid before it was deferred) or as the
+app now loads it ("lazy"), and report wall time and RSS.
+
+Workers: starts the app with N workers under uvicorn (each worker imports
+the app itself) and under gunicorn with preload_app (imported once, then
+forked; see gunicorn_conf.py, which needs the Redis response cache
+backend for more than one worker and is told it has one), waits for /api/health, and reads every
+worker's RSS and PSS from /proc. PSS splits shared pages between the
+processes sharing them, so it shows what copy-on-write saves. Linux only;
+the app's startup hook connects to the database:
+
+    DATABASE_URL=postgresql://.../bench python -m app.api.python.benchmarks.startup \
+        --workers 4 --output startup.json
+
+Run from the repository root.
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+EAGER_IMPORTS = ["reportlab.platypus", "reportlab.lib.styles", "reportlab.lib.colors", "reportlab.lib.pagesizes"]
+
+IMPORT_PROBE = '''
+import importlib, json, sys, time
+started = time.perf_counter()
+for name in sys.argv[2:]:
+    importlib.import_module(name)
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+rss = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmRSS:"))
+print(json.dumps({"import_ms": elapsed * 1000, "rss_kb": rss}))
+'''
+
+
+def measure_imports(module: str, runs: int) -> Dict:
+    results = {}
+    for mode, preload in (("eager", EAGER_IMPORTS), ("lazy", [])):
+        samples = [
+            json.loads(subprocess.run(
+                [sys.executable, "-c", IMPORT_PROBE, module, *preload], check=True, capture_output=True, text=True
+            ).stdout)
+            for _ in range(runs)
+        ]
+        results[mode] = {
+            "import_ms": round(statistics.median(sample["import_ms"] for sample in samples), 1),
+            "rss_mb": round(statistics.median(sample["rss_kb"] for sample in samples) / 1024, 1)
+        }
+    return results
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can hold spaces; fields after it are fixed
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                memory[name.lower()] = int(rest.split()[0])
+    return memory
+
+
+def measure_server(command: List[str], url: str, workers: int, timeout: float) -> Dict:
+    started = time.perf_counter()
+    # Only /api/health is requested, which never reaches Redis, so no server is needed
+    server = subprocess.Popen(command, env={**os.environ, "RESPONSE_CACHE_BACKEND": "redis"})
+    try:
+        ready_s = None
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"{url}/api/health", timeout=1).status_code == 200:
+                    ready_s = time.perf_counter() - started
+                    break
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"{command[0]} exited with {server.returncode}")
+            time.sleep(0.05)
+        if ready_s is None:
+            raise RuntimeError(f"{command[0]} did not become healthy within {timeout}s")
+        # Let the remaining workers finish starting
+        deadline = time.perf_counter() + timeout
+        while len(_children(server.pid)) < workers and time.perf_counter() < deadline:
+            time.sleep(0.1)
+        time.sleep(1.0)
+
+        # uvicorn also forks a multiprocessing resource tracker; workers are the heavy children
+        worker_memory = sorted(
+            (_memory_kb(pid) for pid in _children(server.pid)), key=lambda memory: memory["rss"], reverse=True
+        )[:workers]
+        master = _memory_kb(server.pid)
+        total_pss = master["pss"] + sum(memory["pss"] for memory in worker_memory)
+        return {
+            "ready_s": round(ready_s, 3),
+            "worker_rss_mb": round(statistics.mean(memory["rss"] for memory in worker_memory) / 1024, 1),
+            "worker_pss_mb": round(statistics.mean(memory["pss"] for memory in worker_memory) / 1024, 1),
+            "master_pss_mb": round(master["pss"] / 1024, 1),
+            "total_pss_mb": round(total_pss / 1024, 1)
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--app", default="app.api.python.main:app")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per import measurement")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    module = args.app.split(":")[0]
+    url = f"http://127.0.0.1:{args.port}"
+    config = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn_conf.py")
+    servers = {
+        "uvicorn": [
+            sys.executable, "-m", "uvicorn", args.app, "--port", str(args.port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+        ],
+        "gunicorn_preload": [
+            sys.executable, "-m", "gunicorn", "-c", config, "--bind", f"127.0.0.1:{args.port}",
+            "--workers", str(args.workers), "--log-level", "warning", args.app
+        ]
+    }
+    report = {
+        "workers": args.workers,
+        "python": sys.version.split()[0],
+        "imports": measure_imports(module, args.runs),
+        "servers": {name: measure_server(command, url, args.workers, args.timeout) for name, command in servers.items()}
+    }
+
+    for mode, result in report["imports"].items():
+        print(f'import {mode:16} {result["import_ms"]:>8.1f} ms   rss {result["rss_mb"]:>7.1f} MB')
+    for name, result in report["servers"].items():
+        print(
+            f'serve  {name:16} ready {result["ready_s"]:>6.2f} s   worker rss {result["worker_rss_mb"]:>7.1f} MB   '
+            f'worker pss {result["worker_pss_mb"]:>7.1f} MB   total pss {result["total_pss_mb"]:>7.1f} MB'
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
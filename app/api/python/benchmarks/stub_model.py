@@ -0,0 +1,93 @@
+"""
+Stand-in for the model messages endpoint.
+
+Answers non-streaming requests with a canned report and streaming requests
+with server-sent `content_block_delta` events, after a configurable delay,
+so report routes can be load tested without calling the real API.
+"""
+from typing import Optional
+import asyncio
+import json
+import threading
+import time
+import uvicorn
+
+STUB_REPORT = {
+    "title": "Benchmark Report",
+    "sections": [
+        {"heading": heading, "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12}
+        for heading in ("Executive Summary", "Current State", "Risk Assessment", "Recommendations", "Implementation")
+    ]
+}
+
+
+class StubModel:
+    """ASGI app answering POST requests the way the messages endpoint does."""
+
+    def __init__(self, latency: float = 0.5, stream_chunks: int = 20):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        self.requests += 1
+        payload = json.loads(body or b"{}")
+        text = json.dumps(STUB_REPORT)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(self.latency)
+            response = json.dumps({
+                "id": f"msg_stub_{self.requests}",
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn"
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")]
+            })
+            await send({"type": "http.response.body", "body": response})
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        size = max(1, len(text) // self.stream_chunks)
+        for start in range(0, len(text), size):
+            await asyncio.sleep(self.latency / self.stream_chunks)
+            event = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[start:start + size]}}
+            chunk = f"event: content_block_delta\ndata: {json.dumps(event)}\n\n".encode()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"event: message_stop\ndata: {\"type\": \"message_stop\"}\n\n"})
+
+
+class StubServer:
+    """Runs a StubModel under uvicorn on a background thread."""
+
+    def __init__(self, stub: StubModel, host: str = "127.0.0.1", port: int = 8765):
+        self.stub = stub
+        self.url = f"http://{host}:{port}/v1/messages"
+        self.server = uvicorn.Server(uvicorn.Config(stub, host=host, port=port, log_level="warning", access_log=False))
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, timeout: float = 10.0):
+        self._thread = threading.Thread(target=self.server.run, name="stub-model", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub model server did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
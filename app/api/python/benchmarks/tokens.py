@@ -0,0 +1,24 @@
+"""
+Locally minted RS256 tokens that auth.verify_token accepts.
+
+The API under test is started with CLERK_PEM_PUBLIC_KEY set to the public
+half of a throwaway keypair, so no Clerk tenant is needed.
+"""
+from typing import Tuple
+import time
+import rsa
+from jose import jwt
+
+AUDIENCE = "bolt-2.0"
+
+
+def generate_keypair(bits: int = 2048) -> Tuple[str, str]:
+    """Return (private_pem, public_pem) for a fresh RSA keypair."""
+    public_key, private_key = rsa.newkeys(bits)
+    return private_key.save_pkcs1().decode(), public_key.save_pkcs1().decode()
+
+
+def mint_token(private_pem: str, subject: str, ttl: float = 3600) -> str:
+    now = int(time.time())
+    claims = {"sub": subject, "aud": AUDIENCE, "iat": now, "exp": now + int(ttl)}
+    return jwt.encode(claims, private_pem, algorithm="RS256")
@@ -0,0 +1,64 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .capital_planning import COMMITTED_PLAN_STATUSES, Candidates, replacement_candidates
+from .database import db
+from .projections import CONDITIONS, AssetColumns
+
+# Assets falling due before $1 that no committed plan from year $3 on already funds
+DUE_ASSETS_SQL = '''
+SELECT a."id", a."name", a."departmentId", a."value", a."expectedLifespan",
+       EXTRACT(YEAR FROM a."purchaseDate")::int AS "purchaseYear", a."condition"::text AS "condition"
+FROM "Asset" AS a
+WHERE EXTRACT(YEAR FROM a."purchaseDate")::int + a."expectedLifespan" < $1
+  AND NOT EXISTS (
+    SELECT 1 FROM "FinancialPlan" AS p
+    WHERE p."assetId" = a."id" AND p."status"::text = ANY($2::text[]) AND p."year" >= $3
+  )
+'''
+
+COMMITTED_SQL = '''
+SELECT a."departmentId", p."year", SUM(p."allocated") AS "allocated"
+FROM "FinancialPlan" AS p
+JOIN "Asset" AS a ON a."id" = p."assetId"
+WHERE p."status"::text = ANY($1::text[]) AND p."year" >= $2 AND p."year" < $3
+'''
+
+
+async def load_candidates(start_year: int, years: int, department_id: Optional[str] = None) -> Candidates:
+    """Replacement candidates for the plan, read straight from the Asset table."""
+    params = [start_year + years, list(COMMITTED_PLAN_STATUSES), start_year]
+    sql = DUE_ASSETS_SQL
+    if department_id:
+        params.append(department_id)
+        sql += f' AND a."departmentId" = ${len(params)}'
+    rows = await db.query_raw(sql + ' ORDER BY a."id"', *params)
+    condition_index = {name: i for i, name in enumerate(CONDITIONS)}
+    columns = AssetColumns(
+        ids=[row["id"] for row in rows],
+        names=[row["name"] for row in rows],
+        value=np.array([row["value"] for row in rows], dtype=np.float64),
+        purchase_year=np.array([row["purchaseYear"] for row in rows], dtype=np.int64),
+        lifespan=np.array([row["expectedLifespan"] for row in rows], dtype=np.int64),
+        condition=np.array([condition_index[row["condition"]] for row in rows], dtype=np.int64)
+    )
+    return replacement_candidates(columns, [row["departmentId"] for row in rows], start_year, years)
+
+
+async def load_budgets(
+    start_year: int,
+    years: int,
+    department_id: Optional[str] = None
+) -> Tuple[Dict[str, float], Dict[str, np.ndarray]]:
+    """Annual budget per department, and what committed plans already allocate each year."""
+    departments = await db.department.find_many(where={"id": department_id} if department_id else None)
+    params = [list(COMMITTED_PLAN_STATUSES), start_year, start_year + years]
+    sql = COMMITTED_SQL
+    if department_id:
+        params.append(department_id)
+        sql += f' AND a."departmentId" = ${len(params)}'
+    rows = await db.query_raw(sql + ' GROUP BY a."departmentId", p."year"', *params)
+
+    committed: Dict[str, np.ndarray] = {}
+    for row in rows:
+        committed.setdefault(row["departmentId"], np.zeros(years))[row["year"] - start_year] = float(row["allocated"])
+    return {department.id: department.budget for department in departments}, committed
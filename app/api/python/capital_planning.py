@@ -0,0 +1,299 @@
+"""
+Budget-constrained replacement scheduling.
+
+Candidates are the assets project_budget lists under
+assets_requiring_attention, each at the first year it appears there.
+Replacing an asset in plan year t (on or after it falls due) removes its
+expected loss per year (failure probability from risk.py times value)
+for every remaining year of the plan. Each department spends at most its
+cap in each year.
+
+The solver is greedy on risk removed per dollar, year by year, and
+vectorized per department: in each year it takes the longest prefix of
+the priority order that fits, drops whatever no longer fits the
+remaining cap, and repeats. Departments are independent, so a warm start
+re-solves only the ones whose cap, locks or exclusions changed.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .projections import DEFAULT_INFLATION_RATE, AssetColumns
+from .risk import failure_probability
+
+# FinancialPlan statuses whose allocation is already committed against a budget
+COMMITTED_PLAN_STATUSES = ("APPROVED", "COMPLETED")
+
+
+class Candidates:
+    """Replacement candidates in columns, with each department's in priority order."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        names: Sequence[str],
+        department_ids: Sequence[str],
+        due: np.ndarray,
+        value: np.ndarray,
+        weight: np.ndarray
+    ):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.department_ids = list(department_ids)
+        # Plan year offset each asset falls due in
+        self.due = np.asarray(due, dtype=np.int64)
+        # Replacement cost at start-year prices
+        self.value = np.asarray(value, dtype=np.float64)
+        # Expected loss per year while unreplaced
+        self.weight = np.asarray(weight, dtype=np.float64)
+        self.index = {asset_id: i for i, asset_id in enumerate(self.ids)}
+
+        self.departments = sorted(set(self.department_ids))
+        position = {department: k for k, department in enumerate(self.departments)}
+        codes = np.array([position[department] for department in self.department_ids], dtype=np.int64)
+        positive = self.value > 0
+        ratio = np.where(positive, self.weight / np.where(positive, self.value, 1.0), np.inf)
+        # By department, then most risk removed per dollar; ties keep input order
+        order = np.lexsort((np.arange(len(self.ids)), -ratio, codes))
+        bounds = np.searchsorted(codes[order], np.arange(len(self.departments) + 1))
+        self.members = {
+            department: order[bounds[k]:bounds[k + 1]] for k, department in enumerate(self.departments)
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def replacement_candidates(
+    columns: AssetColumns,
+    department_ids: Sequence[str],
+    start_year: int,
+    years: int
+) -> Candidates:
+    """Assets falling due within `years`, each at the first year project_budget flags it."""
+    due = np.maximum(columns.purchase_year + columns.lifespan - start_year, 0)
+    keep = np.flatnonzero(due < years)
+    age = start_year + due[keep] - columns.purchase_year[keep]
+    probability = failure_probability(age, columns.lifespan[keep], columns.condition[keep])
+    return Candidates(
+        ids=[columns.ids[i] for i in keep.tolist()],
+        names=[columns.names[i] for i in keep.tolist()],
+        department_ids=[department_ids[i] for i in keep.tolist()],
+        due=due[keep],
+        value=columns.value[keep],
+        weight=probability * columns.value[keep]
+    )
+
+
+def budget_caps(
+    budgets: Dict[str, float],
+    committed: Dict[str, np.ndarray],
+    years: int,
+    overrides: Optional[Dict[str, float]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Yearly replacement cap per department.
+
+    Each is the department's annual budget (or its override) less what
+    committed FinancialPlans already allocate that year, never below zero.
+    """
+    budgets = {**budgets, **(overrides or {})}
+    return {
+        department: np.maximum(budget - committed.get(department, np.zeros(years))[:years], 0.0)
+        for department, budget in budgets.items()
+    }
+
+
+def solve_department(
+    value: np.ndarray,
+    due: np.ndarray,
+    order: np.ndarray,
+    cap: np.ndarray,
+    growth: np.ndarray,
+    locked: Optional[Dict[int, int]] = None,
+    excluded: Iterable[int] = ()
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Year offset for each candidate in `order` (-1: deferred), and spend per year.
+
+    `locked` maps candidate indices to a fixed year offset; those are
+    charged first, even past the cap. `excluded` candidates stay deferred.
+    """
+    schedule = np.full(len(order), -1, dtype=np.int64)
+    spent = np.zeros(len(cap))
+    position = {int(candidate): k for k, candidate in enumerate(order.tolist())}
+    free = np.ones(len(order), dtype=bool)
+    for candidate, offset in (locked or {}).items():
+        k = position[candidate]
+        schedule[k] = offset
+        spent[offset] += value[candidate] * growth[offset]
+        free[k] = False
+    for candidate in excluded:
+        free[position[candidate]] = False
+
+    pending_all = np.flatnonzero(free)
+    order_due = due[order]
+    order_value = value[order]
+    for t in range(len(cap)):
+        pending = pending_all[(schedule[pending_all] < 0) & (order_due[pending_all] <= t)]
+        while pending.size:
+            costs = order_value[pending] * growth[t]
+            fits = costs <= cap[t] - spent[t]
+            pending, costs = pending[fits], costs[fits]
+            if not pending.size:
+                break
+            total = np.cumsum(costs)
+            # Longest prefix that fits; the next item is dropped on the following pass
+            take = int(np.searchsorted(total, cap[t] - spent[t], side="right"))
+            schedule[pending[:take]] = t
+            spent[t] += total[take - 1]
+            pending = pending[take:]
+    return schedule, spent
+
+
+class CapitalPlan:
+    """A replacement schedule and the inputs it was solved for, kept for warm starts."""
+
+    def __init__(
+        self,
+        candidates: Candidates,
+        start_year: int,
+        years: int,
+        inflation_rate: float = DEFAULT_INFLATION_RATE
+    ):
+        self.candidates = candidates
+        self.start_year = start_year
+        self.years = years
+        self.inflation_rate = inflation_rate
+        self.growth = np.array([(1 + inflation_rate) ** offset for offset in range(years)], dtype=np.float64)
+        self.schedule = np.full(len(candidates), -1, dtype=np.int64)
+        self.caps: Dict[str, np.ndarray] = {}
+        self.spent: Dict[str, np.ndarray] = {}
+        self._inputs: Dict[str, Tuple] = {}
+
+    def copy(self) -> "CapitalPlan":
+        """An independent plan sharing the (read-only) candidates."""
+        plan = CapitalPlan.__new__(CapitalPlan)
+        plan.__dict__.update(self.__dict__)
+        plan.schedule = self.schedule.copy()
+        plan.caps = dict(self.caps)
+        plan.spent = dict(self.spent)
+        plan._inputs = dict(self._inputs)
+        return plan
+
+    def solve(
+        self,
+        caps: Dict[str, Sequence[float]],
+        locked: Optional[Dict[str, int]] = None,
+        excluded: Iterable[str] = ()
+    ) -> int:
+        """
+        Schedule every department against `caps` (yearly budget per department).
+
+        `locked` maps asset ids to a plan year offset; `excluded` asset ids
+        are never scheduled. Departments whose inputs match the last solve
+        keep their schedule. Returns the number of departments solved.
+        """
+        candidates = self.candidates
+        locked_by_department: Dict[str, Dict[int, int]] = {}
+        for asset_id, offset in (locked or {}).items():
+            if asset_id not in candidates.index:
+                raise ValueError(f"Asset {asset_id} is not a replacement candidate")
+            if not 0 <= offset < self.years:
+                raise ValueError(f"Locked year for asset {asset_id} is outside the plan")
+            i = candidates.index[asset_id]
+            locked_by_department.setdefault(candidates.department_ids[i], {})[i] = offset
+        excluded_by_department: Dict[str, List[int]] = {}
+        for asset_id in excluded:
+            i = candidates.index.get(asset_id)
+            if i is not None and i not in locked_by_department.get(candidates.department_ids[i], {}):
+                excluded_by_department.setdefault(candidates.department_ids[i], []).append(i)
+
+        solved = 0
+        for department in candidates.departments:
+            cap = np.zeros(self.years)
+            given = np.asarray(caps.get(department, ()), dtype=np.float64)[:self.years]
+            cap[:len(given)] = given
+            inputs = (
+                cap.tobytes(),
+                tuple(sorted(locked_by_department.get(department, {}).items())),
+                tuple(sorted(excluded_by_department.get(department, [])))
+            )
+            if self._inputs.get(department) == inputs:
+                continue
+            members = candidates.members[department]
+            schedule, spent = solve_department(
+                candidates.value, candidates.due, members, cap, self.growth,
+                locked_by_department.get(department), excluded_by_department.get(department, ())
+            )
+            self.schedule[members] = schedule
+            self.caps[department] = cap
+            self.spent[department] = spent
+            self._inputs[department] = inputs
+            solved += 1
+        return solved
+
+    def summary(self) -> Dict:
+        """Yearly totals, per-department budgets and the scheduled and deferred assets."""
+        candidates = self.candidates
+        scheduled = np.flatnonzero(self.schedule >= 0)
+        offsets = self.schedule[scheduled]
+        removed = candidates.weight[scheduled] * (self.years - offsets)
+        costs = candidates.value[scheduled] * self.growth[offsets]
+        deferred = np.flatnonzero(self.schedule < 0)
+
+        budget = np.zeros(self.years)
+        spent = np.zeros(self.years)
+        for department in candidates.departments:
+            budget += self.caps.get(department, 0.0)
+            spent += self.spent.get(department, 0.0)
+        yearly_removed = np.bincount(offsets, weights=removed, minlength=self.years)
+        yearly_count = np.bincount(offsets, minlength=self.years)
+
+        by_year = np.lexsort((scheduled, offsets))
+        return {
+            "years": [
+                {
+                    "year": self.start_year + offset,
+                    "budget": float(budget[offset]),
+                    "spent": float(spent[offset]),
+                    "replacements": int(yearly_count[offset]),
+                    "risk_reduction": float(yearly_removed[offset])
+                }
+                for offset in range(self.years)
+            ],
+            "departments": [
+                {
+                    "departmentId": department,
+                    "budget": self.caps[department].tolist(),
+                    "spent": self.spent[department].tolist()
+                }
+                for department in candidates.departments if department in self.caps
+            ],
+            "scheduled": [
+                {
+                    "id": candidates.ids[i],
+                    "name": candidates.names[i],
+                    "departmentId": candidates.department_ids[i],
+                    "year": self.start_year + offset,
+                    "due_year": self.start_year + int(candidates.due[i]),
+                    "cost": cost,
+                    "risk_reduction": reduction
+                }
+                for i, offset, cost, reduction in zip(
+                    scheduled[by_year].tolist(), offsets[by_year].tolist(),
+                    costs[by_year].tolist(), removed[by_year].tolist()
+                )
+            ],
+            "deferred": [
+                {
+                    "id": candidates.ids[i],
+                    "name": candidates.names[i],
+                    "departmentId": candidates.department_ids[i],
+                    "due_year": self.start_year + int(candidates.due[i]),
+                    "cost": float(candidates.value[i] * self.growth[candidates.due[i]])
+                }
+                for i in deferred.tolist()
+            ],
+            "risk_reduction": float(removed.sum()),
+            # Everything replaced the year it falls due
+            "max_risk_reduction": float((candidates.weight * (self.years - candidates.due)).sum())
+        }
@@ -0,0 +1,177 @@
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import asyncio
+import inspect
+import os
+import time
+from prisma import Prisma
+from .metrics import span
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "10"))
+DATABASE_DRAIN_TIMEOUT = float(os.getenv("DATABASE_DRAIN_TIMEOUT", "30"))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection frees up within the pool timeout."""
+
+
+def pooled_url(url: str, pool_size: int, pool_timeout: float) -> str:
+    """
+    Add Prisma's connection_limit / pool_timeout parameters to a database URL,
+    keeping any values already set explicitly.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault("connection_limit", str(pool_size))
+    query.setdefault("pool_timeout", str(int(pool_timeout)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class _PooledActions:
+    """Proxy for a Prisma model (db.asset, db.user...) whose queries check out a pooled connection."""
+
+    def __init__(self, database: "Database", actions, name: str):
+        self._database = database
+        self._actions = actions
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = getattr(self._actions, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def pooled(*args, **kwargs):
+            async with self._database.acquire():
+                with span(f"db.{self._name}.{name}"):
+                    return await attr(*args, **kwargs)
+
+        return pooled
+
+
+class Database:
+    """
+    Application-wide Prisma client shared by every router.
+
+    The query engine opens at most `pool_size` Postgres connections; the same
+    bound is enforced here so callers queue in-process (where wait time can be
+    measured) instead of inside the engine.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = DATABASE_URL,
+        pool_size: int = DATABASE_POOL_SIZE,
+        pool_timeout: float = DATABASE_POOL_TIMEOUT
+    ):
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        datasource = {"url": pooled_url(url, pool_size, pool_timeout)} if url else None
+        self.client = Prisma(datasource=datasource) if datasource else Prisma()
+
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._hold_total = 0.0
+        self._hold_max = 0.0
+
+    def __getattr__(self, name):
+        # Only reached for attributes not defined on Database itself
+        if name == "client":
+            raise AttributeError(name)
+        attr = getattr(self.client, name)
+        if inspect.iscoroutinefunction(attr):
+            # Raw queries: db.query_raw(...), db.execute_raw(...)
+            return getattr(_PooledActions(self, self.client, "raw"), name)
+        if callable(attr):
+            return attr
+        return _PooledActions(self, attr, name)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Check out one pooled connection for the duration of the block."""
+        requested = time.perf_counter()
+        self._waiting += 1
+        try:
+            with span("db.pool_wait"):
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.pool_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self.pool_timeout}s waiting for a database connection"
+            )
+        finally:
+            self._waiting -= 1
+
+        acquired = time.perf_counter()
+        wait = acquired - requested
+        self._checkouts += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._in_use += 1
+        self._idle.clear()
+        try:
+            yield self.client
+        finally:
+            hold = time.perf_counter() - acquired
+            self._hold_total += hold
+            self._hold_max = max(self._hold_max, hold)
+            self._in_use -= 1
+            if self._in_use == 0:
+                self._idle.set()
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def tx(self, **kwargs):
+        """Interactive transaction holding a single pooled connection."""
+        async with self.acquire():
+            with span("db.tx"):
+                async with self.client.tx(**kwargs) as transaction:
+                    yield transaction
+
+    async def connect(self, warm: Optional[int] = None):
+        """Connect the engine and open `warm` (default: all) pool connections up front."""
+        if not self.client.is_connected():
+            await self.client.connect()
+        await self.warm(self.pool_size if warm is None else warm)
+
+    async def warm(self, connections: int):
+        # Concurrent round trips force the engine to open that many connections
+        connections = min(connections, self.pool_size)
+        if connections > 0:
+            await asyncio.gather(*(self.query_raw("SELECT 1") for _ in range(connections)))
+
+    async def disconnect(self, timeout: float = DATABASE_DRAIN_TIMEOUT):
+        """Wait for checked-out connections to finish, then close the engine."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Closing database with {self._in_use} connections still in use")
+        if self.client.is_connected():
+            await self.client.disconnect()
+
+    def metrics(self) -> Dict:
+        checkouts = self._checkouts
+        return {
+            "pool_size": self.pool_size,
+            "in_use": self._in_use,
+            "idle": self.pool_size - self._in_use,
+            "waiting": self._waiting,
+            "checkouts": checkouts,
+            "timeouts": self._timeouts,
+            "avg_wait_ms": self._wait_total / checkouts * 1000 if checkouts else 0.0,
+            "max_wait_ms": self._wait_max * 1000,
+            "avg_checkout_ms": self._hold_total / checkouts * 1000 if checkouts else 0.0,
+            "max_checkout_ms": self._hold_max * 1000
+        }
+
+
+db = Database()
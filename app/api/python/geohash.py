@@ -0,0 +1,134 @@
+"""
+Integer geohashes and the cell ranges that cover a search area.
+
+A point's geohash interleaves 26 bits of quantized longitude with 26 bits
+of quantized latitude (longitude first, as in text geohashes), so nearby
+points share high-order bits and every geohash cell is one contiguous
+integer range. Asset.geohash is indexed with a plain btree; a box or
+radius query becomes a handful of range scans plus an exact check on
+latitude/longitude.
+"""
+from typing import Dict, List, Optional, Tuple
+import math
+
+BITS = 26
+EARTH_RADIUS_M = 6_371_008.8
+
+Box = Tuple[float, float, float, float]  # (min_lat, min_lng, max_lat, max_lng)
+
+
+def _spread(value: int) -> int:
+    """Move bit i of a 26-bit value to bit 2i."""
+    value &= (1 << BITS) - 1
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def _quantize(value: float, low: float, span: float) -> int:
+    cell = int((value - low) / span * (1 << BITS))
+    return min(max(cell, 0), (1 << BITS) - 1)
+
+
+def _interleave(lng_cell: int, lat_cell: int) -> int:
+    return (_spread(lng_cell) << 1) | _spread(lat_cell)
+
+
+def encode(lat: float, lng: float) -> int:
+    return _interleave(_quantize(lng, -180.0, 360.0), _quantize(lat, -90.0, 180.0))
+
+
+def parse_coordinates(coordinates) -> Optional[Tuple[float, float]]:
+    """
+    (lat, lng) from the free-form Asset.coordinates JSON, or None.
+
+    Accepts {"lat", "lng"/"lon"/"long"}, {"latitude", "longitude"} and
+    GeoJSON points ({"type": "Point", "coordinates": [lng, lat]}).
+    """
+    if not isinstance(coordinates, dict):
+        return None
+    try:
+        if isinstance(coordinates.get("coordinates"), (list, tuple)):
+            lng, lat = coordinates["coordinates"][:2]
+        else:
+            lat = next(coordinates[key] for key in ("lat", "latitude") if key in coordinates)
+            lng = next(coordinates[key] for key in ("lng", "lon", "long", "longitude") if key in coordinates)
+        lat, lng = float(lat), float(lng)
+    except (StopIteration, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+def spatial_fields(coordinates) -> Dict:
+    """The Asset columns derived from `coordinates`, for create/update data."""
+    point = parse_coordinates(coordinates)
+    if point is None:
+        return {"latitude": None, "longitude": None, "geohash": None}
+    lat, lng = point
+    return {"latitude": lat, "longitude": lng, "geohash": encode(lat, lng)}
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def split_box(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[Box]:
+    """Clamp a box to the globe, splitting it in two if it crosses the antimeridian."""
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    if max_lng - min_lng >= 360.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    min_lng = (min_lng + 180.0) % 360.0 - 180.0
+    max_lng = (max_lng + 180.0) % 360.0 - 180.0
+    if min_lng <= max_lng:
+        return [(min_lat, min_lng, max_lat, max_lng)]
+    return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+
+
+def radius_boxes(lat: float, lng: float, radius_m: float) -> List[Box]:
+    """Bounding boxes (one, or two across the antimeridian) of a circle."""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    if lat + dlat >= 90.0 or lat - dlat <= -90.0:
+        # The circle reaches a pole, so it spans every longitude
+        return [(max(lat - dlat, -90.0), -180.0, min(lat + dlat, 90.0), 180.0)]
+    dlng = math.degrees(radius_m / (EARTH_RADIUS_M * math.cos(math.radians(lat))))
+    return split_box(lat - dlat, lng - dlng, lat + dlat, lng + dlng)
+
+
+def cover(boxes: List[Box], max_cells: int = 16) -> List[Tuple[int, int]]:
+    """
+    Half-open geohash ranges covering `boxes`.
+
+    Uses the finest cell size at which the boxes need at most `max_cells`
+    cells (per box), then merges cells that are adjacent in Z-order.
+    """
+    ranges = []
+    for min_lat, min_lng, max_lat, max_lng in boxes:
+        lat_lo, lat_hi = _quantize(min_lat, -90.0, 180.0), _quantize(max_lat, -90.0, 180.0)
+        lng_lo, lng_hi = _quantize(min_lng, -180.0, 360.0), _quantize(max_lng, -180.0, 360.0)
+        for level in range(BITS, -1, -1):
+            shift = BITS - level
+            lats = range(lat_lo >> shift, (lat_hi >> shift) + 1)
+            lngs = range(lng_lo >> shift, (lng_hi >> shift) + 1)
+            if len(lats) * len(lngs) <= max_cells:
+                break
+        for lng_cell in lngs:
+            for lat_cell in lats:
+                prefix = _interleave(lng_cell, lat_cell)
+                ranges.append((prefix << (2 * shift), (prefix + 1) << (2 * shift)))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
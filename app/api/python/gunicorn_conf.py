@@ -0,0 +1,53 @@
+"""
+Preforked serving: import the app once, then fork the workers.
+
+    gunicorn -c app/api/python/gunicorn_conf.py app.api.python.main:app
+
+With preload_app the master imports the app before forking, so workers
+start without importing anything and share the imported modules' memory
+copy-on-write. Nothing connects at import time: the database pool, AI
+client and job workers start in the app's startup hook, which runs in
+each worker after the fork.
+
+Workers share invalidations through the response cache backend: cached
+responses, cached user roles and asset counts are all keyed by its tag
+versions. Only RESPONSE_CACHE_BACKEND=redis shares those between
+processes, so without it a single worker runs and asking for more is
+refused. With it, WEB_CONCURRENCY defaults to one worker per CPU.
+/metrics counters and capital plan warm starts stay per worker.
+"""
+import gc
+import importlib
+import os
+
+SHARED_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory") == "redis"
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or ((os.cpu_count() or 1) if SHARED_BACKEND else 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+
+# Modules the app only imports on first use, loaded in the master anyway so
+# every worker, and the PDF render processes they fork, shares one copy
+PRELOAD_MODULES = [
+    name for name in os.getenv("PRELOAD_MODULES", "reportlab.platypus,reportlab.lib.styles").split(",") if name
+]
+
+
+def on_starting(server):
+    if server.cfg.workers > 1 and not SHARED_BACKEND:
+        raise RuntimeError(
+            f"{server.cfg.workers} workers need RESPONSE_CACHE_BACKEND=redis: with the memory backend, "
+            "cache and role invalidations in one worker never reach the others"
+        )
+
+
+def when_ready(server):
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    # Keep the collector off everything loaded so far; otherwise each
+    # worker's first full collection writes to, and so copies, every page
+    gc.freeze()
+    server.log.info("Preloaded %s", ", ".join(PRELOAD_MODULES) or "the app")
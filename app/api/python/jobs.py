@@ -0,0 +1,317 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Job states mirror the ComplianceReport ReportStatus values they drive
+PENDING = "PENDING"
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+REJECTED = "REJECTED"
+TERMINAL_STATES = {COMPLETED, REJECTED}
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at capacity and cannot accept another job."""
+
+
+class JobStore:
+    """
+    SQLite-backed job table so queued work survives a restart.
+
+    Calls are blocking; JobQueue runs them in a thread, and a lock keeps
+    them to one at a time on the shared connection.
+    """
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                queue TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat_at REAL
+            )
+        """)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "heartbeat_at" not in columns:
+            # Stores created before leases
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue_status ON jobs (queue, status)")
+
+    def _row(self, row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def insert(self, queue: str, payload: Dict) -> Dict:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, queue, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, queue, json.dumps(payload, default=str), PENDING, time.time())
+            )
+        return self.get(job_id)
+
+    def update(self, job_id: str, **fields) -> Dict:
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def claim(self, job_id: str, started_at: float) -> bool:
+        """Move a PENDING job to IN_PROGRESS; False if another worker or process got it first."""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (IN_PROGRESS, started_at, started_at, job_id, PENDING)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, now: float):
+        """Renew the lease on a running job."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (now, job_id, IN_PROGRESS)
+            )
+
+    def requeue_stale(self, queue: str, expired_before: float) -> List[str]:
+        """Return IN_PROGRESS jobs whose lease expired before `expired_before` to PENDING; returns their ids."""
+        with self.lock:
+            rows = self.conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, heartbeat_at = NULL "
+                "WHERE queue = ? AND status = ? AND COALESCE(heartbeat_at, started_at, 0) < ? RETURNING id",
+                (PENDING, queue, IN_PROGRESS, expired_before)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def pending(self, queue: str) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE queue = ? AND status = ? ORDER BY created_at",
+                (queue, PENDING)
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers draining a persistent job queue.
+
+    `handler` receives the job dict and returns a JSON-serializable result;
+    any exception marks the job REJECTED with the error message.
+
+    Several processes may share one store: a job runs only in the worker
+    that claims it. A running job holds a lease its worker renews every
+    `stale_after / 3` seconds. Every queue sweeps the store as often and
+    takes back IN_PROGRESS jobs whose lease is older than `stale_after`
+    (their process is assumed dead), so a crash loses no work even if the
+    process comes straight back.
+
+    Store calls run in a thread so SQLite never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Dict], Awaitable[Dict]],
+        store_path: str,
+        workers: int = 4,
+        max_depth: int = 1000,
+        stale_after: float = 120.0,
+        poll_interval: float = 1.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.store_path = store_path
+        self.workers = workers
+        self.max_depth = max_depth
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+
+        self.store: Optional[JobStore] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._busy = 0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self.store = await asyncio.to_thread(JobStore, self.store_path)
+        self._queue = asyncio.Queue()
+        # Resume anything a previous process accepted but did not finish.
+        # Jobs with a live lease may still be running in another process
+        await asyncio.to_thread(self.store.requeue_stale, self.name, time.time() - self.stale_after)
+        for job in await asyncio.to_thread(self.store.pending, self.name):
+            self._queue.put_nowait(job["id"])
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        tasks = [*self._tasks, *([self._sweeper] if self._sweeper else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._sweeper = None
+        if self.store:
+            await asyncio.to_thread(self.store.close)
+            self.store = None
+
+    async def enqueue(self, payload: Dict) -> Dict:
+        if self._queue is None:
+            await self.start()
+        if self._queue.qsize() >= self.max_depth:
+            raise QueueFullError(f"{self.name} queue is full")
+        job = await asyncio.to_thread(self.store.insert, self.name, payload)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = await asyncio.to_thread(self.store.get, job_id) if self.store else None
+        return job if job and job["queue"] == self.name else None
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict]:
+        """
+        Yield the job on every state change until it finishes.
+
+        Changes made in this process arrive immediately; the store is polled
+        too, for jobs another process runs.
+        """
+        listener: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(listener)
+        try:
+            job = await self.get(job_id)
+            last_status = None
+            while job is not None:
+                if job["status"] != last_status:
+                    yield job
+                    last_status = job["status"]
+                if job["status"] in TERMINAL_STATES:
+                    break
+                try:
+                    job = await asyncio.wait_for(listener.get(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    job = await self.get(job_id)
+        finally:
+            self._subscribers[job_id].remove(listener)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def _publish(self, job: Dict):
+        for listener in self._subscribers.get(job["id"], []):
+            listener.put_nowait(job)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            try:
+                requeued = await asyncio.to_thread(
+                    self.store.requeue_stale, self.name, time.time() - self.stale_after
+                )
+            except sqlite3.Error:
+                # Locked by another process's write; try again next round
+                continue
+            for job_id in requeued:
+                self._queue.put_nowait(job_id)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, job_id, time.time())
+            except sqlite3.Error:
+                continue
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            self._busy += 1
+            try:
+                await self._run(job_id)
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        started = time.time()
+        if not await asyncio.to_thread(self.store.claim, job_id, started):
+            # Finished, or running in another worker or process
+            return
+        job = await asyncio.to_thread(self.store.get, job_id)
+        self._started += 1
+        self._wait_total += started - job["created_at"]
+        self._publish(job)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await self.handler(job)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job to be resumed on the next start.
+            # Called directly, since this task can no longer await
+            self.store.update(job_id, status=PENDING, started_at=None, heartbeat_at=None)
+            raise
+        except Exception as e:
+            self._failed += 1
+            job = await asyncio.to_thread(
+                self.store.update, job_id, status=REJECTED, error=str(e), finished_at=time.time()
+            )
+        else:
+            self._completed += 1
+            job = await asyncio.to_thread(
+                self.store.update, job_id, status=COMPLETED, result=result, finished_at=time.time()
+            )
+        finally:
+            heartbeat.cancel()
+
+        elapsed = job["finished_at"] - started
+        self._run_total += elapsed
+        self._run_max = max(self._run_max, elapsed)
+        self._publish(job)
+
+    def metrics(self) -> Dict:
+        finished = self._completed + self._failed
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "workers": self.workers,
+            "busy_workers": self._busy,
+            "utilization": self._busy / self.workers if self.workers else 0.0,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_seconds": self._wait_total / self._started if self._started else 0.0,
+            "avg_run_seconds": self._run_total / finished if finished else 0.0,
+            "max_run_seconds": self._run_max
+        }
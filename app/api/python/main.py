@@ -1,15 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from prisma import Prisma
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import List, Optional
 from datetime import datetime
 import os
-from .auth import check_roles, get_current_user
-from .models import AssetCreate, FinancialPlanCreate, AssetType, AssetStatus
-from .ai_reports import router as reports_router
+import uuid
+from .ai_client import ai_client
+from .asset_queries import asset_count_cache, count_assets
+from .auth import check_roles, get_current_user, invalidate_user, auth_cache_stats
+from .database import db, PoolTimeoutError
+from .models import (
+    AssetCreate, FinancialPlanCreate, AssetType, AssetStatus, AssetSortField, SortOrder,
+    ProjectionScenariosRequest, ProjectionSource, MaintenanceBasis, ProjectionMethod, CapitalPlanRequest, AssetListItem, AssetPage, FinancialPlanItem
+)
+from .cache import TTLCache
+from .capital_planning import CapitalPlan, budget_caps
+from .capital_plan_store import load_budgets, load_candidates
+from .geohash import spatial_fields
+from .compression import CompressionMiddleware
+from . import metrics
+from .response_cache import response_cache
+from .pagination import keyset_order, keyset_where, next_cursor
+from .prompt_builder import prompt_stats
+from .projections import AssetColumns, project_budget, project_from_aggregates, project_scenarios
+from .projection_store import aggregates_built, apply_asset_change, ensure_aggregates, load_aggregates, rebuild_aggregates
+from .ai_reports import router as reports_router, report_jobs
+from .asset_export import router as asset_export_router
+from .asset_ingest import router as asset_ingest_router
+from .maintenance import router as maintenance_router, start_summary_refresh, stop_summary_refresh
+from .pdf import shutdown_renderer
+from .report_batch import router as report_batch_router
+from .risk import RISK_SIMULATION_SEED, RISK_SIMULATION_TRIALS, assess_risk, run_simulation, shutdown_simulator
+from .serialization import FastJSONResponse, lean
+from .spatial import router as spatial_router
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
+# Innermost, so compression time shows up as its own stage
+app.add_middleware(CompressionMiddleware)
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -18,90 +46,213 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency includes CORS handling and every response is counted
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request, exc: PoolTimeoutError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 # Include routers
+# Registered before /api/assets/{asset_id} so "export" is not read as an id
+app.include_router(asset_export_router, prefix="/api")
+app.include_router(asset_ingest_router, prefix="/api")
+app.include_router(maintenance_router, prefix="/api")
+app.include_router(report_batch_router, prefix="/api")
+app.include_router(spatial_router, prefix="/api")
 app.include_router(reports_router, prefix="/api")
 
-# Database client
-prisma = Prisma()
-
 @app.on_event("startup")
 async def startup():
-    await prisma.connect()
+    # Connects the shared client and warms the connection pool
+    await db.connect()
+    await ai_client.start()
+    await report_jobs.start()
+    try:
+        await ensure_aggregates()
+    except Exception as e:
+        # Projections read assets live until a rebuild succeeds
+        print(f"Projection aggregate rebuild failed: {e}")
+    start_summary_refresh()
+    if metrics.profiler is not None:
+        # Samples whichever thread starts it: the event loop's
+        metrics.profiler.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    await prisma.disconnect()
+    if metrics.profiler is not None:
+        metrics.profiler.stop()
+    await report_jobs.stop()
+    await stop_summary_refresh()
+    shutdown_renderer()
+    shutdown_simulator()
+    await ai_client.close()
+    await response_cache.close()
+    # Drains in-flight queries before closing the engine
+    await db.disconnect()
 
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/health/db")
+async def database_health(user: dict = Depends(check_roles(["admin"]))):
+    """
+    Connection pool metrics for the shared database client.
+    """
+    return {
+        "connected": db.is_connected(),
+        "pool": db.metrics()
+    }
+
+# Metrics
+metrics.registry.collector("api_db_pool", db.metrics)
+metrics.registry.collector("api_ai_client", ai_client.stats)
+metrics.registry.collector("api_report_jobs", report_jobs.metrics)
+metrics.registry.collector("api_response_cache", response_cache.stats)
+metrics.registry.collector("api_auth_cache", auth_cache_stats)
+metrics.registry.collector("api_report_prompts", prompt_stats.stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Prometheus text-format metrics, readable with METRICS_TOKEN as a bearer token.
+
+    Without METRICS_TOKEN the endpoint is closed unless METRICS_PUBLIC=1
+    (e.g. when only an internal network can reach it).
+    """
+    if not metrics.scrape_allowed(request.headers.get("authorization")):
+        if not metrics.METRICS_TOKEN and not metrics.METRICS_PUBLIC:
+            raise HTTPException(status_code=403, detail="Metrics are disabled; set METRICS_TOKEN or METRICS_PUBLIC=1")
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/profiles")
+async def get_slow_request_profiles(user: dict = Depends(check_roles(["admin"]))):
+    """
+    Collapsed-stack profiles of requests slower than SLOW_REQUEST_PROFILE_MS.
+    """
+    if metrics.profiler is None:
+        return {"enabled": False, "profiles": []}
+    return {"enabled": True, "profiles": list(metrics.profiler.captures)}
+
+# Auth cache endpoints
+@app.get("/api/auth/cache")
+async def get_auth_cache_stats(user: dict = Depends(check_roles(["admin"]))):
+    """
+    Hit and miss counters for the verified-token and user caches.
+    """
+    return auth_cache_stats()
+
+@app.post("/api/auth/cache/invalidate/{clerk_id}")
+async def invalidate_auth_cache(
+    clerk_id: str,
+    user: dict = Depends(check_roles(["admin"]))
+):
+    """
+    Evict a cached user so a role change takes effect on their next request,
+    in every worker when the response cache backend is shared.
+    """
+    await invalidate_user(clerk_id)
+    return {"invalidated": clerk_id}
+
+@app.get("/api/cache/responses")
+async def get_response_cache_stats(user: dict = Depends(check_roles(["admin"]))):
+    """
+    Per-route hit ratios of the GET response cache.
+    """
+    return response_cache.stats()
+
 # Asset Management Endpoints
-@app.get("/api/assets")
+
+@app.get("/api/assets", response_model=AssetPage)
 async def get_assets(
     skip: int = Query(0, ge=0),
     take: int = Query(10, ge=1, le=100),
     type: Optional[AssetType] = None,
     status: Optional[AssetStatus] = None,
+    cursor: Optional[str] = None,
+    sort: AssetSortField = AssetSortField.createdAt,
+    order: SortOrder = SortOrder.asc,
+    include_total: Optional[bool] = None,
     user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
 ):
     """
     Fetch all assets with optional filtering and pagination.
+
+    Pass `cursor` (from a previous `next_cursor`) for keyset paging, which costs
+    the same on every page. `skip` is still honoured when no cursor is given.
+    The total is omitted in cursor mode unless `include_total` is set.
+    Items carry the AssetListItem fields only; fetch a single asset for
+    notes, attachments and its related records.
     """
     where = {}
     if type:
         where["type"] = type
     if status:
         where["status"] = status
-    
+
+    if include_total is None:
+        include_total = cursor is None
+
     try:
-        assets = await prisma.asset.find_many(
-            where=where,
-            skip=skip,
-            take=take,
+        assets = await db.asset.find_many(
+            where=keyset_where(where, sort.value, order.value, cursor),
+            skip=None if cursor else skip,
+            take=take + 1,
+            order=keyset_order(sort.value, order.value),
             include={
                 "department": True,
-                "maintenanceLogs": {
-                    "take": 1,
-                    "orderBy": {
-                        "date": "desc"
-                    }
-                }
+                "maintenanceSummary": True
             }
         )
-        total = await prisma.asset.count(where=where)
-        
-        return {
-            "items": assets,
-            "total": total,
-            "page": skip // take + 1,
-            "pages": (total + take - 1) // take
+        response = {
+            "items": lean(AssetListItem, assets[:take]),
+            "next_cursor": next_cursor(assets, take, sort.value)
         }
+
+        if include_total:
+            total = await count_assets(where)
+            response["total"] = total
+            response["pages"] = (total + take - 1) // take
+        if cursor is None:
+            response["page"] = skip // take + 1
+
+        return FastJSONResponse(response)
+    except (HTTPException, PoolTimeoutError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/assets/{asset_id}")
 async def get_asset(
     asset_id: str,
+    request: Request,
     user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
 ):
     """
     Fetch a specific asset by ID.
     """
-    asset = await prisma.asset.find_unique(
-        where={"id": asset_id},
-        include={
-            "department": True,
-            "maintenanceLogs": True,
-            "financialPlans": True,
-            "insuranceDetails": True
-        }
+    async def load():
+        asset = await db.asset.find_unique(
+            where={"id": asset_id},
+            include={
+                "department": True,
+                "maintenanceLogs": True,
+                "maintenanceSummary": True,
+                "financialPlans": True,
+                "insuranceDetails": True
+            }
+        )
+        if not asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        return asset
+
+    # Includes the asset's financial plans, so plan writes invalidate it too
+    return await response_cache.respond(
+        request, "asset", {"id": asset_id}, user, ["assets", "financial_plans"], load
     )
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    return asset
 
 @app.post("/api/assets/create")
 async def create_asset(
@@ -112,24 +263,32 @@ async def create_asset(
     Create a new asset.
     """
     try:
-        new_asset = await prisma.asset.create(
-            data={
-                **asset.dict(),
-                "userId": user["user_id"],
-                "riskLevel": "LOW",
-                "priority": "MEDIUM"
-            },
-            include={
-                "department": True
-            }
-        )
+        async with db.tx() as tx:
+            new_asset = await tx.asset.create(
+                data={
+                    **asset.dict(),
+                    **spatial_fields(asset.coordinates),
+                    "userId": user["user_id"],
+                    "riskLevel": assess_risk([asset], datetime.now().year)[0],
+                    "priority": "MEDIUM"
+                },
+                include={
+                    "department": True
+                }
+            )
+            await apply_asset_change(tx, after=new_asset)
+        asset_count_cache.clear()
+        await response_cache.invalidate("assets")
         return new_asset
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # Financial Planning Endpoints
-@app.get("/api/financial-plans")
+@app.get("/api/financial-plans", response_model=List[FinancialPlanItem])
 async def get_financial_plans(
+    request: Request,
     year: Optional[int] = None,
     status: Optional[str] = None,
     user: dict = Depends(check_roles(["admin", "finance_director"]))
@@ -143,14 +302,22 @@ async def get_financial_plans(
     if status:
         where["status"] = status
 
-    try:
-        plans = await prisma.financialPlan.find_many(
+    async def load():
+        plans = await db.financialPlan.find_many(
             where=where,
             include={
                 "asset": True
             }
         )
-        return plans
+        return lean(FinancialPlanItem, plans)
+
+    try:
+        # Plans embed their asset, so asset writes invalidate them too
+        return await response_cache.respond(
+            request, "financial_plans", where, user, ["financial_plans", "assets"], load
+        )
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -163,7 +330,7 @@ async def create_financial_plan(
     Create a new financial plan.
     """
     try:
-        new_plan = await prisma.financialPlan.create(
+        new_plan = await db.financialPlan.create(
             data={
                 **plan.dict(),
                 "status": "DRAFT"
@@ -172,76 +339,202 @@ async def create_financial_plan(
                 "asset": True
             }
         )
+        await response_cache.invalidate("financial_plans")
         return new_plan
+    except PoolTimeoutError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/financial-plans/projections")
 async def get_budget_projections(
     years: int = Query(5, ge=1, le=20),
+    source: ProjectionSource = ProjectionSource.materialized,
+    maintenance_basis: MaintenanceBasis = MaintenanceBasis.condition,
+    method: ProjectionMethod = ProjectionMethod.deterministic,
+    trials: int = Query(RISK_SIMULATION_TRIALS, ge=100, le=100_000),
+    seed: int = Query(RISK_SIMULATION_SEED, ge=0),
+    departmentId: Optional[str] = None,
+    type: Optional[AssetType] = None,
     user: dict = Depends(check_roles(["admin", "finance_director"]))
 ):
     """
     Generate infrastructure budget projections.
+
+    By default this reads the ProjectionAggregate buckets, so cost does not
+    grow with inventory size. They are rebuilt at startup; until that has
+    succeeded the request is answered live, and `source` in the response
+    says which was used. `source=live` scans every asset and also lists
+    each asset requiring replacement. `maintenance_basis=history`
+    projects maintenance from each asset's last 12 months of logged spend
+    where there is any; it always reads assets live.
+
+    `method=monte_carlo` samples failure years instead of replacing each
+    asset exactly at the end of its lifespan, and returns mean/P10/P50/P90
+    bands per year plus the assets most likely to fail. The same `seed`
+    always gives the same result. It reads assets live and uses the
+    condition maintenance basis.
     """
+    if (
+        maintenance_basis == MaintenanceBasis.history
+        or method == ProjectionMethod.monte_carlo
+        or not aggregates_built()
+    ):
+        source = ProjectionSource.live
+    if method == ProjectionMethod.monte_carlo:
+        maintenance_basis = MaintenanceBasis.condition
+
     try:
-        # Get all assets and their financial plans
-        assets = await prisma.asset.find_many(
-            include={
-                "financialPlans": True
+        current_year = datetime.now().year
+        if source == ProjectionSource.materialized:
+            groups = await load_aggregates(departmentId, type.value if type else None)
+            return {
+                "projections": project_from_aggregates(groups, current_year, years),
+                "total_assets": sum(group["assetCount"] for group in groups),
+                "projection_years": years,
+                "source": source.value,
+                "maintenance_basis": maintenance_basis.value
             }
+
+        where = {}
+        if departmentId:
+            where["departmentId"] = departmentId
+        if type:
+            where["type"] = type
+        assets = await db.asset.find_many(
+            where=where,
+            include={"maintenanceSummary": maintenance_basis == MaintenanceBasis.history}
         )
-        
-        current_year = datetime.now().year
-        projections = []
-        
-        for year in range(current_year, current_year + years):
-            yearly_projection = {
-                "year": year,
-                "total_budget_needed": 0,
-                "maintenance_cost": 0,
-                "replacement_cost": 0,
-                "assets_requiring_attention": []
+        if method == ProjectionMethod.monte_carlo:
+            simulation = await run_simulation(AssetColumns.from_assets(assets), current_year, years, trials, seed)
+            return {
+                **simulation,
+                "total_assets": len(assets),
+                "projection_years": years,
+                "source": source.value,
+                "maintenance_basis": maintenance_basis.value,
+                "method": method.value,
+                "trials": trials,
+                "seed": seed
             }
-            
-            for asset in assets:
-                # Calculate asset age and remaining life
-                asset_age = year - asset.purchaseDate.year
-                remaining_life = asset.expectedLifespan - asset_age
-                
-                # Estimate maintenance costs based on asset condition and age
-                maintenance_factor = {
-                    "EXCELLENT": 0.01,
-                    "GOOD": 0.02,
-                    "FAIR": 0.04,
-                    "POOR": 0.08,
-                    "CRITICAL": 0.15
-                }
-                
-                yearly_maintenance = asset.value * maintenance_factor[asset.condition]
-                yearly_projection["maintenance_cost"] += yearly_maintenance
-                
-                # If asset needs replacement in this year
-                if remaining_life <= 0:
-                    yearly_projection["replacement_cost"] += asset.value * 1.03 ** (year - current_year)
-                    yearly_projection["assets_requiring_attention"].append({
-                        "id": asset.id,
-                        "name": asset.name,
-                        "type": "replacement",
-                        "estimated_cost": asset.value * 1.03 ** (year - current_year)
-                    })
-                
-            yearly_projection["total_budget_needed"] = (
-                yearly_projection["maintenance_cost"] + 
-                yearly_projection["replacement_cost"]
-            )
-            
-            projections.append(yearly_projection)
+
+        projections = project_budget(
+            AssetColumns.from_assets(assets),
+            current_year,
+            years,
+            use_maintenance_history=maintenance_basis == MaintenanceBasis.history
+        )
         
         return {
             "projections": projections,
             "total_assets": len(assets),
-            "projection_years": years
+            "projection_years": years,
+            "source": source.value,
+            "maintenance_basis": maintenance_basis.value
+        }
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/financial-plans/projections/rebuild")
+async def rebuild_budget_projections(
+    user: dict = Depends(check_roles(["admin"]))
+):
+    """
+    Recompute the projection aggregates from the Asset table.
+    """
+    try:
+        return {"buckets": await rebuild_aggregates()}
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Solved capital plans by plan_id, for warm starts
+capital_plans = TTLCache(maxsize=32, ttl=float(os.getenv("CAPITAL_PLAN_CACHE_TTL", "900")))
+
+@app.post("/api/financial-plans/prioritize")
+async def prioritize_replacements(
+    request: CapitalPlanRequest,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """
+    Schedule replacements within each department's yearly budget.
+
+    Candidates are the assets the projections flag for replacement, minus
+    those a committed plan already funds; caps are Department.budget less
+    committed plan allocations. Returns the schedule that removes the most
+    failure risk per dollar. Pass the returned plan_id as `warm_start` to
+    re-solve after editing budgets, locks or exclusions: nothing is
+    reloaded and only departments whose inputs changed are solved again.
+    """
+    current_year = datetime.now().year
+    for asset_id, year in request.locked.items():
+        if not current_year <= year < current_year + request.years:
+            raise HTTPException(status_code=400, detail=f"Locked year for asset {asset_id} is outside the plan")
+
+    try:
+        settings = (user["user_id"], current_year, request.years, request.inflation_rate, request.departmentId)
+        cached = capital_plans.get(request.warm_start) if request.warm_start else None
+        if cached is not None and cached[0] == settings:
+            _, plan, budgets, committed = cached
+            plan = plan.copy()
+        else:
+            cached = None
+            plan = CapitalPlan(
+                await load_candidates(current_year, request.years, request.departmentId),
+                current_year,
+                request.years,
+                request.inflation_rate
+            )
+            budgets, committed = await load_budgets(current_year, request.years, request.departmentId)
+
+        solved = plan.solve(
+            budget_caps(budgets, committed, request.years, request.budget_overrides),
+            {asset_id: year - current_year for asset_id, year in request.locked.items()},
+            request.excluded
+        )
+        plan_id = uuid.uuid4().hex
+        capital_plans.set(plan_id, (settings, plan, budgets, committed))
+        return {
+            "plan_id": plan_id,
+            "warm_start": cached is not None,
+            "departments_solved": solved,
+            "candidates": len(plan.candidates),
+            **plan.summary()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/financial-plans/projections/scenarios")
+async def get_budget_projection_scenarios(
+    request: ProjectionScenariosRequest,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """
+    Generate budget projections for several inflation and condition-factor scenarios at once.
+    """
+    try:
+        assets = await db.asset.find_many()
+        columns = AssetColumns.from_assets(assets)
+        scenarios = project_scenarios(
+            columns,
+            datetime.now().year,
+            request.years,
+            [scenario.dict() for scenario in request.scenarios]
+        )
+
+        return {
+            "scenarios": scenarios,
+            "total_assets": len(assets),
+            "projection_years": request.years
         }
+    except PoolTimeoutError:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
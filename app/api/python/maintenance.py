@@ -0,0 +1,189 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from datetime import timedelta
+import asyncio
+import os
+from .auth import check_roles
+from .database import db, PoolTimeoutError
+from .models import MaintenanceLogCreate
+from .pagination import keyset_order, keyset_where, next_cursor
+from .response_cache import response_cache
+
+router = APIRouter()
+
+# Seconds between summary rebuilds, which keep cost12Months's rolling window current
+SUMMARY_REFRESH_INTERVAL = float(os.getenv("MAINTENANCE_SUMMARY_REFRESH_INTERVAL", "21600"))
+SUMMARY_REFRESH_TIMEOUT = timedelta(seconds=float(os.getenv("MAINTENANCE_SUMMARY_REFRESH_TIMEOUT", "300")))
+# Postgres advisory lock held for a rebuild, so only one worker runs it at a time
+SUMMARY_LOCK = 72910017
+
+_refresh_task: Optional[asyncio.Task] = None
+
+# Recomputes AssetMaintenanceSummary rows from MaintenanceLog. The lateral
+# lookup of the latest log is an index probe on (assetId, date DESC).
+REFRESH_SQL = '''
+INSERT INTO "AssetMaintenanceSummary" (
+    "assetId", "logCount", "totalCost", "cost12Months",
+    "lastMaintenanceDate", "lastMaintenanceType", "lastMaintenanceCost", "updatedAt"
+)
+SELECT
+    totals."assetId", totals."logCount", totals."totalCost", totals."cost12Months",
+    latest."date", latest."type", latest."cost", NOW()
+FROM (
+    SELECT
+        "assetId",
+        COUNT(*)::int AS "logCount",
+        SUM("cost") AS "totalCost",
+        COALESCE(SUM("cost") FILTER (WHERE "date" >= NOW() - INTERVAL '12 months'), 0) AS "cost12Months"
+    FROM "MaintenanceLog"
+    {where}
+    GROUP BY "assetId"
+) AS totals
+CROSS JOIN LATERAL (
+    SELECT "date", "type", "cost"
+    FROM "MaintenanceLog" AS log
+    WHERE log."assetId" = totals."assetId"
+    ORDER BY "date" DESC
+    LIMIT 1
+) AS latest
+ON CONFLICT ("assetId") DO UPDATE SET
+    "logCount" = EXCLUDED."logCount",
+    "totalCost" = EXCLUDED."totalCost",
+    "cost12Months" = EXCLUDED."cost12Months",
+    "lastMaintenanceDate" = EXCLUDED."lastMaintenanceDate",
+    "lastMaintenanceType" = EXCLUDED."lastMaintenanceType",
+    "lastMaintenanceCost" = EXCLUDED."lastMaintenanceCost",
+    "updatedAt" = EXCLUDED."updatedAt"
+'''
+
+
+async def refresh_summary(client, asset_id: str):
+    """Recompute one asset's summary; pass the transaction that wrote its log."""
+    await client.execute_raw(REFRESH_SQL.format(where='WHERE "assetId" = $1'), asset_id)
+
+
+async def rebuild_summaries(if_idle: bool = False) -> Optional[int]:
+    """
+    Recompute every summary; returns the row count.
+
+    With `if_idle`, returns None instead of waiting when another process
+    is already rebuilding.
+    """
+    async with db.tx(max_wait=timedelta(seconds=10), timeout=SUMMARY_REFRESH_TIMEOUT) as tx:
+        if if_idle:
+            rows = await tx.query_raw(f'SELECT pg_try_advisory_xact_lock({SUMMARY_LOCK}) AS "locked"')
+            if not rows[0]["locked"]:
+                return None
+        else:
+            await tx.query_raw(f'SELECT 1 AS "locked" FROM pg_advisory_xact_lock({SUMMARY_LOCK})')
+        return await tx.execute_raw(REFRESH_SQL.format(where=""))
+
+
+async def _refresh_summaries():
+    # The first pass backfills assets whose logs predate the summary table;
+    # later ones move cost12Months as logs age out of the window
+    while True:
+        try:
+            if await rebuild_summaries(if_idle=True) is not None:
+                await response_cache.invalidate("assets")
+        except Exception as e:
+            print(f"Maintenance summary refresh failed: {e}")
+        await asyncio.sleep(SUMMARY_REFRESH_INTERVAL)
+
+
+def start_summary_refresh():
+    global _refresh_task
+    if _refresh_task is None and SUMMARY_REFRESH_INTERVAL > 0:
+        _refresh_task = asyncio.create_task(_refresh_summaries())
+
+
+async def stop_summary_refresh():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
+
+
+@router.post("/assets/{asset_id}/maintenance")
+async def create_maintenance_log(
+    asset_id: str,
+    log: MaintenanceLogCreate,
+    user: dict = Depends(check_roles(["admin", "public_works"]))
+):
+    """
+    Record a maintenance log and refresh the asset's maintenance summary.
+    """
+    if not await db.asset.find_unique(where={"id": asset_id}):
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    try:
+        async with db.tx() as tx:
+            new_log = await tx.maintenanceLog.create(
+                data={
+                    **log.dict(exclude_none=True),
+                    "assetId": asset_id
+                }
+            )
+            await refresh_summary(tx, asset_id)
+        await response_cache.invalidate("assets")
+        return new_log
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/assets/{asset_id}/maintenance")
+async def get_maintenance_logs(
+    asset_id: str,
+    take: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
+):
+    """
+    Page through an asset's maintenance logs, newest first.
+    """
+    try:
+        logs = await db.maintenanceLog.find_many(
+            where=keyset_where({"assetId": asset_id}, "date", "desc", cursor),
+            take=take + 1,
+            order=keyset_order("date", "desc")
+        )
+        return {
+            "items": logs[:take],
+            "next_cursor": next_cursor(logs, take, "date")
+        }
+    except (HTTPException, PoolTimeoutError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/maintenance/summaries/rebuild")
+async def rebuild_maintenance_summaries(
+    user: dict = Depends(check_roles(["admin"]))
+):
+    """
+    Recompute every asset's maintenance summary from its logs.
+    """
+    try:
+        summaries = await rebuild_summaries()
+        await response_cache.invalidate("assets")
+        return {"summaries": summaries}
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _main():
+    await db.connect(warm=1)
+    try:
+        print(f"Rebuilt {await rebuild_summaries()} maintenance summaries")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
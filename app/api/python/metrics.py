@@ -0,0 +1,312 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import os
+import sys
+import threading
+import time
+
+SLOW_REQUEST_PROFILE_MS = float(os.getenv("SLOW_REQUEST_PROFILE_MS", "0"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+# /metrics needs METRICS_TOKEN as a bearer token; unset, it is closed unless METRICS_PUBLIC=1
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "0") == "1"
+# Stage timings in a Server-Timing response header; they reveal internals, so off by default
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[tuple(str(labels[name]) for name in self.labelnames)] = value
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (+Inf last), sum]
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics: List = []
+        # name prefix -> callable returning a dict of numeric stats
+        self.collectors: Dict[str, Callable[[], Dict]] = {}
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, prefix: str, stats: Callable[[], Dict]):
+        """Expose an existing stats() dict as gauges named `{prefix}_{key}`."""
+        self.collectors[prefix] = stats
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for prefix, stats in self.collectors.items():
+            try:
+                values = stats()
+            except Exception:
+                continue
+            for key, value in _flatten(values):
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(values: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    "api_requests_total", "HTTP requests by route, method and status code", ("route", "method", "status")
+))
+request_errors_total = registry.register(Counter(
+    "api_request_errors_total", "HTTP requests that ended in a 5xx or an unhandled exception", ("route", "method")
+))
+request_duration = registry.register(Histogram(
+    "api_request_duration_seconds", "Time from request start to the last response byte", ("route", "method")
+))
+requests_in_flight = registry.register(Gauge(
+    "api_requests_in_flight", "Requests currently being served"
+))
+stage_duration = registry.register(Histogram(
+    "api_stage_duration_seconds", "Time spent in each stage of a request (auth, db, ai, pdf...)", ("route", "stage")
+))
+
+_request_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_spans", default=None)
+_request_route: ContextVar[str] = ContextVar("request_route", default="background")
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a stage of the current request.
+
+    Usable from both sync and async code. Outside a request (startup,
+    background jobs) the stage is recorded under route="background".
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(elapsed, route=_request_route.get(), stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans[stage] = spans.get(stage, 0.0) + elapsed
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack on a background thread.
+
+    Samples are kept in a short ring buffer; when a request turns out to be
+    slow, the samples taken during it are folded into collapsed stacks
+    (flamegraph.pl / speedscope format). Every coroutine shares the loop
+    thread, so a capture also shows whatever else ran concurrently.
+    """
+
+    def __init__(self, interval: float, keep: int, window: float = 120.0):
+        self.interval = interval
+        self.samples: Deque[Tuple[float, str]] = deque(maxlen=max(1, int(window / interval)))
+        self.captures: Deque[Dict] = deque(maxlen=keep)
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples.append((time.perf_counter(), ";".join(reversed(stack))))
+
+    def capture(self, route: str, method: str, started: float, finished: float):
+        stacks: Dict[str, int] = {}
+        for at, stack in list(self.samples):
+            if started <= at <= finished:
+                stacks[stack] = stacks.get(stack, 0) + 1
+        self.captures.append({
+            "route": route,
+            "method": method,
+            "duration_ms": (finished - started) * 1000,
+            "captured_at": time.time(),
+            "samples": sum(stacks.values()),
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+        })
+
+
+profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS / 1000, PROFILE_KEEP) if SLOW_REQUEST_PROFILE_MS > 0 else None
+
+
+def scrape_allowed(authorization: Optional[str]) -> bool:
+    """Whether a /metrics request with this Authorization header may read the metrics."""
+    if METRICS_TOKEN:
+        return authorization == f"Bearer {METRICS_TOKEN}"
+    return METRICS_PUBLIC
+
+
+def _route_template(app, scope) -> str:
+    """The matched route's path template, so ids do not explode label cardinality."""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    from starlette.routing import Match
+    for candidate in app.router.routes:
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", "unmatched")
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status, errors and in-flight requests.
+
+    Duration runs to the final body chunk, so streamed responses are timed in
+    full. With `server_timing` (SERVER_TIMING=1), stage totals are also
+    returned in a Server-Timing header.
+    """
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_template(scope["app"], scope) if "app" in scope else "unmatched"
+        method = scope["method"]
+        spans: Dict[str, float] = {}
+        spans_token = _request_spans.set(spans)
+        route_token = _request_route.set(route)
+        status = 500
+        started = time.perf_counter()
+        requests_in_flight.inc(1)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if spans and self.server_timing:
+                    timing = ", ".join(
+                        f"{stage.replace('.', '-')};dur={seconds * 1000:.1f}" for stage, seconds in spans.items()
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finished = time.perf_counter()
+            requests_in_flight.inc(-1)
+            requests_total.inc(route=route, method=method, status=status)
+            if status >= 500:
+                request_errors_total.inc(route=route, method=method)
+            request_duration.observe(finished - started, route=route, method=method)
+            if profiler is not None and (finished - started) * 1000 >= SLOW_REQUEST_PROFILE_MS:
+                profiler.capture(route, method, started, finished)
+            _request_spans.reset(spans_token)
+            _request_route.reset(route_token)
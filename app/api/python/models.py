@@ -5,6 +5,106 @@ from enum import Enum
 
 # Existing models...
 
+class AssetType(str, Enum):
+    BUILDING = "BUILDING"
+    VEHICLE = "VEHICLE"
+    EQUIPMENT = "EQUIPMENT"
+    INFRASTRUCTURE = "INFRASTRUCTURE"
+    LAND = "LAND"
+    IT_SYSTEM = "IT_SYSTEM"
+    UTILITY = "UTILITY"
+
+class AssetStatus(str, Enum):
+    ACTIVE = "ACTIVE"
+    INACTIVE = "INACTIVE"
+    MAINTENANCE = "MAINTENANCE"
+    DISPOSED = "DISPOSED"
+    PLANNED = "PLANNED"
+
+class AssetCondition(str, Enum):
+    EXCELLENT = "EXCELLENT"
+    GOOD = "GOOD"
+    FAIR = "FAIR"
+    POOR = "POOR"
+    CRITICAL = "CRITICAL"
+
+class AssetCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    type: AssetType
+    status: AssetStatus
+    location: str
+    coordinates: Optional[Dict] = None
+    value: float = Field(..., ge=0)
+    purchaseDate: datetime
+    condition: AssetCondition
+    expectedLifespan: int = Field(..., ge=1)
+    manufacturer: Optional[str] = None
+    serialNumber: Optional[str] = None
+    warrantyExpiry: Optional[datetime] = None
+    lastInspection: datetime
+    nextInspection: datetime
+    notes: Optional[str] = None
+    attachments: Optional[List[str]] = None
+    departmentId: str
+
+class FinancialPlanCreate(BaseModel):
+    year: int
+    budget: float = Field(..., ge=0)
+    allocated: float = Field(..., ge=0)
+    spent: float = Field(0, ge=0)
+    fundingSource: str
+    description: str
+    startDate: datetime
+    endDate: datetime
+    assetId: str
+
+class AssetSortField(str, Enum):
+    createdAt = "createdAt"
+    name = "name"
+    value = "value"
+    purchaseDate = "purchaseDate"
+    id = "id"
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+class ReportStatus(str, Enum):
+    PENDING = "PENDING"
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+    EXPIRED = "EXPIRED"
+    REJECTED = "REJECTED"
+
+class ProjectionSource(str, Enum):
+    materialized = "materialized"
+    live = "live"
+
+class MaintenanceBasis(str, Enum):
+    condition = "condition"
+    history = "history"
+
+class ProjectionMethod(str, Enum):
+    deterministic = "deterministic"
+    monte_carlo = "monte_carlo"
+
+class MaintenanceType(str, Enum):
+    PREVENTIVE = "PREVENTIVE"
+    CORRECTIVE = "CORRECTIVE"
+    PREDICTIVE = "PREDICTIVE"
+    EMERGENCY = "EMERGENCY"
+    INSPECTION = "INSPECTION"
+
+class MaintenanceLogCreate(BaseModel):
+    date: datetime
+    type: MaintenanceType
+    description: str
+    cost: float = Field(..., ge=0)
+    performedBy: str
+    contractor: Optional[str] = None
+    parts: Optional[List[Dict]] = None
+    images: Optional[List[str]] = None
+
 class ComplianceReportCreate(BaseModel):
     reportType: str
     content: Dict
@@ -13,4 +113,109 @@ class ComplianceReportCreate(BaseModel):
     submissionDate: Optional[datetime] = None
     findings: Optional[str] = None
     recommendations: Optional[str] = None
-    assetId: str
\ No newline at end of file
+    assetId: str
+
+class ProjectionScenario(BaseModel):
+    name: Optional[str] = None
+    inflation_rate: float = Field(0.03, ge=-0.5, le=1.0)
+    maintenance_factors: Optional[Dict[str, float]] = None
+
+    @validator("maintenance_factors")
+    def validate_conditions(cls, v):
+        if v:
+            unknown = set(v) - {"EXCELLENT", "GOOD", "FAIR", "POOR", "CRITICAL"}
+            if unknown:
+                raise ValueError(f"Unknown asset conditions: {', '.join(sorted(unknown))}")
+        return v
+
+class ProjectionScenariosRequest(BaseModel):
+    years: int = Field(5, ge=1, le=20)
+    scenarios: List[ProjectionScenario] = Field(..., min_items=1, max_items=20)
+
+class CapitalPlanRequest(BaseModel):
+    years: int = Field(5, ge=1, le=20)
+    inflation_rate: float = Field(0.03, ge=-0.5, le=1.0)
+    departmentId: Optional[str] = None
+    # Annual budget to plan against instead of Department.budget, by department id
+    budget_overrides: Dict[str, float] = {}
+    # Asset id -> year it must be replaced in
+    locked: Dict[str, int] = {}
+    excluded: List[str] = []
+    # plan_id of an earlier solve to re-solve incrementally
+    warm_start: Optional[str] = None
+
+    @validator("budget_overrides")
+    def validate_budgets(cls, v):
+        if any(budget < 0 for budget in v.values()):
+            raise ValueError("Budgets must not be negative")
+        return v
+
+class BatchReportRequest(BaseModel):
+    report_types: List[str] = Field(..., min_items=1)
+    departmentId: Optional[str] = None
+    type: Optional[AssetType] = None
+    status: Optional[AssetStatus] = None
+    force: bool = False
+
+# Response schemas: only the fields each listing sends. See serialization.lean
+class DepartmentRef(BaseModel):
+    id: str
+    name: str
+    code: str
+
+class MaintenanceSummaryRef(BaseModel):
+    logCount: int
+    totalCost: float
+    cost12Months: float
+    lastMaintenanceDate: Optional[datetime] = None
+    lastMaintenanceType: Optional[MaintenanceType] = None
+    lastMaintenanceCost: Optional[float] = None
+
+class AssetListItem(BaseModel):
+    id: str
+    name: str
+    type: AssetType
+    status: AssetStatus
+    location: str
+    coordinates: Optional[Dict] = None
+    value: float
+    purchaseDate: datetime
+    condition: AssetCondition
+    expectedLifespan: int
+    lastInspection: datetime
+    nextInspection: datetime
+    riskLevel: str
+    priority: str
+    departmentId: str
+    createdAt: datetime
+    department: Optional[DepartmentRef] = None
+    maintenanceSummary: Optional[MaintenanceSummaryRef] = None
+
+class AssetPage(BaseModel):
+    items: List[AssetListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    pages: Optional[int] = None
+    page: Optional[int] = None
+
+class AssetRef(BaseModel):
+    id: str
+    name: str
+    type: AssetType
+    status: AssetStatus
+    location: str
+    departmentId: str
+
+class FinancialPlanItem(BaseModel):
+    id: str
+    year: int
+    budget: float
+    allocated: float
+    spent: float
+    fundingSource: str
+    description: str
+    startDate: datetime
+    endDate: datetime
+    status: str
+    assetId: str
+    asset: Optional[AssetRef] = None
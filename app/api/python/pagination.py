@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+from fastapi import HTTPException
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+def encode_cursor(sort_field: str, sort_value: Any, id: str) -> str:
+    """Opaque cursor pointing just past the row with (sort_value, id)."""
+    raw = json.dumps([sort_field, _encode_value(sort_value), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[Any, str]:
+    """Return (sort_value, id) from a cursor, rejecting cursors built for another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        field, value, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if field != sort_field:
+        raise HTTPException(status_code=400, detail=f"Cursor was issued for sort '{field}'")
+    return _decode_value(value), id
+
+def keyset_order(sort_field: str, direction: str) -> List[Dict]:
+    """Total ordering on (sort_field, id) so pages never overlap or skip rows."""
+    if sort_field == "id":
+        return [{"id": direction}]
+    return [{sort_field: direction}, {"id": direction}]
+
+def keyset_where(where: Dict, sort_field: str, direction: str, cursor: Optional[str]) -> Dict:
+    """Combine a filter with the keyset predicate for rows after `cursor`."""
+    if not cursor:
+        return where
+    value, id = decode_cursor(cursor, sort_field)
+    op = "gt" if direction == "asc" else "lt"
+    if sort_field == "id":
+        after = {"id": {op: id}}
+    else:
+        after = {
+            "OR": [
+                {sort_field: {op: value}},
+                {sort_field: value, "id": {op: id}}
+            ]
+        }
+    return {"AND": [where, after]} if where else after
+
+def next_cursor(rows: List, take: int, sort_field: str) -> Optional[str]:
+    """
+    Cursor for the page after `rows`, or None on the last page.
+
+    Callers fetch `take + 1` rows; the extra row only signals that more exist.
+    """
+    if len(rows) <= take:
+        return None
+    last = rows[take - 1]
+    return encode_cursor(sort_field, getattr(last, sort_field), last.id)
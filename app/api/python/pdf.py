@@ -0,0 +1,249 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from io import BytesIO
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from fastapi import Request, Response
+from .metrics import span
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", ".pdf_cache")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+PDF_CACHE_MAX_AGE = int(os.getenv("PDF_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+# Writes between eviction passes, each of which stats the whole directory
+PDF_CACHE_EVICT_EVERY = int(os.getenv("PDF_CACHE_EVICT_EVERY", "50"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def render_report_pdf(report: Dict) -> bytes:
+    """
+    Build the report PDF with ReportLab.
+
+    Runs in a worker process, so it takes and returns only picklable data:
+    `report` has title, sections, asset_name, report_type, generated and status.
+    """
+    # Imported lazily: only the render processes need ReportLab, and it is
+    # the slowest import in the app
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    # Custom styles
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SectionHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12
+    ))
+
+    story = []
+
+    # Title
+    title = Paragraph(report["title"], styles['CustomTitle'])
+    story.append(title)
+
+    # Metadata
+    metadata = [
+        ["Asset", report["asset_name"]],
+        ["Report Type", report["report_type"]],
+        ["Generated", report["generated"]],
+        ["Status", report["status"]]
+    ]
+
+    meta_table = Table(metadata, colWidths=[100, 400])
+    meta_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (1, 0), (-1, -1), colors.white),
+        ('TEXTCOLOR', (1, 0), (-1, -1), colors.black),
+        ('FONTNAME', (1, 0), (-1, -1), 'Helvetica'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    story.append(meta_table)
+    story.append(Spacer(1, 20))
+
+    # Sections
+    for section in report["sections"]:
+        heading = Paragraph(section["heading"], styles['SectionHeading'])
+        story.append(heading)
+
+        content_para = Paragraph(section["content"], styles['Normal'])
+        story.append(content_para)
+        story.append(Spacer(1, 12))
+
+    # Build PDF
+    doc.build(story)
+
+    # Get PDF content
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
+
+
+async def render_pdf(report: Dict) -> bytes:
+    """Render in the process pool so ReportLab never holds the GIL on the event loop."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS)
+    loop = asyncio.get_running_loop()
+    with span("pdf.render"):
+        return await loop.run_in_executor(_executor, render_report_pdf, report)
+
+
+def shutdown_renderer():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class PdfCache:
+    """
+    Rendered PDFs on disk, keyed by report id and the report's updatedAt.
+
+    A file's mtime is its last use. Every `evict_every` puts, eviction
+    drops files unused for `max_age` seconds, then the least recently used
+    until the directory is within `max_bytes`. File access runs in a
+    thread so it never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: str = PDF_CACHE_DIR,
+        max_bytes: int = PDF_CACHE_MAX_BYTES,
+        max_age: int = PDF_CACHE_MAX_AGE,
+        evict_every: int = PDF_CACHE_EVICT_EVERY
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_every = evict_every
+        self._writes = 0
+
+    @staticmethod
+    def key(report_id: str, updated_at) -> str:
+        return hashlib.sha256(f"{report_id}:{updated_at.isoformat()}".encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                content = f.read()
+            os.utime(self.path(key))
+            return content
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, content: bytes, evict: bool):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, self.path(key))
+        if evict:
+            self.evict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, content: bytes):
+        self._writes += 1
+        await asyncio.to_thread(self._write, key, content, self._writes % self.evict_every == 0)
+
+    def evict(self):
+        """Blocking; put runs it in a thread."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pdf"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        expired_before = time.time() - self.max_age
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime >= expired_before and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+pdf_cache = PdfCache()
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "").strip()
+    return if_none_match == "*" or etag in [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]
+
+
+def cached_file_response(
+    request: Request,
+    content: Optional[bytes],
+    etag: str,
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serve bytes with ETag / If-None-Match and single-range Range support.
+
+    `content` may be None when the caller already knows the client holds the
+    current version; only a 304 can be produced then.
+    """
+    headers = {**(headers or {}), "ETag": etag, "Accept-Ranges": "bytes"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    size = len(content)
+    match = _RANGE.match(request.headers.get("range", "").strip())
+    if_range = request.headers.get("if-range")
+    if match and (if_range is None or if_range == etag):
+        start, end = match.groups()
+        if start:
+            first, last = int(start), min(int(end), size - 1) if end else size - 1
+        elif end:
+            first, last = max(size - int(end), 0), size - 1
+        else:
+            first, last = 0, -1
+        if first > last or first >= size:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        return Response(
+            content=content[first:last + 1],
+            status_code=206,
+            media_type=media_type,
+            headers={**headers, "Content-Range": f"bytes {first}-{last}/{size}"}
+        )
+
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,150 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import timedelta
+import asyncio
+import os
+from .database import db
+from .projections import aggregate_assets
+
+# Column order of the ProjectionAggregate primary key
+KEY_FIELDS = ("departmentId", "type", "condition", "dueYear")
+
+REBUILD_TIMEOUT = timedelta(seconds=float(os.getenv("PROJECTION_REBUILD_TIMEOUT", "300")))
+REBUILD_ON_STARTUP = os.getenv("PROJECTION_REBUILD_ON_STARTUP", "1") == "1"
+# Postgres advisory lock held for a rebuild, so workers starting together rebuild once
+REBUILD_LOCK = 72910013
+
+# Set once this process has rebuilt the aggregates or seen another process do
+# it; until then they may be missing assets, so projections read assets live
+_built = False
+
+REBUILD_SQL = '''
+INSERT INTO "ProjectionAggregate" ("departmentId", "type", "condition", "dueYear", "value", "assetCount", "updatedAt")
+SELECT
+    "departmentId",
+    "type",
+    "condition",
+    (EXTRACT(YEAR FROM "purchaseDate")::int + "expectedLifespan") AS "dueYear",
+    SUM("value"),
+    COUNT(*)::int,
+    NOW()
+FROM "Asset"
+GROUP BY "departmentId", "type", "condition", "dueYear"
+'''
+
+
+async def apply_deltas(client, deltas: Dict[Tuple[str, str, str, int], Dict]):
+    """
+    Add value/count deltas to their aggregate rows.
+
+    Pass the transaction the asset write runs in as `client` so the
+    aggregate can never drift from the rows it summarizes.
+    """
+    for key, delta in deltas.items():
+        if not delta["assetCount"] and not delta["value"]:
+            continue
+        fields = dict(zip(KEY_FIELDS, key))
+        await client.projectionAggregate.upsert(
+            where={"departmentId_type_condition_dueYear": fields},
+            data={
+                "create": {**fields, "value": delta["value"], "assetCount": delta["assetCount"]},
+                "update": {
+                    "value": {"increment": delta["value"]},
+                    "assetCount": {"increment": delta["assetCount"]}
+                }
+            }
+        )
+
+
+async def apply_asset_change(client, before=None, after=None):
+    """
+    Move an asset's contribution between buckets.
+
+    `before` is the stored asset prior to an update or delete, `after` the
+    created or updated asset; either may be None.
+    """
+    deltas = aggregate_assets([before] if before else [], sign=-1)
+    if after:
+        for key, delta in aggregate_assets([after]).items():
+            current = deltas.setdefault(key, {"value": 0.0, "assetCount": 0})
+            current["value"] += delta["value"]
+            current["assetCount"] += delta["assetCount"]
+    await apply_deltas(client, deltas)
+
+
+async def apply_new_assets(client, assets: Iterable):
+    await apply_deltas(client, aggregate_assets(assets))
+
+
+def aggregates_built() -> bool:
+    return _built
+
+
+async def rebuild_aggregates(if_idle: bool = False) -> Optional[int]:
+    """
+    Recompute every aggregate row from the Asset table; returns the bucket count.
+
+    With `if_idle`, returns None instead of waiting when another process
+    is already rebuilding.
+    """
+    global _built
+    # Scans every asset, so far past Prisma's 5 s default transaction timeout on a large inventory
+    async with db.tx(max_wait=timedelta(seconds=10), timeout=REBUILD_TIMEOUT) as tx:
+        if if_idle:
+            rows = await tx.query_raw(f'SELECT pg_try_advisory_xact_lock({REBUILD_LOCK}) AS "locked"')
+            if not rows[0]["locked"]:
+                return None
+        else:
+            await tx.query_raw(f'SELECT 1 AS "locked" FROM pg_advisory_xact_lock({REBUILD_LOCK})')
+        await tx.projectionAggregate.delete_many()
+        buckets = await tx.execute_raw(REBUILD_SQL)
+    _built = True
+    return buckets
+
+
+async def ensure_aggregates():
+    """
+    Startup backfill: rebuild the aggregates, or if another worker already
+    is, wait for its rebuild to commit.
+    """
+    global _built
+    if not REBUILD_ON_STARTUP:
+        return
+    if await rebuild_aggregates(if_idle=True) is None:
+        async with db.tx(max_wait=timedelta(seconds=10), timeout=REBUILD_TIMEOUT) as tx:
+            await tx.query_raw(f'SELECT 1 AS "locked" FROM pg_advisory_xact_lock({REBUILD_LOCK})')
+        _built = True
+
+
+async def load_aggregates(
+    department_id: Optional[str] = None,
+    type: Optional[str] = None
+) -> List[Dict]:
+    """Buckets summed over department/type, one row per (dueYear, condition)."""
+    conditions = []
+    params = []
+    if department_id:
+        params.append(department_id)
+        conditions.append(f'"departmentId" = ${len(params)}')
+    if type:
+        params.append(type)
+        conditions.append(f'"type" = ${len(params)}::"AssetType"')
+    where = f'WHERE {" AND ".join(conditions)}' if conditions else ""
+    return await db.query_raw(
+        f'SELECT "dueYear", "condition"::text AS "condition", SUM("value") AS "value", '
+        f'SUM("assetCount")::int AS "assetCount" FROM "ProjectionAggregate" {where} '
+        f'GROUP BY "dueYear", "condition" HAVING SUM("assetCount") > 0',
+        *params
+    )
+
+
+async def _main():
+    await db.connect(warm=1)
+    try:
+        buckets = await rebuild_aggregates()
+        print(f"Rebuilt {buckets} projection aggregate rows")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,240 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Share of asset value spent on upkeep each year, by condition
+MAINTENANCE_FACTORS = {
+    "EXCELLENT": 0.01,
+    "GOOD": 0.02,
+    "FAIR": 0.04,
+    "POOR": 0.08,
+    "CRITICAL": 0.15
+}
+
+CONDITIONS = list(MAINTENANCE_FACTORS)
+DEFAULT_INFLATION_RATE = 0.03
+
+
+class AssetColumns:
+    """Columnar view of an asset inventory, one NumPy array per field."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        names: Sequence[str],
+        value: np.ndarray,
+        purchase_year: np.ndarray,
+        lifespan: np.ndarray,
+        condition: np.ndarray,
+        maintenance_history: Optional[np.ndarray] = None
+    ):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.purchase_year = np.asarray(purchase_year, dtype=np.int64)
+        self.lifespan = np.asarray(lifespan, dtype=np.int64)
+        # Index into CONDITIONS
+        self.condition = np.asarray(condition, dtype=np.int64)
+        # Trailing 12-month maintenance spend; NaN where there is none on record
+        if maintenance_history is None:
+            maintenance_history = np.full(len(self.ids), np.nan)
+        self.maintenance_history = np.asarray(maintenance_history, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_assets(cls, assets) -> "AssetColumns":
+        """Pack Prisma Asset models into columns."""
+        count = len(assets)
+        value = np.empty(count, dtype=np.float64)
+        purchase_year = np.empty(count, dtype=np.int64)
+        lifespan = np.empty(count, dtype=np.int64)
+        condition = np.empty(count, dtype=np.int64)
+        maintenance_history = np.full(count, np.nan)
+        condition_index = {name: i for i, name in enumerate(CONDITIONS)}
+
+        for i, asset in enumerate(assets):
+            value[i] = asset.value
+            purchase_year[i] = asset.purchaseDate.year
+            lifespan[i] = asset.expectedLifespan
+            condition[i] = condition_index[asset.condition]
+            summary = getattr(asset, "maintenanceSummary", None)
+            if summary is not None and summary.cost12Months > 0:
+                maintenance_history[i] = summary.cost12Months
+
+        return cls(
+            ids=[asset.id for asset in assets],
+            names=[asset.name for asset in assets],
+            value=value,
+            purchase_year=purchase_year,
+            lifespan=lifespan,
+            condition=condition,
+            maintenance_history=maintenance_history
+        )
+
+
+def _sequential_sum(matrix: np.ndarray) -> np.ndarray:
+    """
+    Row sums accumulated strictly left to right.
+
+    np.sum uses pairwise summation, which rounds differently from adding one
+    asset at a time; cumsum keeps results bit-identical to a plain loop.
+    """
+    if matrix.shape[-1] == 0:
+        return np.zeros(matrix.shape[:-1], dtype=np.float64)
+    return np.cumsum(matrix, axis=-1)[..., -1]
+
+
+def project_budget(
+    columns: AssetColumns,
+    start_year: int,
+    years: int,
+    inflation_rate: float = DEFAULT_INFLATION_RATE,
+    maintenance_factors: Optional[Dict[str, float]] = None,
+    use_maintenance_history: bool = False
+) -> List[Dict]:
+    """
+    Project maintenance and replacement spending for each year in one pass.
+
+    Every year is computed in a single (years x assets) broadcast. Results
+    match the per-asset loop this replaces exactly, including rounding.
+    With `use_maintenance_history`, assets with maintenance spend in the
+    last 12 months are projected at that spend instead of the condition factor.
+    """
+    factors = {**MAINTENANCE_FACTORS, **(maintenance_factors or {})}
+    factor_by_condition = np.array([factors[name] for name in CONDITIONS], dtype=np.float64)
+
+    year_range = np.arange(start_year, start_year + years, dtype=np.int64)
+    # Scalar pow per year keeps inflation bit-identical to the Python loop
+    growth = np.array([(1 + inflation_rate) ** offset for offset in range(years)], dtype=np.float64)
+
+    # Maintenance does not depend on the year, only on condition
+    yearly_maintenance = columns.value * factor_by_condition[columns.condition]
+    if use_maintenance_history:
+        recorded = ~np.isnan(columns.maintenance_history)
+        yearly_maintenance = np.where(recorded, columns.maintenance_history, yearly_maintenance)
+    maintenance_cost = _sequential_sum(yearly_maintenance[np.newaxis, :])[0]
+
+    # (years x assets) replacement schedule
+    remaining_life = columns.lifespan - (year_range[:, np.newaxis] - columns.purchase_year)
+    needs_replacement = remaining_life <= 0
+    estimated_cost = columns.value * growth[:, np.newaxis]
+    replacement_cost = _sequential_sum(np.where(needs_replacement, estimated_cost, 0.0))
+
+    # Empty inventories keep the integer zeros the original loop produced
+    empty = len(columns) == 0
+    projections = []
+    for row, year in enumerate(year_range.tolist()):
+        indices = np.flatnonzero(needs_replacement[row])
+        costs = estimated_cost[row, indices].tolist()
+        maintenance = 0 if empty else float(maintenance_cost)
+        replacement = float(replacement_cost[row]) if indices.size else 0
+        projections.append({
+            "year": year,
+            "total_budget_needed": maintenance + replacement,
+            "maintenance_cost": maintenance,
+            "replacement_cost": replacement,
+            "assets_requiring_attention": [
+                {
+                    "id": columns.ids[i],
+                    "name": columns.names[i],
+                    "type": "replacement",
+                    "estimated_cost": cost
+                }
+                for i, cost in zip(indices.tolist(), costs)
+            ]
+        })
+    return projections
+
+
+def project_scenarios(
+    columns: AssetColumns,
+    start_year: int,
+    years: int,
+    scenarios: Sequence[Dict]
+) -> List[Dict]:
+    """
+    Run several inflation / condition-factor scenarios over the same columns.
+
+    Each scenario is a dict with optional "name", "inflation_rate" and
+    "maintenance_factors" keys.
+    """
+    results = []
+    for index, scenario in enumerate(scenarios):
+        results.append({
+            "name": scenario.get("name") or f"scenario-{index + 1}",
+            "inflation_rate": scenario.get("inflation_rate", DEFAULT_INFLATION_RATE),
+            "maintenance_factors": {
+                **MAINTENANCE_FACTORS,
+                **(scenario.get("maintenance_factors") or {})
+            },
+            "projections": project_budget(
+                columns,
+                start_year,
+                years,
+                inflation_rate=scenario.get("inflation_rate", DEFAULT_INFLATION_RATE),
+                maintenance_factors=scenario.get("maintenance_factors")
+            )
+        })
+    return results
+
+
+def aggregate_key(asset) -> Tuple[str, str, str, int]:
+    """(departmentId, type, condition, dueYear) bucket an asset falls into."""
+    return (
+        asset.departmentId,
+        getattr(asset.type, "value", asset.type),
+        getattr(asset.condition, "value", asset.condition),
+        asset.purchaseDate.year + asset.expectedLifespan
+    )
+
+
+def aggregate_assets(assets: Iterable, sign: int = 1) -> Dict[Tuple[str, str, str, int], Dict]:
+    """
+    Sum asset value and count per aggregate bucket.
+
+    `sign=-1` produces the deltas that remove the assets again.
+    """
+    groups: Dict[Tuple[str, str, str, int], Dict] = {}
+    for asset in assets:
+        group = groups.setdefault(aggregate_key(asset), {"value": 0.0, "assetCount": 0})
+        group["value"] += sign * asset.value
+        group["assetCount"] += sign
+    return groups
+
+
+def project_from_aggregates(
+    groups: Sequence[Dict],
+    start_year: int,
+    years: int,
+    inflation_rate: float = DEFAULT_INFLATION_RATE,
+    maintenance_factors: Optional[Dict[str, float]] = None
+) -> List[Dict]:
+    """
+    Budget projection from pre-summed buckets instead of individual assets.
+
+    Each group has "dueYear", "condition", "value" and "assetCount". An asset
+    needs replacement in every year from its due year on, so replacement cost
+    is the inflated running total of value due by that year. Totals agree with
+    project_budget up to floating-point summation order.
+    """
+    factors = {**MAINTENANCE_FACTORS, **(maintenance_factors or {})}
+    due_year = np.array([group["dueYear"] for group in groups], dtype=np.int64)
+    value = np.array([group["value"] for group in groups], dtype=np.float64)
+    count = np.array([group["assetCount"] for group in groups], dtype=np.int64)
+    factor = np.array([factors[group["condition"]] for group in groups], dtype=np.float64)
+
+    maintenance = float(value @ factor) if len(groups) else 0
+    projections = []
+    for offset in range(years):
+        year = start_year + offset
+        due = due_year <= year
+        replacement = float(value[due].sum()) * (1 + inflation_rate) ** offset if due.any() else 0
+        projections.append({
+            "year": year,
+            "total_budget_needed": maintenance + replacement,
+            "maintenance_cost": maintenance,
+            "replacement_cost": replacement,
+            "assets_requiring_replacement": int(count[due].sum())
+        })
+    return projections
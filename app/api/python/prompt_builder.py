@@ -0,0 +1,355 @@
+"""
+Compact, token-budgeted asset payloads for report prompts.
+
+The prompt used to carry the whole serialized asset as indented JSON,
+including every maintenance log and financial plan row. compact_asset
+keeps only the fields each report type reads and replaces maintenance
+logs with aggregate statistics plus the most recent few. The statistics
+are aggregated in SQL (see grouped_statistics), so only the recent logs
+are ever loaded. build_prompt minifies the result, then drops detail
+(least useful first) until the estimated token count fits the budget.
+"""
+from typing import Dict, List, NamedTuple, Optional
+from datetime import datetime, timedelta
+import math
+import os
+import orjson
+
+REPORT_PROMPT_TOKEN_BUDGET = int(os.getenv("REPORT_PROMPT_TOKEN_BUDGET", "6000"))
+REPORT_RECENT_LOGS = int(os.getenv("REPORT_RECENT_LOGS", "10"))
+# No tokenizer ships with the app; JSON with numbers and ids runs denser
+# than prose, so this errs towards overestimating
+CHARS_PER_TOKEN = float(os.getenv("REPORT_PROMPT_CHARS_PER_TOKEN", "3.5"))
+# Everything above changes the prompt a report is generated from
+PROMPT_SETTINGS = {
+    "token_budget": REPORT_PROMPT_TOKEN_BUDGET,
+    "recent_logs": REPORT_RECENT_LOGS,
+    "chars_per_token": CHARS_PER_TOKEN
+}
+
+ASSET_FIELDS = (
+    "name", "type", "status", "location", "value", "purchaseDate", "condition", "expectedLifespan",
+    "manufacturer", "warrantyExpiry", "lastInspection", "nextInspection", "riskLevel", "priority", "notes"
+)
+DATE_FIELDS = ("purchaseDate", "warrantyExpiry", "lastInspection", "nextInspection")
+
+# Per report type: department and financial plan fields, and whether plan rows are sent at all
+SECTION_FIELDS = {
+    "POLICY": {"department": ("name", "code"), "plans": ()},
+    "STRATEGY": {"department": ("name", "code"), "plans": ("year", "budget", "allocated", "status")},
+    "FINANCIAL": {
+        "department": ("name", "code", "budget"),
+        "plans": ("year", "budget", "allocated", "spent", "fundingSource", "status", "description")
+    }
+}
+
+DESCRIPTION_CHARS = 200
+
+
+class Prompt(NamedTuple):
+    text: str
+    tokens: int
+    # Reduction steps applied to fit the budget
+    reductions: List[str]
+
+    @property
+    def over_budget(self) -> bool:
+        return bool(self.reductions) and self.reductions[-1] == "over_budget"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _render(instructions: str, payload: str) -> str:
+    return f"{instructions}\n\nAsset details: {payload}"
+
+
+def _minified(value) -> str:
+    return orjson.dumps(value, default=str).decode()
+
+
+def _truncate(text: Optional[str], limit: int) -> Optional[str]:
+    if text is None or len(text) <= limit:
+        return text
+    return text[:limit - 1].rstrip() + "…"
+
+
+def _date(value) -> Optional[str]:
+    # serialize_asset leaves datetimes as str(datetime); the date is all a report needs
+    return None if value is None else str(value)[:10]
+
+
+def _parse_date(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def maintenance_statistics(logs: List[Dict], now: datetime) -> Dict:
+    """Counts and costs of maintenance logs, overall, by type and by year."""
+    dated = sorted(
+        ((date, log) for date, log in ((_parse_date(log.get("date")), log) for log in logs) if date),
+        key=lambda pair: pair[0]
+    )
+    total = sum(log.get("cost") or 0 for log in logs)
+    by_type: Dict[str, Dict] = {}
+    by_year: Dict[str, Dict] = {}
+    for date, log in dated:
+        for table, key in ((by_type, str(log.get("type"))), (by_year, str(date.year))):
+            bucket = table.setdefault(key, {"count": 0, "cost": 0.0})
+            bucket["count"] += 1
+            bucket["cost"] += log.get("cost") or 0
+    since = now - timedelta(days=365)
+    stats = {
+        "count": len(logs),
+        "total_cost": round(total, 2),
+        "cost_12_months": round(sum(log.get("cost") or 0 for date, log in dated if date >= since), 2),
+        "by_type": {key: {**bucket, "cost": round(bucket["cost"], 2)} for key, bucket in by_type.items()},
+        "by_year": {key: {**bucket, "cost": round(bucket["cost"], 2)} for key, bucket in by_year.items()}
+    }
+    if dated:
+        stats["first_date"] = dated[0][0].date().isoformat()
+        stats["last_date"] = dated[-1][0].date().isoformat()
+    if len(dated) > 1:
+        stats["mean_days_between"] = round((dated[-1][0] - dated[0][0]).days / (len(dated) - 1), 1)
+    return stats
+
+
+def grouped_statistics(groups: List[Dict]) -> Dict:
+    """
+    maintenance_statistics from logs already aggregated per (type, year).
+
+    Each group has type, year, count, cost, cost12Months, firstDate and
+    lastDate, as the report loader's SQL returns them.
+    """
+    groups = sorted(groups, key=lambda group: (group["year"], str(group["type"])))
+    count = sum(group["count"] for group in groups)
+    by_type: Dict[str, Dict] = {}
+    by_year: Dict[str, Dict] = {}
+    for group in groups:
+        for table, key in ((by_type, str(group["type"])), (by_year, str(group["year"]))):
+            bucket = table.setdefault(key, {"count": 0, "cost": 0.0})
+            bucket["count"] += group["count"]
+            bucket["cost"] += group["cost"] or 0
+    stats = {
+        "count": count,
+        "total_cost": round(sum(group["cost"] or 0 for group in groups), 2),
+        "cost_12_months": round(sum(group["cost12Months"] or 0 for group in groups), 2),
+        "by_type": {key: {**bucket, "cost": round(bucket["cost"], 2)} for key, bucket in by_type.items()},
+        "by_year": {key: {**bucket, "cost": round(bucket["cost"], 2)} for key, bucket in by_year.items()}
+    }
+    if groups:
+        first = min(_parse_date(group["firstDate"]) for group in groups)
+        last = max(_parse_date(group["lastDate"]) for group in groups)
+        stats["first_date"] = first.date().isoformat()
+        stats["last_date"] = last.date().isoformat()
+        if count > 1:
+            stats["mean_days_between"] = round((last - first).days / (count - 1), 1)
+    return stats
+
+
+def _plan_summary(plans: List[Dict]) -> Dict:
+    by_status: Dict[str, Dict] = {}
+    for plan in plans:
+        bucket = by_status.setdefault(
+            str(plan.get("status")), {"count": 0, "budget": 0.0, "allocated": 0.0, "spent": 0.0}
+        )
+        bucket["count"] += 1
+        for field in ("budget", "allocated", "spent"):
+            bucket[field] += plan.get(field) or 0
+    years = [plan["year"] for plan in plans if plan.get("year") is not None]
+    summary = {"count": len(plans), "by_status": by_status}
+    if years:
+        summary["years"] = [min(years), max(years)]
+    return summary
+
+
+def compact_asset(
+    asset: Dict,
+    report_type: str,
+    now: Optional[datetime] = None,
+    recent_logs: int = REPORT_RECENT_LOGS
+) -> Dict:
+    """
+    The parts of a serialized asset (see serialize_asset) a `report_type` report uses.
+
+    Maintenance statistics come from the asset's "maintenanceStatistics" when
+    the loader aggregated them, else from its "maintenanceLogs".
+    """
+    fields = SECTION_FIELDS[report_type]
+    compact = {field: asset.get(field) for field in ASSET_FIELDS if asset.get(field) is not None}
+    for field in DATE_FIELDS:
+        if field in compact:
+            compact[field] = _date(compact[field])
+
+    department = asset.get("department")
+    if department:
+        compact["department"] = {field: department.get(field) for field in fields["department"]}
+
+    logs = asset.get("maintenanceLogs") or []
+    statistics = asset.get("maintenanceStatistics")
+    if statistics is not None:
+        # Copied: the reductions below edit the payload in place
+        compact["maintenance"] = dict(statistics)
+    else:
+        compact["maintenance"] = maintenance_statistics(logs, now or datetime.now())
+    recent = sorted(logs, key=lambda log: str(log.get("date")), reverse=True)[:recent_logs]
+    if recent:
+        compact["maintenance"]["recent"] = [
+            {
+                "date": _date(log.get("date")),
+                "type": log.get("type"),
+                "cost": log.get("cost"),
+                "description": _truncate(log.get("description"), DESCRIPTION_CHARS)
+            }
+            for log in recent
+        ]
+
+    plans = asset.get("financialPlans") or []
+    if plans:
+        compact["financial_plans"] = {"summary": _plan_summary(plans)}
+        if fields["plans"]:
+            rows = sorted(plans, key=lambda plan: plan.get("year") or 0, reverse=True)
+            compact["financial_plans"]["plans"] = [
+                {
+                    field: _truncate(plan.get(field), DESCRIPTION_CHARS) if field == "description" else plan.get(field)
+                    for field in fields["plans"]
+                }
+                for plan in rows
+            ]
+    return compact
+
+
+def _shorten_logs(payload: Dict) -> Dict:
+    maintenance = payload["maintenance"]
+    if "recent" in maintenance:
+        maintenance["recent"] = maintenance["recent"][:3]
+        for log in maintenance["recent"]:
+            log["description"] = _truncate(log["description"], 60)
+    return payload
+
+
+def _drop_recent_logs(payload: Dict) -> Dict:
+    payload["maintenance"].pop("recent", None)
+    return payload
+
+
+def _recent_plans(payload: Dict) -> Dict:
+    plans = payload.get("financial_plans", {})
+    if "plans" in plans:
+        plans["plans"] = plans["plans"][:10]
+        for plan in plans["plans"]:
+            plan.pop("description", None)
+    return payload
+
+
+def _recent_years(payload: Dict) -> Dict:
+    by_year = payload["maintenance"]["by_year"]
+    payload["maintenance"]["by_year"] = {year: by_year[year] for year in sorted(by_year)[-10:]}
+    return payload
+
+
+def _plan_summary_only(payload: Dict) -> Dict:
+    payload.get("financial_plans", {}).pop("plans", None)
+    return payload
+
+
+def _short_notes(payload: Dict) -> Dict:
+    if "notes" in payload:
+        payload["notes"] = _truncate(payload["notes"], DESCRIPTION_CHARS)
+    return payload
+
+
+def _drop_history(payload: Dict) -> Dict:
+    payload["maintenance"].pop("by_year", None)
+    payload.pop("notes", None)
+    return payload
+
+
+# Applied in order, cumulatively, until the prompt fits
+REDUCTIONS: List = [
+    ("shorten_recent_logs", _shorten_logs),
+    ("recent_plans", _recent_plans),
+    ("drop_recent_logs", _drop_recent_logs),
+    ("recent_years", _recent_years),
+    ("plan_summary_only", _plan_summary_only),
+    ("short_notes", _short_notes),
+    ("drop_history", _drop_history)
+]
+
+
+def build_prompt(
+    instructions: str,
+    asset: Dict,
+    report_type: str,
+    budget: int = REPORT_PROMPT_TOKEN_BUDGET,
+    now: Optional[datetime] = None
+) -> Prompt:
+    """
+    Report prompt for `asset` within `budget` estimated tokens.
+
+    If even the smallest payload does not fit, it is sent anyway and the
+    last reduction is "over_budget".
+    """
+    payload = compact_asset(asset, report_type, now)
+    text = _render(instructions, _minified(payload))
+    reductions: List[str] = []
+    for name, reduce in REDUCTIONS:
+        if estimate_tokens(text) <= budget:
+            break
+        payload = reduce(payload)
+        reductions.append(name)
+        text = _render(instructions, _minified(payload))
+    if estimate_tokens(text) > budget:
+        reductions.append("over_budget")
+    return Prompt(text, estimate_tokens(text), reductions)
+
+
+def estimate_raw_tokens(instructions: str, asset: Dict) -> int:
+    """
+    Estimated tokens of the old prompt: the whole asset as indented JSON.
+
+    Only the recent maintenance logs are loaded, so the rest are counted
+    at the loaded logs' average size.
+    """
+    logs = asset.get("maintenanceLogs") or []
+    rest = {key: value for key, value in asset.items() if key not in ("maintenanceLogs", "maintenanceStatistics")}
+    tokens = estimate_tokens(_render(instructions, orjson.dumps(rest, default=str, option=orjson.OPT_INDENT_2).decode()))
+    if logs:
+        count = (asset.get("maintenanceStatistics") or {}).get("count", len(logs))
+        log_tokens = estimate_tokens(orjson.dumps(logs, default=str, option=orjson.OPT_INDENT_2).decode())
+        tokens += math.ceil(log_tokens * count / len(logs))
+    return tokens
+
+
+class PromptStats:
+    """Estimated prompt sizes after compaction."""
+
+    def __init__(self):
+        self.prompts = 0
+        self.tokens_total = 0
+        self.tokens_max = 0
+        self.reduced = 0
+        self.over_budget = 0
+
+    def record(self, prompt: Prompt):
+        self.prompts += 1
+        self.tokens_total += prompt.tokens
+        self.tokens_max = max(self.tokens_max, prompt.tokens)
+        self.reduced += bool(prompt.reductions)
+        self.over_budget += prompt.over_budget
+
+    def stats(self) -> Dict:
+        return {
+            "prompts": self.prompts,
+            "avg_tokens": self.tokens_total / self.prompts if self.prompts else 0.0,
+            "max_tokens": self.tokens_max,
+            "reduced": self.reduced,
+            "over_budget": self.over_budget,
+            "budget": REPORT_PROMPT_TOKEN_BUDGET
+        }
+
+
+prompt_stats = PromptStats()
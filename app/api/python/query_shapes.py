@@ -0,0 +1,269 @@
+"""
+Catalog of the API's database query shapes and the indexes that serve them.
+
+Every Prisma call in main.py, ai_reports.py and auth.py is listed with the
+columns it filters and sorts on, a representative SQL statement and the
+index (as declared in prisma/schema.prisma) that should answer it. The
+benchmark in benchmarks/query_shapes.py runs these statements with and
+without the indexes.
+"""
+from typing import Dict, List
+
+# Secondary indexes declared in schema.prisma, by Prisma's generated name
+INDEXES: Dict[str, str] = {
+    "Asset_createdAt_id_idx": 'CREATE INDEX IF NOT EXISTS "Asset_createdAt_id_idx" ON "Asset"("createdAt", "id")',
+    "Asset_type_status_createdAt_id_idx": (
+        'CREATE INDEX IF NOT EXISTS "Asset_type_status_createdAt_id_idx" '
+        'ON "Asset"("type", "status", "createdAt", "id")'
+    ),
+    "Asset_status_createdAt_id_idx": (
+        'CREATE INDEX IF NOT EXISTS "Asset_status_createdAt_id_idx" ON "Asset"("status", "createdAt", "id")'
+    ),
+    "Asset_departmentId_id_idx": (
+        'CREATE INDEX IF NOT EXISTS "Asset_departmentId_id_idx" ON "Asset"("departmentId", "id")'
+    ),
+    "Asset_geohash_idx": 'CREATE INDEX IF NOT EXISTS "Asset_geohash_idx" ON "Asset"("geohash")',
+    "MaintenanceLog_assetId_date_idx": (
+        'CREATE INDEX IF NOT EXISTS "MaintenanceLog_assetId_date_idx" ON "MaintenanceLog"("assetId", "date" DESC)'
+    ),
+    "FinancialPlan_assetId_idx": 'CREATE INDEX IF NOT EXISTS "FinancialPlan_assetId_idx" ON "FinancialPlan"("assetId")',
+    "FinancialPlan_year_status_idx": (
+        'CREATE INDEX IF NOT EXISTS "FinancialPlan_year_status_idx" ON "FinancialPlan"("year", "status")'
+    ),
+    "FinancialPlan_status_idx": 'CREATE INDEX IF NOT EXISTS "FinancialPlan_status_idx" ON "FinancialPlan"("status")',
+    "InsuranceDetail_assetId_idx": (
+        'CREATE INDEX IF NOT EXISTS "InsuranceDetail_assetId_idx" ON "InsuranceDetail"("assetId")'
+    ),
+    "ComplianceReport_fingerprint_createdAt_idx": (
+        'CREATE INDEX IF NOT EXISTS "ComplianceReport_fingerprint_createdAt_idx" '
+        'ON "ComplianceReport"("fingerprint", "createdAt")'
+    ),
+    "ComplianceReport_createdAt_id_idx": (
+        'CREATE INDEX IF NOT EXISTS "ComplianceReport_createdAt_id_idx" ON "ComplianceReport"("createdAt", "id")'
+    ),
+    "ComplianceReport_assetId_createdAt_idx": (
+        'CREATE INDEX IF NOT EXISTS "ComplianceReport_assetId_createdAt_idx" '
+        'ON "ComplianceReport"("assetId", "createdAt")'
+    )
+}
+
+# Each shape: where it comes from, what it touches, and a representative
+# statement. $n placeholders are bound from "params"; ":asset", ":plan_year"
+# and similar strings are filled in from seeded data by the benchmark.
+QUERY_SHAPES: List[Dict] = [
+    {
+        "name": "assets.page",
+        "source": "main.py get_assets",
+        "model": "Asset",
+        "filter": [],
+        "order": ["createdAt", "id"],
+        "index": "Asset_createdAt_id_idx",
+        "sql": 'SELECT * FROM "Asset" ORDER BY "createdAt" ASC, "id" ASC LIMIT 11',
+        "params": []
+    },
+    {
+        "name": "assets.page_by_type_status",
+        "source": "main.py get_assets",
+        "model": "Asset",
+        "filter": ["type", "status"],
+        "order": ["createdAt", "id"],
+        "index": "Asset_type_status_createdAt_id_idx",
+        "sql": (
+            'SELECT * FROM "Asset" WHERE "type" = $1::"AssetType" AND "status" = $2::"AssetStatus" '
+            'ORDER BY "createdAt" ASC, "id" ASC LIMIT 11'
+        ),
+        "params": ["VEHICLE", "ACTIVE"]
+    },
+    {
+        "name": "assets.page_by_status",
+        "source": "main.py get_assets",
+        "model": "Asset",
+        "filter": ["status"],
+        "order": ["createdAt", "id"],
+        "index": "Asset_status_createdAt_id_idx",
+        "sql": (
+            'SELECT * FROM "Asset" WHERE "status" = $1::"AssetStatus" '
+            'ORDER BY "createdAt" ASC, "id" ASC LIMIT 11'
+        ),
+        "params": ["MAINTENANCE"]
+    },
+    {
+        "name": "assets.count_by_type_status",
+        "source": "asset_queries.py count_assets",
+        "model": "Asset",
+        "filter": ["type", "status"],
+        "order": [],
+        "index": "Asset_type_status_createdAt_id_idx",
+        "sql": 'SELECT COUNT(*) FROM "Asset" WHERE "type" = $1::"AssetType" AND "status" = $2::"AssetStatus"',
+        "params": ["VEHICLE", "ACTIVE"]
+    },
+    {
+        "name": "assets.maintenance_summary",
+        "source": "main.py get_assets (include maintenanceSummary)",
+        "model": "AssetMaintenanceSummary",
+        "filter": ["assetId in page"],
+        "order": [],
+        "index": "AssetMaintenanceSummary_pkey",
+        "sql": 'SELECT * FROM "AssetMaintenanceSummary" WHERE "assetId" = ANY($1::text[])',
+        "params": [":asset_page"]
+    },
+    {
+        "name": "maintenance.page",
+        "source": "maintenance.py get_maintenance_logs, refresh_summary",
+        "model": "MaintenanceLog",
+        "filter": ["assetId"],
+        "order": ["date desc", "id desc"],
+        "index": "MaintenanceLog_assetId_date_idx",
+        "sql": 'SELECT * FROM "MaintenanceLog" WHERE "assetId" = $1 ORDER BY "date" DESC, "id" DESC LIMIT 21',
+        "params": [":asset"]
+    },
+    {
+        "name": "asset.by_id",
+        "source": "main.py get_asset, ai_reports.py load_report_inputs",
+        "model": "Asset",
+        "filter": ["id"],
+        "order": [],
+        "index": "Asset_pkey",
+        "sql": 'SELECT * FROM "Asset" WHERE "id" = $1',
+        "params": [":asset"]
+    },
+    {
+        "name": "asset.maintenance_logs",
+        "source": "main.py get_asset, ai_reports.py load_report_inputs",
+        "model": "MaintenanceLog",
+        "filter": ["assetId"],
+        "order": [],
+        "index": "MaintenanceLog_assetId_date_idx",
+        "sql": 'SELECT * FROM "MaintenanceLog" WHERE "assetId" = $1',
+        "params": [":asset"]
+    },
+    {
+        "name": "asset.financial_plans",
+        "source": "main.py get_asset, ai_reports.py load_report_inputs",
+        "model": "FinancialPlan",
+        "filter": ["assetId"],
+        "order": [],
+        "index": "FinancialPlan_assetId_idx",
+        "sql": 'SELECT * FROM "FinancialPlan" WHERE "assetId" = $1',
+        "params": [":asset"]
+    },
+    {
+        "name": "asset.insurance_details",
+        "source": "main.py get_asset",
+        "model": "InsuranceDetail",
+        "filter": ["assetId"],
+        "order": [],
+        "index": "InsuranceDetail_assetId_idx",
+        "sql": 'SELECT * FROM "InsuranceDetail" WHERE "assetId" = $1',
+        "params": [":asset"]
+    },
+    {
+        "name": "financial_plans.by_year_status",
+        "source": "main.py get_financial_plans",
+        "model": "FinancialPlan",
+        "filter": ["year", "status"],
+        "order": [],
+        "index": "FinancialPlan_year_status_idx",
+        "sql": 'SELECT * FROM "FinancialPlan" WHERE "year" = $1 AND "status" = $2::"PlanStatus"',
+        "params": [":plan_year", "APPROVED"]
+    },
+    {
+        "name": "financial_plans.by_status",
+        "source": "main.py get_financial_plans",
+        "model": "FinancialPlan",
+        "filter": ["status"],
+        "order": [],
+        "index": "FinancialPlan_status_idx",
+        "sql": 'SELECT * FROM "FinancialPlan" WHERE "status" = $1::"PlanStatus"',
+        "params": ["REJECTED"]
+    },
+    {
+        "name": "reports.page",
+        "source": "ai_reports.py get_reports",
+        "model": "ComplianceReport",
+        "filter": [],
+        "order": ["createdAt desc", "id desc"],
+        "index": "ComplianceReport_createdAt_id_idx",
+        "sql": (
+            'SELECT "id", "reportType", "status", "content"->>\'title\' FROM "ComplianceReport" '
+            'ORDER BY "createdAt" DESC, "id" DESC LIMIT 51'
+        ),
+        "params": []
+    },
+    {
+        "name": "reports.page_by_asset",
+        "source": "ai_reports.py get_reports?assetId=",
+        "model": "ComplianceReport",
+        "filter": ["assetId"],
+        "order": ["createdAt desc"],
+        "index": "ComplianceReport_assetId_createdAt_idx",
+        "sql": (
+            'SELECT "id", "reportType", "status" FROM "ComplianceReport" WHERE "assetId" = $1 '
+            'ORDER BY "createdAt" DESC, "id" DESC LIMIT 51'
+        ),
+        "params": [":asset"]
+    },
+    {
+        "name": "reports.by_fingerprint",
+        "source": "ai_reports.py resolve_report_content (report_cache.get)",
+        "model": "ComplianceReport",
+        "filter": ["fingerprint", "status", "createdAt >="],
+        "order": ["createdAt desc"],
+        "index": "ComplianceReport_fingerprint_createdAt_idx",
+        "sql": (
+            'SELECT * FROM "ComplianceReport" WHERE "fingerprint" = $1 AND "status" = \'COMPLETED\' '
+            'AND "createdAt" >= NOW() - INTERVAL \'30 days\' ORDER BY "createdAt" DESC LIMIT 1'
+        ),
+        "params": [":fingerprint"]
+    },
+    {
+        "name": "report.by_id",
+        "source": "ai_reports.py get_report, export_report_pdf, run_report_job",
+        "model": "ComplianceReport",
+        "filter": ["id"],
+        "order": [],
+        "index": "ComplianceReport_pkey",
+        "sql": 'SELECT * FROM "ComplianceReport" WHERE "id" = $1',
+        "params": [":report"]
+    },
+    {
+        "name": "assets.batch_chunk",
+        "source": "report_batch.py generate_report_batch",
+        "model": "Asset",
+        "filter": ["departmentId", "id >"],
+        "order": ["id"],
+        "index": "Asset_departmentId_id_idx",
+        "sql": 'SELECT * FROM "Asset" WHERE "departmentId" = $1 AND "id" > \'\' ORDER BY "id" LIMIT 100',
+        "params": [":department"]
+    },
+    {
+        # One range per covering geohash cell; see spatial.find_near
+        "name": "assets.near",
+        "source": "spatial.py get_assets_near, get_nearest_assets",
+        "model": "Asset",
+        "filter": ["geohash ranges", "latitude", "longitude"],
+        "order": ["distance"],
+        "index": "Asset_geohash_idx",
+        "sql": (
+            'SELECT "id", "latitude", "longitude" FROM "Asset" '
+            'WHERE ("geohash" >= $1 AND "geohash" < $2) AND "latitude" BETWEEN $3 AND $4 '
+            'AND "longitude" BETWEEN $5 AND $6 LIMIT 101'
+        ),
+        "params": [":geohash_low", ":geohash_high", ":min_lat", ":max_lat", ":min_lng", ":max_lng"]
+    },
+    {
+        "name": "user.by_clerk_id",
+        "source": "auth.py get_current_user",
+        "model": "User",
+        "filter": ["clerk_id"],
+        "order": [],
+        "index": "users_clerk_id_key",
+        "sql": 'SELECT * FROM "users" WHERE "clerk_id" = $1',
+        "params": [":clerk_id"]
+    }
+]
+
+
+def shapes_for(index_name: str) -> List[Dict]:
+    """Query shapes an index is declared to serve."""
+    return [shape for shape in QUERY_SHAPES if shape["index"] == index_name]
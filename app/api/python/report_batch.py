@@ -0,0 +1,200 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Tuple
+from datetime import datetime
+import asyncio
+import json
+import os
+from .ai_reports import (
+    AI_MODEL, REPORT_INCLUDE, REPORT_TEMPLATES, generate_report_content, load_maintenance_statistics
+)
+from .auth import check_roles
+from .database import db
+from .models import BatchReportRequest
+from .report_cache import report_cache, report_fingerprint, serialize_asset
+from .response_cache import response_cache
+
+router = APIRouter()
+
+BATCH_CHUNK_SIZE = int(os.getenv("REPORT_BATCH_CHUNK_SIZE", "100"))
+BATCH_CONCURRENCY = int(os.getenv("REPORT_BATCH_CONCURRENCY", "8"))
+
+
+async def _generate_item(
+    semaphore: asyncio.Semaphore,
+    asset_payload: Dict,
+    report_type: str,
+    fingerprint: str
+) -> Tuple[str, Dict]:
+    async with semaphore:
+        try:
+            return fingerprint, {"content": await generate_report_content(asset_payload, report_type)}
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            return fingerprint, {"error": detail}
+
+
+async def _process_chunk(
+    assets: List,
+    statistics: Dict[str, Dict],
+    report_types: List[str],
+    force: bool
+) -> AsyncIterator[Dict]:
+    """
+    Generate every (asset, report type) pair in a chunk and bulk-insert the results.
+
+    `statistics` maps each asset id to its maintenance statistics.
+    """
+    items = []
+    for asset in assets:
+        payload = serialize_asset(asset, statistics[asset.id])
+        for report_type in report_types:
+            fingerprint = report_fingerprint(payload, report_type, REPORT_TEMPLATES[report_type], AI_MODEL)
+            items.append((asset.id, report_type, payload, fingerprint))
+
+    cached = {} if force else await report_cache.get_many([item[3] for item in items])
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    meta = {item[3]: item for item in items}
+    tasks = []
+    generated = []
+    try:
+        for asset_id, report_type, payload, fingerprint in items:
+            if fingerprint in cached:
+                yield {
+                    "asset_id": asset_id,
+                    "report_type": report_type,
+                    "status": "ok",
+                    "report_id": cached[fingerprint]["id"],
+                    "cached": True
+                }
+            else:
+                tasks.append(asyncio.create_task(_generate_item(semaphore, payload, report_type, fingerprint)))
+
+        for next_done in asyncio.as_completed(tasks):
+            fingerprint, result = await next_done
+            asset_id, report_type, _, _ = meta[fingerprint]
+            if "error" in result:
+                yield {
+                    "asset_id": asset_id,
+                    "report_type": report_type,
+                    "status": "error",
+                    "error": result["error"]
+                }
+            else:
+                generated.append((fingerprint, result["content"]))
+    finally:
+        # The client disconnected or stopped iterating: cancel generations nobody will read
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if not generated:
+        return
+
+    now = datetime.now()
+    try:
+        await db.complianceReport.create_many(
+            data=[
+                {
+                    "reportType": meta[fingerprint][1],
+                    "content": content,
+                    "status": "COMPLETED",
+                    "assetId": meta[fingerprint][0],
+                    "fingerprint": fingerprint,
+                    "dueDate": now,
+                    "submissionDate": now
+                }
+                for fingerprint, content in generated
+            ]
+        )
+        # create_many does not return rows; one query recovers the new ids
+        rows = await db.complianceReport.find_many(
+            where={"fingerprint": {"in": [fingerprint for fingerprint, _ in generated]}},
+            order={"createdAt": "asc"}
+        )
+        saved = {row.fingerprint: row for row in rows}
+        await response_cache.invalidate("reports")
+    except Exception as e:
+        for fingerprint, _ in generated:
+            yield {
+                "asset_id": meta[fingerprint][0],
+                "report_type": meta[fingerprint][1],
+                "status": "error",
+                "error": f"Could not save report: {e}"
+            }
+        return
+
+    for fingerprint, content in generated:
+        report = saved[fingerprint]
+        report_cache.put(fingerprint, {
+            "id": report.id,
+            "content": content,
+            "generated_at": report.createdAt
+        })
+        yield {
+            "asset_id": meta[fingerprint][0],
+            "report_type": meta[fingerprint][1],
+            "status": "ok",
+            "report_id": report.id,
+            "cached": False
+        }
+
+
+@router.post("/reports/batch")
+async def generate_report_batch(
+    request: BatchReportRequest,
+    user: dict = Depends(check_roles(["admin", "finance_director"]))
+):
+    """
+    Generate reports for every asset matching a filter, for each requested type.
+
+    Assets are loaded one chunk per query and model calls run with bounded
+    concurrency. Results stream back as NDJSON, one line per (asset, report
+    type), followed by a summary line; one failing asset does not stop the batch.
+    """
+    invalid = [report_type for report_type in request.report_types if report_type not in REPORT_TEMPLATES]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid report types: {', '.join(invalid)}")
+
+    where = {}
+    if request.departmentId:
+        where["departmentId"] = request.departmentId
+    if request.type:
+        where["type"] = request.type
+    if request.status:
+        where["status"] = request.status
+
+    async def results():
+        summary = {"ok": 0, "cached": 0, "error": 0}
+        last_id = None
+        while True:
+            chunk_where = {**where, "id": {"gt": last_id}} if last_id else where
+            try:
+                assets = await db.asset.find_many(
+                    where=chunk_where,
+                    take=BATCH_CHUNK_SIZE,
+                    order={"id": "asc"},
+                    include=REPORT_INCLUDE
+                )
+                statistics = await load_maintenance_statistics([asset.id for asset in assets])
+            except Exception as e:
+                yield json.dumps({"status": "error", "error": f"Could not load assets: {e}"}) + "\n"
+                break
+            if not assets:
+                break
+            last_id = assets[-1].id
+
+            async for item in _process_chunk(assets, statistics, request.report_types, request.force):
+                summary[item["status"]] += 1
+                if item.get("cached"):
+                    summary["cached"] += 1
+                yield json.dumps(item) + "\n"
+
+            if len(assets) < BATCH_CHUNK_SIZE:
+                break
+
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
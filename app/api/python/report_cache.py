@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import os
+from .cache import TTLCache
+from .database import db
+from .prompt_builder import PROMPT_SETTINGS
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "512"))
+# How long a generated report may be reused for unchanged inputs (seconds)
+REPORT_CACHE_MAX_AGE = float(os.getenv("REPORT_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+
+# List relations whose row order is up to the database and must not change the fingerprint
+ORDERED_RELATIONS = ("maintenanceLogs", "financialPlans")
+
+
+def serialize_asset(asset, maintenance_statistics: Optional[Dict] = None) -> Dict:
+    """
+    JSON-safe dict of an asset and its included relations.
+
+    List relations are sorted by id so the same rows always serialize (and
+    fingerprint) the same, whatever order Postgres returned them in.
+    `maintenance_statistics`, when the loader aggregated them, are kept
+    under "maintenanceStatistics".
+    """
+    data = asset.dict() if hasattr(asset, "dict") else dict(asset)
+    payload = json.loads(json.dumps(data, default=str))
+    for relation in ORDERED_RELATIONS:
+        if isinstance(payload.get(relation), list):
+            payload[relation] = sorted(payload[relation], key=lambda row: str(row.get("id", "")))
+    if maintenance_statistics is not None:
+        payload["maintenanceStatistics"] = maintenance_statistics
+    return payload
+
+
+def report_fingerprint(asset_payload: Dict, report_type: str, template: Dict, model: str) -> str:
+    """
+    Deterministic hash of everything that shapes a generated report.
+
+    Keys are sorted so the same asset, relations, template, model and prompt
+    settings always hash the same regardless of dict ordering.
+    """
+    canonical = json.dumps(
+        {
+            "asset": asset_payload,
+            "report_type": report_type,
+            "template": template,
+            "model": model,
+            "prompt": PROMPT_SETTINGS
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ReportCache:
+    """In-memory LRU in front of ComplianceReport rows looked up by fingerprint."""
+
+    def __init__(self, maxsize: int = REPORT_CACHE_SIZE, max_age: float = REPORT_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self.memory = TTLCache(maxsize=maxsize, ttl=max_age)
+        self.db_hits = 0
+
+    async def get(self, fingerprint: str) -> Optional[Dict]:
+        entry = self.memory.get(fingerprint)
+        if entry is not None:
+            return entry
+
+        report = await db.complianceReport.find_first(
+            where={
+                "fingerprint": fingerprint,
+                "status": "COMPLETED",
+                "createdAt": {"gte": datetime.now(timezone.utc) - timedelta(seconds=self.max_age)}
+            },
+            order={"createdAt": "desc"}
+        )
+        if not report:
+            return None
+
+        self.db_hits += 1
+        return self._remember(fingerprint, report)
+
+    def _remember(self, fingerprint: str, report) -> Dict:
+        """Cache a report row for the rest of its max_age."""
+        entry = {
+            "id": report.id,
+            "content": report.content,
+            "generated_at": report.createdAt
+        }
+        created = report.createdAt if report.createdAt.tzinfo else report.createdAt.replace(tzinfo=timezone.utc)
+        age = (datetime.now(timezone.utc) - created).total_seconds()
+        self.memory.set(fingerprint, entry, ttl=self.max_age - age)
+        return entry
+
+    async def get_many(self, fingerprints: List[str]) -> Dict[str, Dict]:
+        """Look up many fingerprints with at most one database query."""
+        found = {}
+        missing = []
+        for fingerprint in fingerprints:
+            entry = self.memory.get(fingerprint)
+            if entry is not None:
+                found[fingerprint] = entry
+            else:
+                missing.append(fingerprint)
+        if not missing:
+            return found
+
+        reports = await db.complianceReport.find_many(
+            where={
+                "fingerprint": {"in": missing},
+                "status": "COMPLETED",
+                "createdAt": {"gte": datetime.now(timezone.utc) - timedelta(seconds=self.max_age)}
+            },
+            order={"createdAt": "asc"}
+        )
+        # Ascending order so the newest report per fingerprint wins
+        latest = {report.fingerprint: report for report in reports}
+        for fingerprint, report in latest.items():
+            self.db_hits += 1
+            found[fingerprint] = self._remember(fingerprint, report)
+        return found
+
+    def put(self, fingerprint: str, entry: Dict):
+        self.memory.set(fingerprint, entry)
+
+    def stats(self) -> Dict:
+        return {**self.memory.stats(), "db_hits": self.db_hits}
+
+
+report_cache = ReportCache()
@@ -0,0 +1,105 @@
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from .database import db
+from .pagination import decode_cursor, encode_cursor
+
+# Columns a report listing may project. "title" is pulled out of the content
+# JSON so list views never transfer the content itself.
+REPORT_LIST_COLUMNS = {
+    "id": '"id"',
+    "reportType": '"reportType"',
+    "status": '"status"::text',
+    "assetId": '"assetId"',
+    "title": '"content"->>\'title\'',
+    "dueDate": '"dueDate"',
+    "submissionDate": '"submissionDate"',
+    "findings": '"findings"',
+    "recommendations": '"recommendations"',
+    "pdfUrl": '"pdfUrl"',
+    "createdAt": '"createdAt"',
+    "updatedAt": '"updatedAt"'
+}
+
+DEFAULT_REPORT_FIELDS = [
+    "id", "reportType", "status", "assetId", "title",
+    "dueDate", "submissionDate", "pdfUrl", "createdAt", "updatedAt"
+]
+
+
+def _utc(value: datetime) -> str:
+    """Prisma stores DateTime as UTC in `timestamp` columns; naive values are taken as UTC already."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Comma-separated field list -> validated projection; id and createdAt are always kept for paging."""
+    if not fields:
+        return list(DEFAULT_REPORT_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in REPORT_LIST_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown report fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(["id", *requested, "createdAt"]))
+
+
+async def fetch_report_page(
+    fields: Sequence[str],
+    take: int,
+    cursor: Optional[str] = None,
+    order: str = "desc",
+    asset_id: Optional[str] = None,
+    report_type: Optional[str] = None,
+    status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+) -> Dict:
+    """
+    One keyset page of reports, newest first by default.
+
+    Only the projected columns are read, and (createdAt, id) row comparison
+    lets Postgres walk the createdAt index from the cursor position.
+    """
+    conditions = []
+    params: List = []
+
+    def param(value, cast: str = "") -> str:
+        params.append(value)
+        return f"${len(params)}{cast}"
+
+    if asset_id:
+        conditions.append(f'"assetId" = {param(asset_id)}')
+    if report_type:
+        conditions.append(f'"reportType" = {param(report_type)}')
+    if status:
+        placeholder = param(status, '::"ReportStatus"')
+        conditions.append(f'"status" = {placeholder}')
+    if created_after:
+        conditions.append(f'"createdAt" >= {param(_utc(created_after), "::timestamp")}')
+    if created_before:
+        conditions.append(f'"createdAt" < {param(_utc(created_before), "::timestamp")}')
+    if cursor:
+        created_at, id = decode_cursor(cursor, "createdAt")
+        if isinstance(created_at, datetime):
+            created_at = _utc(created_at)
+        op = "<" if order == "desc" else ">"
+        conditions.append(
+            f'("createdAt", "id") {op} ({param(created_at, "::timestamp")}, {param(id)})'
+        )
+
+    columns = ", ".join(f'{REPORT_LIST_COLUMNS[field]} AS "{field}"' for field in fields)
+    where = f'WHERE {" AND ".join(conditions)}' if conditions else ""
+    direction = "DESC" if order == "desc" else "ASC"
+    rows = await db.query_raw(
+        f'SELECT {columns} FROM "ComplianceReport" {where} '
+        f'ORDER BY "createdAt" {direction}, "id" {direction} LIMIT {int(take) + 1}',
+        *params
+    )
+
+    next_cursor = None
+    if len(rows) > take:
+        last = rows[take - 1]
+        next_cursor = encode_cursor("createdAt", last["createdAt"], last["id"])
+    return {"items": rows[:take], "next_cursor": next_cursor}
@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional
+import json
+
+
+class SectionStreamParser:
+    """
+    Incrementally pulls completed `{heading, content}` objects out of the
+    report's top-level "sections" array while the JSON is still arriving.
+
+    Only string, bracket and key tracking is done per character; each section
+    is decoded with json.loads once its closing brace arrives.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._sections_depth: Optional[int] = None
+        self._section_start: Optional[int] = None
+        self.title: Optional[str] = None
+        self.sections: List[Dict] = []
+        # Set by result(): False when it had to fall back to the sections seen
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Add text and return any sections completed by it."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                    if self._pending_key == "title" and len(self._stack) == 1:
+                        self.title = json.loads(text[self._string_start:i + 1])
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                self._pending_key = self._last_string
+            elif c == ",":
+                self._pending_key = None
+            elif c == "[":
+                self._stack.append(c)
+                # "sections" must be a key of the root object
+                if self._sections_depth is None and self._pending_key == "sections" and len(self._stack) == 2:
+                    self._sections_depth = len(self._stack)
+            elif c == "{":
+                self._stack.append(c)
+                self._pending_key = None
+                if self._sections_depth is not None and len(self._stack) == self._sections_depth + 1:
+                    self._section_start = i
+            elif c == "}":
+                if (
+                    self._sections_depth is not None
+                    and len(self._stack) == self._sections_depth + 1
+                    and self._section_start is not None
+                ):
+                    section = json.loads(text[self._section_start:i + 1])
+                    self._section_start = None
+                    self.sections.append(section)
+                    completed.append(section)
+                if self._stack:
+                    self._stack.pop()
+            elif c == "]":
+                if self._sections_depth is not None and len(self._stack) == self._sections_depth:
+                    self._sections_depth = -1  # sections array closed
+                if self._stack:
+                    self._stack.pop()
+        self._pos = len(text)
+        return completed
+
+    def result(self) -> Dict:
+        """
+        The full report; falls back to the sections seen if the JSON is
+        incomplete, and leaves `complete` False then.
+        """
+        start = self.text.find("{")
+        end = self.text.rfind("}")
+        try:
+            report = json.loads(self.text[start:end + 1])
+        except ValueError:
+            self.complete = False
+            return {"title": self.title or "Report", "sections": self.sections}
+        self.complete = True
+        return report
+
+
+class StreamMetrics:
+    """Time-to-first-section and total duration of streamed generations."""
+
+    def __init__(self):
+        self.streams = 0
+        self.first_section_total = 0.0
+        self.first_section_max = 0.0
+        self.duration_total = 0.0
+
+    def record(self, first_section: Optional[float], duration: float):
+        self.streams += 1
+        self.duration_total += duration
+        if first_section is not None:
+            self.first_section_total += first_section
+            self.first_section_max = max(self.first_section_max, first_section)
+
+    def stats(self) -> Dict:
+        return {
+            "streams": self.streams,
+            "avg_time_to_first_section_seconds": self.first_section_total / self.streams if self.streams else 0.0,
+            "max_time_to_first_section_seconds": self.first_section_max,
+            "avg_duration_seconds": self.duration_total / self.streams if self.streams else 0.0
+        }
+
+
+stream_metrics = StreamMetrics()
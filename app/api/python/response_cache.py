@@ -0,0 +1,206 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+from fastapi import Request, Response
+from .cache import TTLCache
+from .metrics import span
+from .serialization import dumps
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_MAX_TTL = float(os.getenv("RESPONSE_CACHE_MAX_TTL", "300"))
+
+# Seconds each route's responses may be served from cache
+ROUTE_TTLS = {
+    "asset": float(os.getenv("RESPONSE_CACHE_TTL_ASSET", "60")),
+    "financial_plans": float(os.getenv("RESPONSE_CACHE_TTL_FINANCIAL_PLANS", "30")),
+    "reports": float(os.getenv("RESPONSE_CACHE_TTL_REPORTS", "30")),
+    "report": float(os.getenv("RESPONSE_CACHE_TTL_REPORT", "300"))
+}
+
+
+class MemoryBackend:
+    """In-process LRU entries with tag versions held in a plain dict."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, max_ttl: float = RESPONSE_CACHE_MAX_TTL):
+        self.entries = TTLCache(maxsize=maxsize, ttl=max_ttl)
+        self.versions: Dict[str, int] = {}
+
+    async def tag_versions(self, tags: Sequence[str]) -> List[int]:
+        return [self.versions.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: Sequence[str]):
+        for tag in tags:
+            self.versions[tag] = self.versions.get(tag, 0) + 1
+
+    async def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, entry: Tuple[str, bytes], ttl: float):
+        self.entries.set(key, entry, ttl)
+
+    async def close(self):
+        self.entries.clear()
+
+
+class RedisBackend:
+    """
+    Entries in a Redis-compatible server shared by every worker process.
+
+    Tag versions are INCR counters, so invalidation in one worker is seen by
+    all of them.
+    """
+
+    prefix = "response-cache"
+
+    def __init__(self, url: str = RESPONSE_CACHE_REDIS_URL):
+        # Imported lazily: redis is only needed when this backend is configured
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+
+    async def tag_versions(self, tags: Sequence[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self.client.mget([f"{self.prefix}:tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, tags: Sequence[str]):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{self.prefix}:tag:{tag}")
+            await pipe.execute()
+
+    async def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        value = await self.client.get(f"{self.prefix}:entry:{key}")
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body
+
+    async def set(self, key: str, entry: Tuple[str, bytes], ttl: float):
+        etag, body = entry
+        await self.client.set(f"{self.prefix}:entry:{key}", etag.encode() + b"\n" + body, px=int(ttl * 1000))
+
+    async def close(self):
+        await self.client.close()
+
+
+class ResponseCache:
+    """
+    Cached JSON bodies for read-heavy GET routes.
+
+    Keys combine the route, its parameters, the caller's role and the current
+    version of every tag the response depends on. Invalidating a tag bumps
+    its version, so stale entries are never read again and age out of the
+    backend on their own.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.not_modified = 0
+        self.errors = 0
+
+    async def _key(self, route: str, params: Dict, role: str, tags: Sequence[str]) -> str:
+        try:
+            versions = await self.backend.tag_versions(tags)
+        except Exception:
+            self.errors += 1
+            versions = None
+        if versions is None:
+            return ""
+        material = json.dumps([route, role, params, list(zip(tags, versions))], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def respond(
+        self,
+        request: Request,
+        route: str,
+        params: Dict,
+        user: Dict,
+        tags: Sequence[str],
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Serve from cache, or call `loader` and cache its result for the route's TTL."""
+        key = await self._key(route, params, user["role"], tags)
+        entry = None
+        if key:
+            try:
+                entry = await self.backend.get(key)
+            except Exception:
+                self.errors += 1
+
+        if entry is not None:
+            self.hits[route] = self.hits.get(route, 0) + 1
+            etag, body = entry
+            status = "HIT"
+        else:
+            self.misses[route] = self.misses.get(route, 0) + 1
+            value = await loader()
+            with span("serialize"):
+                body = dumps(value)
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            status = "MISS"
+            if key:
+                try:
+                    await self.backend.set(key, (etag, body), ROUTE_TTLS.get(route, RESPONSE_CACHE_MAX_TTL))
+                except Exception:
+                    self.errors += 1
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "X-Cache": status}
+        if_none_match = request.headers.get("if-none-match", "")
+        # Weak comparison: compression marks the ETag weak on the way out
+        if etag in [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *tags: str):
+        try:
+            await self.backend.bump(tags)
+        except Exception:
+            # Entries still expire on their TTL if the backend is unreachable
+            self.errors += 1
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict:
+        routes = {}
+        for route in sorted(set(self.hits) | set(self.misses)):
+            hits = self.hits.get(route, 0)
+            lookups = hits + self.misses.get(route, 0)
+            routes[route] = {
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_ratio": hits / lookups if lookups else 0.0
+            }
+        hits = sum(self.hits.values())
+        lookups = hits + sum(self.misses.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "routes": routes
+        }
+
+
+def _backend():
+    if RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            return RedisBackend()
+        except ImportError as e:
+            # Not falling back to memory: workers would silently stop sharing invalidations
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=redis needs the redis package (see requirements.txt)"
+            ) from e
+    if RESPONSE_CACHE_BACKEND != "memory":
+        raise RuntimeError(f"Unknown RESPONSE_CACHE_BACKEND {RESPONSE_CACHE_BACKEND!r}; use memory or redis")
+    return MemoryBackend()
+
+
+response_cache = ResponseCache(_backend())
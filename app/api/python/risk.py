@@ -0,0 +1,309 @@
+"""
+Monte Carlo failure simulation for replacement planning.
+
+Each asset's time to failure is drawn from a Weibull distribution whose
+mean is its remaining life scaled by condition (worse condition, sooner
+and less predictable failure). A failed asset is replaced at inflated
+cost and its replacement starts a new life drawn the same way, so short
+lifespans can fail more than once in the horizon. Maintenance drops to
+the EXCELLENT factor once the original asset is replaced.
+
+Trials are vectorized per block of assets and blocks run in a process
+pool. Every block draws from its own SeedSequence child, and block
+results are added up in block order, so results depend only on the
+seed, not on how many workers ran them.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, List, Optional
+import asyncio
+import math
+import os
+import numpy as np
+from .metrics import span
+from .projections import CONDITIONS, DEFAULT_INFLATION_RATE, MAINTENANCE_FACTORS, AssetColumns
+
+RISK_SIMULATION_TRIALS = int(os.getenv("RISK_SIMULATION_TRIALS", "10000"))
+RISK_SIMULATION_SEED = int(os.getenv("RISK_SIMULATION_SEED", "20240601"))
+RISK_SIMULATION_WORKERS = int(os.getenv("RISK_SIMULATION_WORKERS") or os.cpu_count() or 2)
+RISK_HORIZON_YEARS = int(os.getenv("RISK_HORIZON_YEARS", "5"))
+
+# Assets per pool task, and per vectorized (trials x assets) draw inside it
+BLOCK_SIZE = 4096
+SUBBLOCK_SIZE = 128
+
+# Mean remaining life as a share of (lifespan - age), by condition
+LIFE_FACTORS = {"EXCELLENT": 1.25, "GOOD": 1.0, "FAIR": 0.75, "POOR": 0.5, "CRITICAL": 0.25}
+# Floor on mean remaining life, as a share of lifespan, for assets at or past it
+RESIDUAL_LIFE = {"EXCELLENT": 0.2, "GOOD": 0.1, "FAIR": 0.05, "POOR": 0.02, "CRITICAL": 0.01}
+# Never expect failure sooner than this many years (guards zero lifespans)
+MIN_MEAN_LIFE = 0.1
+# Weibull shape: higher is more tightly clustered around the mean
+WEIBULL_SHAPES = {"EXCELLENT": 4.0, "GOOD": 3.5, "FAIR": 3.0, "POOR": 2.5, "CRITICAL": 2.0}
+NEW_ASSET_SHAPE = WEIBULL_SHAPES["EXCELLENT"]
+
+# Upper bounds on P(failure within RISK_HORIZON_YEARS) for each RiskLevel
+RISK_THRESHOLDS = (("LOW", 0.2), ("MEDIUM", 0.5), ("HIGH", 0.8), ("CRITICAL", 1.0))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _by_condition(table: Dict[str, float]) -> np.ndarray:
+    return np.array([table[name] for name in CONDITIONS], dtype=np.float64)
+
+
+def weibull_parameters(age: np.ndarray, lifespan: np.ndarray, condition: np.ndarray):
+    """(scale, shape) of each asset's time-to-failure distribution, in years."""
+    lifespan = np.asarray(lifespan, dtype=np.float64)
+    remaining = np.maximum(lifespan - np.asarray(age, dtype=np.float64), 0.0)
+    mean = np.maximum.reduce([
+        remaining * _by_condition(LIFE_FACTORS)[condition],
+        lifespan * _by_condition(RESIDUAL_LIFE)[condition],
+        np.full(remaining.shape, MIN_MEAN_LIFE)
+    ])
+    shape = _by_condition(WEIBULL_SHAPES)[condition]
+    gamma = np.array([math.gamma(1 + 1 / k) for k in shape], dtype=np.float64)
+    return mean / gamma, shape
+
+
+def failure_probability(age, lifespan, condition, within_years: float = RISK_HORIZON_YEARS) -> np.ndarray:
+    """P(failure within `within_years`): the Weibull CDF the simulation samples from."""
+    scale, shape = weibull_parameters(age, lifespan, condition)
+    return _weibull_cdf(within_years, scale, shape)
+
+
+def risk_level(probability: float) -> str:
+    for level, bound in RISK_THRESHOLDS:
+        if probability < bound:
+            return level
+    return RISK_THRESHOLDS[-1][0]
+
+
+def assess_risk(assets: Iterable, year: int) -> List[str]:
+    """RiskLevel for each asset (anything with purchaseDate, expectedLifespan, condition)."""
+    assets = list(assets)
+    condition_index = {name: i for i, name in enumerate(CONDITIONS)}
+    probability = failure_probability(
+        np.array([year - asset.purchaseDate.year for asset in assets], dtype=np.float64),
+        np.array([asset.expectedLifespan for asset in assets], dtype=np.float64),
+        np.array([condition_index[getattr(asset.condition, "value", asset.condition)] for asset in assets], dtype=np.int64)
+    )
+    return [risk_level(p) for p in probability.tolist()]
+
+
+def _weibull_cdf(t, scale: np.ndarray, shape: np.ndarray) -> np.ndarray:
+    return 1.0 - np.exp(-np.power(t / scale, shape))
+
+
+def _weibull_inverse(u: np.ndarray, scale: np.ndarray, inverse_shape) -> np.ndarray:
+    return scale * np.power(-np.log1p(-u), inverse_shape)
+
+
+def simulate_block(
+    value: np.ndarray,
+    age: np.ndarray,
+    lifespan: np.ndarray,
+    condition: np.ndarray,
+    years: int,
+    trials: int,
+    inflation_rate: float,
+    maintenance_factors: np.ndarray,
+    seed: np.random.SeedSequence
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate one block of assets.
+
+    Returns per-trial, per-year replacement spend, maintenance savings from
+    replaced assets and replacement counts, each trials x years.
+
+    Failure times come from inverse-CDF sampling of uniform draws. A draw
+    above the asset's CDF at `years` cannot fail inside the projection, so
+    times (and renewals) are only computed for the draws that do.
+    """
+    growth = (1 + inflation_rate) ** np.arange(years, dtype=np.float64)
+    replacement = np.zeros(trials * years)
+    savings = np.zeros(trials * years)
+    failures = np.zeros(trials * years)
+
+    new_factor = maintenance_factors[CONDITIONS.index("EXCELLENT")]
+    starts = range(0, len(value), SUBBLOCK_SIZE)
+    for start, child in zip(starts, seed.spawn(len(starts))):
+        rng = np.random.default_rng(child)
+        end = min(start + SUBBLOCK_SIZE, len(value))
+        width = end - start
+        block_value = value[start:end]
+        block_saving = block_value * (maintenance_factors[condition[start:end]] - new_factor)
+        scale, shape = weibull_parameters(age[start:end], lifespan[start:end], condition[start:end])
+        # Sampling runs in float32, which is ample for times in years and twice as fast
+        scale32, inverse_shape32 = scale.astype(np.float32), (1.0 / shape).astype(np.float32)
+        # Floored like weibull_parameters: a zero lifespan would renew forever without advancing time
+        new_scale32 = (
+            np.maximum(lifespan[start:end], MIN_MEAN_LIFE) / math.gamma(1 + 1 / NEW_ASSET_SHAPE)
+        ).astype(np.float32)
+        new_inverse_shape32 = np.float32(1.0 / NEW_ASSET_SHAPE)
+
+        # (trials x assets) uniform draws; each maps to one first-failure time
+        draws = rng.random((trials, width), dtype=np.float32)
+
+        # Flat indices of the draws that fail inside the projection
+        failing = np.flatnonzero(draws < _weibull_cdf(float(years), scale, shape))
+        trial = failing // width
+        asset = failing - trial * width
+        failure_at = _weibull_inverse(draws.ravel()[failing], scale32[asset], inverse_shape32[asset])
+        # Rounding can land a draw at the CDF boundary exactly on `years`
+        offset = np.minimum(failure_at.astype(np.int64), years - 1)
+        savings += np.bincount(trial * years + offset, weights=block_saving[asset], minlength=trials * years)
+
+        # Replace at each failure inside the horizon, then draw the replacement's life
+        while trial.size:
+            slot = trial * years + offset
+            replacement += np.bincount(slot, weights=block_value[asset] * growth[offset], minlength=trials * years)
+            failures += np.bincount(slot, minlength=trials * years)
+            failure_at += _weibull_inverse(
+                rng.random(trial.size, dtype=np.float32), new_scale32[asset], new_inverse_shape32
+            )
+            still = failure_at < years
+            trial, asset, failure_at = trial[still], asset[still], failure_at[still]
+            offset = failure_at.astype(np.int64)
+
+    return {
+        "replacement": replacement.reshape(trials, years),
+        "savings": savings.reshape(trials, years),
+        "failures": failures.reshape(trials, years)
+    }
+
+
+def _bands(samples: np.ndarray) -> Dict[str, List[float]]:
+    p10, p50, p90 = np.percentile(samples, [10, 50, 90], axis=0)
+    return {"mean": samples.mean(axis=0).tolist(), "p10": p10.tolist(), "p50": p50.tolist(), "p90": p90.tolist()}
+
+
+def _empty_totals(years: int, trials: int) -> Dict[str, np.ndarray]:
+    return {name: np.zeros((trials, years)) for name in ("replacement", "savings", "failures")}
+
+
+def _add_block(totals: Dict[str, np.ndarray], block: Dict[str, np.ndarray]):
+    for name, total in totals.items():
+        total += block[name]
+
+
+def summarize(
+    columns: AssetColumns,
+    totals: Dict[str, np.ndarray],
+    start_year: int,
+    years: int,
+    trials: int,
+    maintenance_factors: np.ndarray,
+    top: int = 20
+) -> Dict:
+    """Turn the blocks' summed results into yearly budget bands and the riskiest assets."""
+    replacement, savings, failures = totals["replacement"], totals["savings"], totals["failures"]
+    # Exact P(failure within the risk horizon) under the sampled distributions
+    probability = failure_probability(start_year - columns.purchase_year, columns.lifespan, columns.condition)
+
+    base_maintenance = float(columns.value @ maintenance_factors[columns.condition]) if len(columns) else 0.0
+    maintenance = base_maintenance - np.cumsum(savings, axis=1)
+    total = maintenance + replacement
+    bands = {name: _bands(samples) for name, samples in (
+        ("total", total), ("maintenance", maintenance), ("replacement", replacement)
+    )}
+    expected_failures = failures.mean(axis=0)
+
+    projections = []
+    for offset in range(years):
+        projections.append({
+            "year": start_year + offset,
+            **{
+                f"{name}_{stat}": band[stat][offset]
+                for name, band in bands.items() for stat in ("mean", "p10", "p50", "p90")
+            },
+            "expected_replacements": float(expected_failures[offset])
+        })
+
+    riskiest = np.argsort(-probability, kind="stable")[:top]
+    return {
+        "projections": projections,
+        "riskiest_assets": [
+            {
+                "id": columns.ids[i],
+                "name": columns.names[i],
+                "failure_probability": float(probability[i]),
+                "risk_level": risk_level(float(probability[i]))
+            }
+            for i in riskiest.tolist()
+        ]
+    }
+
+
+def _block_arguments(columns: AssetColumns, start_year: int, years: int, trials: int, seed: int,
+                     inflation_rate: float, factors: np.ndarray):
+    starts = range(0, len(columns), BLOCK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    age = (start_year - columns.purchase_year).astype(np.float64)
+    for start, block_seed in zip(starts, seeds):
+        end = start + BLOCK_SIZE
+        yield (
+            columns.value[start:end], age[start:end], columns.lifespan[start:end], columns.condition[start:end],
+            years, trials, inflation_rate, factors, block_seed
+        )
+
+
+def simulate_portfolio(
+    columns: AssetColumns,
+    start_year: int,
+    years: int,
+    trials: int = RISK_SIMULATION_TRIALS,
+    seed: int = RISK_SIMULATION_SEED,
+    inflation_rate: float = DEFAULT_INFLATION_RATE,
+    maintenance_factors: Optional[Dict[str, float]] = None
+) -> Dict:
+    """Run the simulation in-process (tests, scripts)."""
+    factors = _by_condition({**MAINTENANCE_FACTORS, **(maintenance_factors or {})})
+    totals = _empty_totals(years, trials)
+    for arguments in _block_arguments(columns, start_year, years, trials, seed, inflation_rate, factors):
+        _add_block(totals, simulate_block(*arguments))
+    return summarize(columns, totals, start_year, years, trials, factors)
+
+
+async def run_simulation(
+    columns: AssetColumns,
+    start_year: int,
+    years: int,
+    trials: int = RISK_SIMULATION_TRIALS,
+    seed: int = RISK_SIMULATION_SEED,
+    inflation_rate: float = DEFAULT_INFLATION_RATE,
+    maintenance_factors: Optional[Dict[str, float]] = None
+) -> Dict:
+    """
+    Run the blocks in the process pool; same result as simulate_portfolio.
+
+    Each block returns three trials x years arrays, so only twice as many
+    blocks as workers are in flight; the oldest is added to the totals
+    before another is submitted.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=RISK_SIMULATION_WORKERS)
+    factors = _by_condition({**MAINTENANCE_FACTORS, **(maintenance_factors or {})})
+    loop = asyncio.get_running_loop()
+    totals = _empty_totals(years, trials)
+    in_flight: Deque[asyncio.Future] = deque()
+    with span("risk.simulate"):
+        try:
+            for arguments in _block_arguments(columns, start_year, years, trials, seed, inflation_rate, factors):
+                if len(in_flight) >= 2 * RISK_SIMULATION_WORKERS:
+                    _add_block(totals, await in_flight.popleft())
+                in_flight.append(loop.run_in_executor(_executor, simulate_block, *arguments))
+            while in_flight:
+                _add_block(totals, await in_flight.popleft())
+        finally:
+            for future in in_flight:
+                future.cancel()
+        return summarize(columns, totals, start_year, years, trials, factors)
+
+
+def shutdown_simulator():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
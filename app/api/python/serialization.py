@@ -0,0 +1,79 @@
+"""
+Fast JSON encoding for API responses.
+
+`lean` copies only the fields a response schema declares out of Prisma
+objects, and `dumps` encodes the result with orjson, which handles
+datetimes, enums and NumPy values natively. Together they replace
+FastAPI's jsonable_encoder + json.dumps path for the large listings.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Type, get_args
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import orjson
+from .metrics import span
+
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any):
+    # Prisma models are pydantic models; anything lean() did not project
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=DUMPS_OPTIONS)
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    """The BaseModel inside Optional[...] / List[...], if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        nested = _nested_model(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+@lru_cache(maxsize=None)
+def _plan(schema: Type[BaseModel]) -> Tuple[Tuple[str, Optional[Type[BaseModel]]], ...]:
+    """(field name, nested schema or None) for every field of `schema`."""
+    fields = getattr(schema, "model_fields", None) or schema.__fields__
+    return tuple((name, _nested_model(field.annotation)) for name, field in fields.items())
+
+
+def lean(schema: Type[BaseModel], value: Any) -> Any:
+    """
+    Project a Prisma object (or dict, or list of either) onto `schema`'s fields.
+
+    Values are copied without re-validation: they come from the database
+    already typed, and pydantic validation would cost more than the
+    serialization it feeds.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [lean(schema, item) for item in value]
+    get = value.get if isinstance(value, dict) else lambda name: getattr(value, name, None)
+    projected = {}
+    for name, nested in _plan(schema):
+        field_value = get(name)
+        projected[name] = lean(nested, field_value) if nested is not None else field_value
+    return projected
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson; the encode time is recorded as the "serialize" stage."""
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
+
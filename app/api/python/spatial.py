@@ -0,0 +1,252 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+from .auth import check_roles
+from .database import db, PoolTimeoutError
+from .geohash import EARTH_RADIUS_M, Box, cover, radius_boxes, spatial_fields, split_box
+from .models import AssetType, AssetStatus
+
+router = APIRouter()
+
+GEOHASH_BACKFILL_CHUNK = 5000
+# Beyond this a nearest-neighbour search covers the whole globe anyway
+MAX_SEARCH_RADIUS_M = 20_100_000
+
+SPATIAL_COLUMNS = (
+    '"id", "name", "type", "status", "location", "condition", "value", "departmentId", "latitude", "longitude"'
+)
+
+# Great-circle distance in metres from the point bound to $1 (lat), $2 (lng)
+DISTANCE_SQL = (
+    f'2 * {EARTH_RADIUS_M} * ASIN(LEAST(1, SQRT('
+    'POWER(SIN(RADIANS("latitude" - $1::float8) / 2), 2) + '
+    'COS(RADIANS($1::float8)) * COS(RADIANS("latitude")) * '
+    'POWER(SIN(RADIANS("longitude" - $2::float8) / 2), 2))))'
+)
+
+BACKFILL_SQL = '''
+UPDATE "Asset" AS asset
+SET "latitude" = v.lat, "longitude" = v.lng, "geohash" = v.geohash
+FROM unnest($1::text[], $2::float8[], $3::float8[], $4::int8[]) AS v(id, lat, lng, geohash)
+WHERE asset."id" = v.id
+'''
+
+
+def _area_sql(boxes: List[Box]) -> str:
+    """
+    Index ranges plus the exact box test for `boxes`.
+
+    Only numbers computed here are inlined; caller input goes through
+    query parameters.
+    """
+    ranges = " OR ".join(f'("geohash" >= {start} AND "geohash" < {end})' for start, end in cover(boxes))
+    exact = " OR ".join(
+        f'("latitude" BETWEEN {float(min_lat)!r} AND {float(max_lat)!r} '
+        f'AND "longitude" BETWEEN {float(min_lng)!r} AND {float(max_lng)!r})'
+        for min_lat, min_lng, max_lat, max_lng in boxes
+    )
+    return f"({ranges}) AND ({exact})"
+
+
+def _filter_sql(params: List, type: Optional[AssetType], status: Optional[AssetStatus], department_id: Optional[str]) -> str:
+    conditions = []
+    if type:
+        params.append(type.value)
+        conditions.append(f'"type" = ${len(params)}::"AssetType"')
+    if status:
+        params.append(status.value)
+        conditions.append(f'"status" = ${len(params)}::"AssetStatus"')
+    if department_id:
+        params.append(department_id)
+        conditions.append(f'"departmentId" = ${len(params)}')
+    return "".join(f" AND {condition}" for condition in conditions)
+
+
+async def find_near(
+    lat: float,
+    lng: float,
+    radius_m: float,
+    take: int,
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    department_id: Optional[str] = None
+) -> List[Dict]:
+    """Assets within `radius_m` of a point, nearest first, with distance_m."""
+    params: List = [lat, lng, radius_m]
+    filters = _filter_sql(params, type, status, department_id)
+    return await db.query_raw(
+        f'SELECT * FROM (SELECT {SPATIAL_COLUMNS}, {DISTANCE_SQL} AS "distance_m" FROM "Asset" '
+        f'WHERE {_area_sql(radius_boxes(lat, lng, radius_m))}{filters}) AS candidates '
+        f'WHERE "distance_m" <= $3::float8 ORDER BY "distance_m", "id" LIMIT {int(take)}',
+        *params
+    )
+
+
+async def find_within(
+    box: Box,
+    take: int,
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    department_id: Optional[str] = None
+) -> List[Dict]:
+    """Assets inside a bounding box (which may cross the antimeridian), by id."""
+    params: List = []
+    filters = _filter_sql(params, type, status, department_id)
+    return await db.query_raw(
+        f'SELECT {SPATIAL_COLUMNS} FROM "Asset" WHERE {_area_sql(split_box(*box))}{filters} '
+        f'ORDER BY "id" LIMIT {int(take)}',
+        *params
+    )
+
+
+async def find_nearest(
+    lat: float,
+    lng: float,
+    k: int,
+    initial_radius_m: float = 1000.0,
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    department_id: Optional[str] = None
+) -> List[Dict]:
+    """
+    The `k` assets nearest a point.
+
+    Searches a growing radius until it holds k assets: everything inside
+    the radius has been seen, so the k closest of them are exact.
+    """
+    radius = initial_radius_m
+    while True:
+        rows = await find_near(lat, lng, radius, k, type, status, department_id)
+        if len(rows) >= k or radius >= MAX_SEARCH_RADIUS_M:
+            return rows
+        radius = min(radius * 4, MAX_SEARCH_RADIUS_M)
+
+
+async def backfill_geohashes(chunk_size: int = GEOHASH_BACKFILL_CHUNK) -> int:
+    """
+    Recompute latitude/longitude/geohash from coordinates for every asset.
+
+    Needed once for assets created before the columns existed, and after
+    any write that changes coordinates outside the API. Returns the number
+    of rows whose spatial columns changed.
+    """
+    changed = 0
+    last_id = ""
+    while True:
+        rows = await db.query_raw(
+            'SELECT "id", "coordinates", "latitude", "longitude", "geohash" FROM "Asset" '
+            'WHERE "id" > $1 ORDER BY "id" LIMIT $2',
+            last_id,
+            chunk_size
+        )
+        if not rows:
+            return changed
+        updates: Tuple[List, List, List, List] = ([], [], [], [])
+        for row in rows:
+            coordinates = row["coordinates"]
+            if isinstance(coordinates, str):
+                coordinates = json.loads(coordinates)
+            fields = spatial_fields(coordinates)
+            current = (row["latitude"], row["longitude"], None if row["geohash"] is None else int(row["geohash"]))
+            if current != (fields["latitude"], fields["longitude"], fields["geohash"]):
+                for column, value in zip(updates, (row["id"], fields["latitude"], fields["longitude"], fields["geohash"])):
+                    column.append(value)
+        if updates[0]:
+            changed += await db.execute_raw(BACKFILL_SQL, *updates)
+        if len(rows) < chunk_size:
+            return changed
+        last_id = rows[-1]["id"]
+
+
+@router.get("/assets/near")
+async def get_assets_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(..., gt=0, le=100_000),
+    take: int = Query(100, ge=1, le=1000),
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    departmentId: Optional[str] = None,
+    user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
+):
+    """Assets within `radius_m` metres of a point, nearest first."""
+    try:
+        items = await find_near(lat, lng, radius_m, take + 1, type, status, departmentId)
+        return {"items": items[:take], "truncated": len(items) > take}
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/assets/within")
+async def get_assets_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    take: int = Query(500, ge=1, le=5000),
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    departmentId: Optional[str] = None,
+    user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
+):
+    """
+    Assets inside a bounding box.
+
+    A box with min_lng greater than max_lng crosses the antimeridian.
+    """
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not exceed max_lat")
+    try:
+        items = await find_within((min_lat, min_lng, max_lat, max_lng), take + 1, type, status, departmentId)
+        return {"items": items[:take], "truncated": len(items) > take}
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/assets/nearest")
+async def get_nearest_assets(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100),
+    type: Optional[AssetType] = None,
+    status: Optional[AssetStatus] = None,
+    departmentId: Optional[str] = None,
+    user: dict = Depends(check_roles(["admin", "finance_director", "public_works"]))
+):
+    """The `k` assets nearest a point, with their distance in metres."""
+    try:
+        items = await find_nearest(lat, lng, k, type=type, status=status, department_id=departmentId)
+        return {"items": items}
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/assets/geohash/rebuild")
+async def rebuild_geohashes(user: dict = Depends(check_roles(["admin"]))):
+    """Recompute spatial columns from coordinates for every asset."""
+    try:
+        return {"updated": await backfill_geohashes()}
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _main():
+    await db.connect(warm=1)
+    try:
+        changed = await backfill_geohashes()
+        print(f"Updated spatial columns on {changed} assets")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
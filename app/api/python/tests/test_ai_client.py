@@ -0,0 +1,125 @@
+import asyncio
+import json
+import httpx
+import pytest
+from ..ai_client import AIClient, AIServiceError
+
+class StubModelServer:
+    """ASGI stand-in for the model endpoint that can fail the first N calls."""
+
+    def __init__(self, failures=0, status=529, delay=0.0):
+        self.failures = failures
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.failures:
+                status, body = self.status, {"error": "overloaded"}
+            else:
+                text = json.dumps({"title": "Report", "sections": []})
+                status, body = 200, {"content": [{"type": "text", "text": text}]}
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")]
+            })
+            await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+        finally:
+            self.active -= 1
+
+def make_client(server, **kwargs):
+    return AIClient(
+        endpoint="http://model.test/v1/messages",
+        api_key="test",
+        http2=False,
+        backoff_base=0.001,
+        transport=httpx.ASGITransport(app=server),
+        **kwargs
+    )
+
+@pytest.mark.asyncio
+async def test_retries_overloaded_responses():
+    server = StubModelServer(failures=2)
+    client = make_client(server, max_retries=3)
+
+    response = await client.create_message({"messages": []})
+    await client.close()
+
+    assert json.loads(response["content"][0]["text"])["title"] == "Report"
+    assert server.calls == 3
+    assert client.stats()["retries"] == 2
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    server = StubModelServer(failures=10, status=503)
+    client = make_client(server, max_retries=2)
+
+    with pytest.raises(AIServiceError) as error:
+        await client.create_message({"messages": []})
+    await client.close()
+
+    assert error.value.status_code == 503
+    assert server.calls == 3
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors():
+    server = StubModelServer(failures=1, status=400)
+    client = make_client(server, max_retries=3)
+
+    with pytest.raises(AIServiceError):
+        await client.create_message({"messages": []})
+    await client.close()
+
+    assert server.calls == 1
+
+@pytest.mark.asyncio
+async def test_caps_concurrent_upstream_calls():
+    server = StubModelServer(delay=0.02)
+    client = make_client(server, max_concurrency=3)
+
+    await asyncio.gather(*(client.create_message({"messages": []}) for _ in range(12)))
+    await client.close()
+
+    assert server.peak == 3
+
+class StubStreamingServer:
+    """Streams a canned completion as server-sent events, a few characters per event."""
+
+    def __init__(self, text):
+        self.text = text
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream")]
+        })
+        events = [{"type": "message_start"}]
+        events += [
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": self.text[i:i + 5]}}
+            for i in range(0, len(self.text), 5)
+        ]
+        events.append({"type": "message_stop"})
+        for event in events:
+            body = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+@pytest.mark.asyncio
+async def test_streams_text_deltas():
+    text = json.dumps({"title": "Report", "sections": [{"heading": "A", "content": "B"}]})
+    client = make_client(StubStreamingServer(text))
+
+    chunks = [chunk async for chunk in client.stream_message({"messages": []})]
+    await client.close()
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == text
@@ -0,0 +1,163 @@
+from datetime import datetime, timezone
+import csv
+import io
+import json
+import pytest
+from .. import asset_export
+from ..asset_export import EXPORT_FIELDS, ExportFormat, _columnar, _csv, _ndjson, iter_asset_chunks
+from ..models import AssetType
+
+
+def make_row(n):
+    return {
+        "id": f"asset-{n:03d}",
+        "name": f"Asset {n}",
+        "type": "INFRASTRUCTURE",
+        "status": "ACTIVE",
+        "location": "Harbour Rd, Unit 4",
+        "coordinates": json.dumps({"lat": 49.3, "lng": -123.1}) if n % 2 == 0 else None,
+        "value": 1000.0 * n,
+        "purchaseDate": "2001-05-01T00:00:00+00:00",
+        "condition": "GOOD",
+        "expectedLifespan": 40,
+        "manufacturer": None,
+        "serialNumber": f"SN-{n}",
+        "warrantyExpiry": None,
+        "lastInspection": None,
+        "nextInspection": None,
+        "riskLevel": "LOW",
+        "priority": "MEDIUM",
+        "departmentId": "dept-1",
+        "userId": "user-1",
+        "createdAt": "2024-01-01T00:00:00Z",
+        "updatedAt": "2024-01-02T00:00:00Z"
+    }
+
+
+class StubDb:
+    """Stand-in for db.query_raw that serves `rows` by keyset and records each call."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def query_raw(self, query, last_id, *params):
+        self.calls.append((query, last_id, params))
+        limit = int(query.rsplit("LIMIT", 1)[1])
+        return [row for row in self.rows if row["id"] > last_id][:limit]
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    def install(rows):
+        stub = StubDb(rows)
+        monkeypatch.setattr(asset_export, "db", stub)
+        return stub
+    return install
+
+
+async def chunks_of(rows, size=2):
+    for start in range(0, len(rows), size):
+        yield [asset_export._normalize(row) for row in rows[start:start + size]]
+
+
+async def read(body):
+    return b"".join([part async for part in body])
+
+
+@pytest.mark.asyncio
+async def test_chunks_walk_keyset(stub_db):
+    stub = stub_db([make_row(n) for n in range(5)])
+
+    chunks = [chunk async for chunk in iter_asset_chunks(chunk_size=2)]
+
+    assert [[row["id"] for row in chunk] for chunk in chunks] == [
+        ["asset-000", "asset-001"], ["asset-002", "asset-003"], ["asset-004"]
+    ]
+    assert [call[1] for call in stub.calls] == ["", "asset-001", "asset-003"]
+    assert list(chunks[0][0]) == EXPORT_FIELDS
+    assert chunks[0][0]["coordinates"] == {"lat": 49.3, "lng": -123.1}
+    assert chunks[0][0]["createdAt"] == "2024-01-01T00:00:00+00:00"
+
+
+@pytest.mark.asyncio
+async def test_chunks_end_on_empty_page_after_exact_multiple(stub_db):
+    stub = stub_db([make_row(n) for n in range(4)])
+
+    chunks = [chunk async for chunk in iter_asset_chunks(chunk_size=2)]
+
+    assert len(chunks) == 2
+    assert [call[1] for call in stub.calls] == ["", "asset-001", "asset-003"]
+
+
+@pytest.mark.asyncio
+async def test_chunks_filter_by_enum(stub_db):
+    stub = stub_db([])
+
+    assert [chunk async for chunk in iter_asset_chunks(type=AssetType.INFRASTRUCTURE, chunk_size=2)] == []
+
+    query, _, params = stub.calls[0]
+    assert '"type" = $2::"AssetType"' in query
+    assert params == ("INFRASTRUCTURE",)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_writes_one_object_per_line():
+    rows = [make_row(n) for n in range(3)]
+
+    lines = (await read(_ndjson(chunks_of(rows)))).decode().splitlines()
+
+    assert [json.loads(line)["id"] for line in lines] == [row["id"] for row in rows]
+    assert json.loads(lines[1])["coordinates"] is None
+
+
+@pytest.mark.asyncio
+async def test_csv_writes_header_once_and_quotes():
+    rows = [make_row(n) for n in range(3)]
+
+    parsed = list(csv.DictReader(io.StringIO((await read(_csv(chunks_of(rows)))).decode())))
+
+    assert [row["id"] for row in parsed] == [row["id"] for row in rows]
+    assert parsed[0]["location"] == "Harbour Rd, Unit 4"
+    assert json.loads(parsed[0]["coordinates"]) == {"lat": 49.3, "lng": -123.1}
+    assert parsed[1]["coordinates"] == ""
+
+
+@pytest.mark.asyncio
+async def test_parquet_round_trips():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    rows = [make_row(n) for n in range(5)]
+
+    data = await read(_columnar(chunks_of(rows), ExportFormat.parquet))
+    table = pq.read_table(pa.BufferReader(data))
+
+    assert table.column_names == EXPORT_FIELDS
+    assert table.column("id").to_pylist() == [row["id"] for row in rows]
+    assert table.column("purchaseDate")[0].as_py() == datetime(2001, 5, 1, tzinfo=timezone.utc)
+    # One row group per chunk
+    assert pq.ParquetFile(pa.BufferReader(data)).num_row_groups == 3
+
+
+@pytest.mark.asyncio
+async def test_arrow_stream_round_trips():
+    pa = pytest.importorskip("pyarrow")
+    rows = [make_row(n) for n in range(5)]
+
+    table = pa.ipc.open_stream(await read(_columnar(chunks_of(rows), ExportFormat.arrow))).read_all()
+
+    assert table.num_rows == 5
+    assert table.column("value").to_pylist() == [row["value"] for row in rows]
+    assert json.loads(table.column("coordinates")[0].as_py()) == {"lat": 49.3, "lng": -123.1}
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_csv(stub_db):
+    stub_db([make_row(n) for n in range(3)])
+
+    response = await asset_export.export_assets(format=ExportFormat.csv, user={"role": "admin"})
+
+    assert response.media_type == "text/csv"
+    assert response.headers["content-disposition"].endswith(".csv")
+    body = b"".join([part async for part in response.body_iterator]).decode()
+    assert len(body.splitlines()) == 4
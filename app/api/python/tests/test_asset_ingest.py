@@ -0,0 +1,158 @@
+from datetime import timedelta
+from types import SimpleNamespace
+import pytest
+from .. import asset_ingest
+from ..asset_ingest import INGEST_TX_TIMEOUT, _csv_rows, _lines, _numbered_chunks, _validate_chunk
+
+
+def make_row(serial=None, department="dept-1", **overrides):
+    row = {
+        "name": "Pump Station 4",
+        "type": "INFRASTRUCTURE",
+        "status": "ACTIVE",
+        "location": "Harbour Rd",
+        "value": "2500000",
+        "purchaseDate": "1998-04-01T00:00:00",
+        "condition": "FAIR",
+        "expectedLifespan": "40",
+        "lastInspection": "2024-01-01T00:00:00",
+        "nextInspection": "2025-01-01T00:00:00",
+        "departmentId": department
+    }
+    if serial:
+        row["serialNumber"] = serial
+    row.update(overrides)
+    return row
+
+
+class StubModel:
+    """Stand-in for a Prisma model whose find_many returns the rows with a matching `field`."""
+
+    def __init__(self, field, rows):
+        self.field = field
+        self.rows = [SimpleNamespace(**{field: value}) for value in rows]
+        self.queries = []
+
+    async def find_many(self, where):
+        wanted = where[self.field]["in"]
+        self.queries.append(sorted(wanted))
+        return [row for row in self.rows if getattr(row, self.field) in wanted]
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    def install(serials=(), departments=("dept-1",)):
+        stub = SimpleNamespace(
+            asset=StubModel("serialNumber", serials),
+            department=StubModel("id", departments)
+        )
+        monkeypatch.setattr(asset_ingest, "db", stub)
+        return stub
+    return install
+
+
+async def stream(*parts):
+    for part in parts:
+        yield part
+
+
+async def csv_rows(*parts):
+    return [row async for row in _csv_rows(_lines(stream(*parts)))]
+
+
+def test_tx_limits_are_timedeltas():
+    assert isinstance(INGEST_TX_TIMEOUT, timedelta)
+    assert INGEST_TX_TIMEOUT.total_seconds() > 5
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_across_chunk_boundaries():
+    rows = await csv_rows(
+        b"\xef\xbb\xbfname,value,coordinates\r\nPump 1,10,\r\nPump ",
+        b'2,20,"{""lat"": 49.3, ""lng"": -123.1}"\r\n\r\n'
+    )
+
+    assert rows == [
+        ({"name": "Pump 1", "value": "10"}, None),
+        ({"name": "Pump 2", "value": "20", "coordinates": {"lat": 49.3, "lng": -123.1}}, None)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_keep_multiline_quoted_fields():
+    rows = await csv_rows(b'name,notes\nPump 1,"first line\nsecond line"\nPump 2,ok\n')
+
+    assert [row for row, _ in rows] == [
+        {"name": "Pump 1", "notes": "first line\nsecond line"},
+        {"name": "Pump 2", "notes": "ok"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_report_parse_errors():
+    rows = await csv_rows(b'name,coordinates\nPump 1,{not json}\nPump 2,"unterminated\n')
+
+    assert rows[0][0] is None and rows[0][1].startswith("Could not parse row")
+    assert rows[1] == (None, "Unterminated quoted field")
+
+
+@pytest.mark.asyncio
+async def test_numbered_chunks_number_rows_across_chunks():
+    async def rows():
+        for n in range(5):
+            yield {"n": n}, None
+
+    chunks = [chunk async for chunk in _numbered_chunks(rows(), 2)]
+
+    assert [[number for number, _, _ in chunk] for chunk in chunks] == [[1, 2], [3, 4], [5]]
+
+
+@pytest.mark.asyncio
+async def test_validate_chunk_reports_errors_per_row(stub_db):
+    stub_db()
+    chunk = [
+        (1, make_row(serial="SN-1"), None),
+        (2, None, "Could not parse row: bad"),
+        (3, make_row(expectedLifespan="0"), None),
+        (4, make_row(department="dept-missing"), None)
+    ]
+
+    accepted, errors = await _validate_chunk(chunk, set())
+
+    assert [number for number, _ in accepted] == [1]
+    assert errors[0] == {"row": 2, "errors": [{"field": None, "message": "Could not parse row: bad"}]}
+    assert errors[1]["row"] == 3 and errors[1]["errors"][0]["field"] == "expectedLifespan"
+    assert errors[2] == {"row": 4, "errors": [{"field": "departmentId", "message": "Department not found"}]}
+
+
+@pytest.mark.asyncio
+async def test_validate_chunk_rejects_duplicate_serials_in_upload(stub_db):
+    stub = stub_db()
+    seen = set()
+
+    accepted, errors = await _validate_chunk(
+        [(1, make_row(serial="SN-1"), None), (2, make_row(serial="SN-1"), None)], seen
+    )
+    later, later_errors = await _validate_chunk([(3, make_row(serial="SN-1"), None)], seen)
+
+    assert [number for number, _ in accepted] == [1]
+    duplicate = [{"field": "serialNumber", "message": "Duplicate serialNumber in upload"}]
+    assert errors == [{"row": 2, "errors": duplicate}]
+    # Serials seen in earlier chunks still count
+    assert later == [] and later_errors == [{"row": 3, "errors": duplicate}]
+    assert stub.asset.queries == [["SN-1"]]
+
+
+@pytest.mark.asyncio
+async def test_validate_chunk_rejects_existing_serials(stub_db):
+    stub = stub_db(serials=["SN-2"])
+
+    accepted, errors = await _validate_chunk(
+        [(1, make_row(serial="SN-1"), None), (2, make_row(serial="SN-2"), None), (3, make_row(), None)], set()
+    )
+
+    assert [number for number, _ in accepted] == [1, 3]
+    assert errors == [{"row": 2, "errors": [{"field": "serialNumber", "message": "serialNumber already exists"}]}]
+    # One lookup per chunk for serials and one for departments
+    assert stub.asset.queries == [["SN-1", "SN-2"]]
+    assert stub.department.queries == [["dept-1"]]
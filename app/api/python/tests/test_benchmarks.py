@@ -0,0 +1,41 @@
+import json
+import httpx
+import pytest
+from ..ai_client import AIClient
+from ..benchmarks.compare import compare
+from ..benchmarks.load import summarize
+from ..benchmarks.stub_model import STUB_REPORT, StubModel
+
+def result(p99_ms, throughput_rps=100.0, errors=0):
+    return {"scenarios": {"assets_list": {
+        "requests": 1000, "errors": errors, "throughput_rps": throughput_rps,
+        "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": p99_ms
+    }}}
+
+def test_compare_flags_latency_throughput_and_error_regressions():
+    baseline = result(30.0)
+
+    assert not compare(baseline, result(32.0))[0]["regressed"]
+    assert compare(baseline, result(40.0))[0]["regressed"]
+    assert compare(baseline, result(30.0, throughput_rps=80.0))[0]["regressed"]
+    assert compare(baseline, result(30.0, errors=3))[0]["regressed"]
+
+def test_summarize_counts_errors_in_throughput():
+    summary = summarize([0.01] * 90 + [0.1] * 10, errors=5, elapsed=10.0)
+
+    assert summary["requests"] == 105
+    assert summary["throughput_rps"] == 10.5
+    assert summary["p50_ms"] == 10.0
+    assert summary["p99_ms"] == 100.0
+
+@pytest.mark.asyncio
+async def test_stub_model_speaks_the_messages_protocol():
+    stub = StubModel(latency=0)
+    client = AIClient(endpoint="http://stub/v1/messages", http2=False, transport=httpx.ASGITransport(app=stub))
+
+    response = await client.create_message({"messages": []})
+    streamed = "".join([chunk async for chunk in client.stream_message({"messages": []})])
+    await client.close()
+
+    assert json.loads(response["content"][0]["text"]) == STUB_REPORT
+    assert json.loads(streamed) == STUB_REPORT
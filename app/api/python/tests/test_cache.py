@@ -0,0 +1,37 @@
+import time
+from ..cache import TTLCache
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+def test_entries_expire_and_ttl_only_shortens():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("capped", 2, ttl=3600)
+    cache.set("expired", 3, ttl=-5)
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("expired") is None
+    assert cache.get("capped") == 2
+
+def test_reports_hits_and_misses():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 2 / 3
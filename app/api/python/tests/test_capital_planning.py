@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from ..capital_planning import CapitalPlan, budget_caps, replacement_candidates, solve_department
+from ..projections import AssetColumns, project_budget
+from .test_projections import make_assets
+
+
+def make_plan(count=2000, years=6):
+    assets = make_assets(count)
+    columns = AssetColumns.from_assets(assets)
+    candidates = replacement_candidates(columns, [asset.departmentId for asset in assets], 2024, years)
+    return columns, candidates, CapitalPlan(candidates, 2024, years)
+
+
+def test_candidates_match_projection():
+    columns, candidates, _ = make_plan()
+    first_seen = {}
+    for projection in project_budget(columns, 2024, 6):
+        for item in projection["assets_requiring_attention"]:
+            first_seen.setdefault(item["id"], (projection["year"], item["estimated_cost"]))
+    assert set(first_seen) == set(candidates.ids)
+    growth = np.array([1.03 ** offset for offset in range(6)])
+    for i, asset_id in enumerate(candidates.ids):
+        year, cost = first_seen[asset_id]
+        assert 2024 + candidates.due[i] == year
+        assert candidates.value[i] * growth[candidates.due[i]] == cost
+
+
+def test_schedule_respects_caps_and_due_years():
+    _, candidates, plan = make_plan()
+    caps = {department: np.full(6, 2e7) for department in candidates.departments}
+    plan.solve(caps)
+    for department in candidates.departments:
+        assert np.all(plan.spent[department] <= caps[department] + 1e-6)
+    summary = plan.summary()
+    assert summary["scheduled"] and summary["deferred"]
+    assert all(item["year"] >= item["due_year"] for item in summary["scheduled"])
+    assert 0 < summary["risk_reduction"] < summary["max_risk_reduction"]
+
+
+def test_more_budget_removes_more_risk():
+    _, candidates, plan = make_plan()
+    reductions = []
+    for budget in (1e6, 1e7, 1e8, 1e12):
+        plan.solve({department: np.full(6, budget) for department in candidates.departments})
+        reductions.append(plan.summary()["risk_reduction"])
+    assert reductions == sorted(reductions)
+    assert reductions[-1] == pytest.approx(plan.summary()["max_risk_reduction"])
+
+
+def test_greedy_skips_items_that_do_not_fit():
+    value = np.array([5.0, 8.0, 3.0, 2.0])
+    schedule, spent = solve_department(
+        value, np.zeros(4, dtype=np.int64), np.arange(4), np.array([10.0]), np.ones(1)
+    )
+    # 5 fits, 8 does not, 3 and 2 fill the rest
+    assert schedule.tolist() == [0, -1, 0, 0]
+    assert spent.tolist() == [10.0]
+
+
+def test_locks_and_exclusions():
+    _, candidates, plan = make_plan()
+    caps = {department: np.full(6, 5e6) for department in candidates.departments}
+    locked_id, excluded_id = candidates.ids[0], candidates.ids[1]
+    plan.solve(caps, {locked_id: 5}, [excluded_id])
+    assert plan.schedule[0] == 5
+    assert plan.schedule[1] == -1
+    with pytest.raises(ValueError):
+        plan.solve(caps, {"not-a-candidate": 0})
+
+
+def test_warm_start_matches_cold_solve():
+    _, candidates, plan = make_plan()
+    caps = {department: np.full(6, 2e7) for department in candidates.departments}
+    assert plan.solve(caps) == len(candidates.departments)
+
+    edited = dict(caps)
+    edited[candidates.departments[0]] = np.full(6, 4e7)
+    warm = plan.copy()
+    assert warm.solve(edited, {candidates.ids[-1]: 0}) == len({candidates.departments[0], candidates.department_ids[-1]})
+
+    cold = CapitalPlan(candidates, 2024, 6)
+    cold.solve(edited, {candidates.ids[-1]: 0})
+    assert np.array_equal(warm.schedule, cold.schedule)
+    assert warm.summary() == cold.summary()
+    # The plan it started from is untouched
+    assert plan.caps[candidates.departments[0]][0] == 2e7
+
+
+def test_budget_caps_subtract_committed_allocations():
+    caps = budget_caps(
+        {"dept-0": 100.0, "dept-1": 50.0},
+        {"dept-0": np.array([30.0, 0.0, 120.0])},
+        3,
+        overrides={"dept-1": 80.0}
+    )
+    assert caps["dept-0"].tolist() == [70.0, 100.0, 0.0]
+    assert caps["dept-1"].tolist() == [80.0, 80.0, 80.0]
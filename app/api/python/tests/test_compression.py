@@ -0,0 +1,55 @@
+import gzip
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from ..compression import CompressionMiddleware, negotiate
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    async def big():
+        return JSONResponse({"rows": ["x" * 50] * 100}, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for n in range(50):
+                yield f'{{"n": {n}}}\n'.encode()
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+def test_negotiate_honours_quality_values():
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("identity") is None
+    assert negotiate("*") in ("br", "gzip")
+
+def test_large_json_is_gzipped_with_a_weak_etag():
+    response = make_client().get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["rows"][0] == "x" * 50
+
+def test_small_and_unnegotiated_responses_pass_through():
+    client = make_client()
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+def test_streams_are_compressed_chunk_by_chunk():
+    client = make_client()
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode().splitlines()[-1] == '{"n": 49}'
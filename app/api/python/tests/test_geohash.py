@@ -0,0 +1,39 @@
+import random
+from ..geohash import cover, encode, haversine_m, parse_coordinates, radius_boxes, spatial_fields, split_box
+
+def in_ranges(code, ranges):
+    return any(start <= code < end for start, end in ranges)
+
+def test_cover_contains_every_point_inside_the_boxes():
+    rng = random.Random(7)
+    points = [(rng.uniform(49.0, 49.5), rng.uniform(-123.3, -122.5)) for _ in range(5000)]
+    for _ in range(20):
+        lat, lng = rng.uniform(49.0, 49.5), rng.uniform(-123.3, -122.5)
+        boxes = radius_boxes(lat, lng, 2000)
+        ranges = cover(boxes)
+        assert len(ranges) <= 16
+        for point in points:
+            if haversine_m(lat, lng, *point) <= 2000:
+                assert in_ranges(encode(*point), ranges)
+
+def test_cover_is_selective():
+    rng = random.Random(3)
+    points = [(rng.uniform(49.0, 49.5), rng.uniform(-123.3, -122.5)) for _ in range(5000)]
+    ranges = cover(radius_boxes(49.25, -122.9, 500))
+    candidates = sum(in_ranges(encode(*point), ranges) for point in points)
+    assert candidates < len(points) * 0.01
+
+def test_boxes_split_across_the_antimeridian():
+    assert split_box(10, 170, 20, -170) == [(10, 170, 20, 180.0), (10, -180.0, 20, -170)]
+    boxes = radius_boxes(0, 179.99, 5000)
+    assert len(boxes) == 2
+    assert in_ranges(encode(0, -179.99), cover(boxes))
+
+def test_parse_coordinates_accepts_common_shapes():
+    assert parse_coordinates({"lat": 49.2, "lng": -123.1}) == (49.2, -123.1)
+    assert parse_coordinates({"latitude": "49.2", "longitude": "-123.1"}) == (49.2, -123.1)
+    assert parse_coordinates({"type": "Point", "coordinates": [-123.1, 49.2]}) == (49.2, -123.1)
+    assert parse_coordinates({"lat": 91, "lng": 0}) is None
+    assert parse_coordinates(None) is None
+    assert spatial_fields({"x": 1}) == {"latitude": None, "longitude": None, "geohash": None}
+    assert spatial_fields({"lat": 0, "lng": 0})["geohash"] < 2 ** 52
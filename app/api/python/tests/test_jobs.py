@@ -0,0 +1,195 @@
+import asyncio
+import time
+import pytest
+from ..jobs import COMPLETED, IN_PROGRESS, PENDING, REJECTED, JobQueue, JobStore
+
+async def wait_for_status(queue, job_id, status):
+    async for job in queue.subscribe(job_id):
+        if job["status"] == status:
+            return job
+
+@pytest.mark.asyncio
+async def test_jobs_complete_or_reject(tmp_path):
+    async def handler(job):
+        if job["payload"]["fail"]:
+            raise ValueError("model unavailable")
+        return {"report_id": "r1"}
+
+    queue = JobQueue("reports", handler, str(tmp_path / "jobs.sqlite3"), workers=2)
+    await queue.start()
+    ok = await queue.enqueue({"fail": False})
+    bad = await queue.enqueue({"fail": True})
+
+    done = await asyncio.wait_for(wait_for_status(queue, ok["id"], COMPLETED), 1)
+    failed = await asyncio.wait_for(wait_for_status(queue, bad["id"], REJECTED), 1)
+    metrics = queue.metrics()
+    await queue.stop()
+
+    assert done["result"] == {"report_id": "r1"}
+    assert failed["error"] == "model unavailable"
+    assert metrics["completed"] == 1
+    assert metrics["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_resume_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    job = store.insert("reports", {"asset_id": "a1"})
+    store.update(job["id"], status="IN_PROGRESS")
+    store.close()
+
+    handled = []
+
+    async def handler(job):
+        handled.append(job["payload"]["asset_id"])
+        return {}
+
+    queue = JobQueue("reports", handler, path, workers=1)
+    await queue.start()
+    await asyncio.wait_for(wait_for_status(queue, job["id"], COMPLETED), 1)
+    await queue.stop()
+
+    assert handled == ["a1"]
+
+@pytest.mark.asyncio
+async def test_new_jobs_start_pending(tmp_path):
+    started = asyncio.Event()
+
+    async def handler(job):
+        await started.wait()
+        return {}
+
+    queue = JobQueue("reports", handler, str(tmp_path / "jobs.sqlite3"), workers=1)
+    await queue.start()
+    await queue.enqueue({})
+    second = await queue.enqueue({})
+    await asyncio.sleep(0.01)
+
+    assert (await queue.get(second["id"]))["status"] == PENDING
+    assert queue.metrics()["busy_workers"] == 1
+    started.set()
+    await asyncio.wait_for(wait_for_status(queue, second["id"], COMPLETED), 1)
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_queues_sharing_a_store_run_each_job_once(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    job = store.insert("reports", {"asset_id": "a1"})
+    store.close()
+
+    handled = []
+
+    async def handler(job):
+        handled.append(job["id"])
+        await asyncio.sleep(0.01)
+        return {}
+
+    # Two processes starting on one store both queue the pending job
+    first = JobQueue("reports", handler, path, workers=2)
+    second = JobQueue("reports", handler, path, workers=2)
+    await first.start()
+    await second.start()
+    await asyncio.wait_for(wait_for_status(first, job["id"], COMPLETED), 1)
+    await asyncio.sleep(0.05)
+    await first.stop()
+    await second.stop()
+
+    assert handled == [job["id"]]
+
+@pytest.mark.asyncio
+async def test_only_stale_in_progress_jobs_resume(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    running = store.insert("reports", {"asset_id": "running"})
+    stale = store.insert("reports", {"asset_id": "stale"})
+    store.update(running["id"], status="IN_PROGRESS", started_at=time.time())
+    store.update(stale["id"], status="IN_PROGRESS", started_at=time.time() - 7200)
+    store.close()
+
+    handled = []
+
+    async def handler(job):
+        handled.append(job["payload"]["asset_id"])
+        return {}
+
+    queue = JobQueue("reports", handler, path, workers=1, stale_after=3600)
+    await queue.start()
+    await asyncio.wait_for(wait_for_status(queue, stale["id"], COMPLETED), 1)
+    await queue.stop()
+
+    assert handled == ["stale"]
+
+@pytest.mark.asyncio
+async def test_subscribe_follows_jobs_run_by_another_process(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    release = asyncio.Event()
+
+    async def handler(job):
+        await release.wait()
+        return {"report_id": "r1"}
+
+    worker = JobQueue("reports", handler, path, workers=1)
+    # Never runs jobs itself; only sees the store
+    web = JobQueue("reports", handler, path, workers=0, poll_interval=0.01)
+    await worker.start()
+    await web.start()
+    job = await worker.enqueue({})
+
+    seen = []
+
+    async def follow():
+        async for update in web.subscribe(job["id"]):
+            seen.append(update["status"])
+
+    follower = asyncio.create_task(follow())
+    await asyncio.sleep(0.05)
+    release.set()
+    await asyncio.wait_for(follower, 1)
+    await worker.stop()
+    await web.stop()
+
+    # PENDING first if the subscriber got there before the claim
+    assert seen[-2:] == [IN_PROGRESS, COMPLETED]
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_swept_while_running(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    job = store.insert("reports", {"asset_id": "a1"})
+    # A crashed process's job, with a lease that is still live at startup
+    store.update(job["id"], status="IN_PROGRESS", started_at=time.time(), heartbeat_at=time.time())
+    store.close()
+
+    async def handler(job):
+        return {}
+
+    queue = JobQueue("reports", handler, path, workers=1, stale_after=0.3)
+    await queue.start()
+    assert (await queue.get(job["id"]))["status"] == IN_PROGRESS
+    done = await asyncio.wait_for(wait_for_status(queue, job["id"], COMPLETED), 2)
+    await queue.stop()
+
+    assert done["status"] == COMPLETED
+
+@pytest.mark.asyncio
+async def test_running_jobs_renew_their_lease(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    handled = []
+
+    async def handler(job):
+        handled.append(job["id"])
+        await asyncio.sleep(0.6)
+        return {}
+
+    # Runs for several lease periods while another queue sweeps the same store
+    first = JobQueue("reports", handler, path, workers=1, stale_after=0.15)
+    second = JobQueue("reports", handler, path, workers=1, stale_after=0.15)
+    await first.start()
+    await second.start()
+    job = await first.enqueue({})
+    await asyncio.wait_for(wait_for_status(first, job["id"], COMPLETED), 2)
+    await first.stop()
+    await second.stop()
+
+    assert handled == [job["id"]]
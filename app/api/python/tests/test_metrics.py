@@ -0,0 +1,77 @@
+import time
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from .. import metrics
+from ..metrics import Histogram, MetricsMiddleware, SamplingProfiler, registry, span
+
+def make_app(server_timing=True):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, server_timing=server_timing)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        with span("db.item.find_unique"):
+            pass
+        if item_id == "broken":
+            raise HTTPException(status_code=503, detail="down")
+        return {"id": item_id}
+
+    return app
+
+def test_routes_are_labelled_by_template_and_stages_recorded():
+    client = TestClient(make_app())
+    ok = client.get("/items/a1")
+    client.get("/items/a2")
+    client.get("/items/broken")
+
+    assert "db-item-find_unique;dur=" in ok.headers["server-timing"]
+    text = registry.render()
+    assert 'api_requests_total{route="/items/{item_id}",method="GET",status="200"} 2.0' in text
+    assert 'api_request_errors_total{route="/items/{item_id}",method="GET"} 1.0' in text
+    assert 'api_stage_duration_seconds_count{route="/items/{item_id}",stage="db.item.find_unique"} 3' in text
+    assert "a1" not in text
+
+def test_server_timing_is_opt_in():
+    assert "server-timing" not in TestClient(make_app(server_timing=False)).get("/items/a1").headers
+    assert not MetricsMiddleware(None).server_timing
+
+def test_scrape_requires_token_unless_public(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", None)
+    monkeypatch.setattr(metrics, "METRICS_PUBLIC", False)
+    assert not metrics.scrape_allowed(None)
+
+    monkeypatch.setattr(metrics, "METRICS_PUBLIC", True)
+    assert metrics.scrape_allowed(None)
+
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "secret")
+    assert metrics.scrape_allowed("Bearer secret")
+    assert not metrics.scrape_allowed(None)
+    assert not metrics.scrape_allowed("Bearer wrong")
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, route="/x")
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/x"} 3' in lines
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_profiler_captures_stacks_of_the_sampled_thread():
+    profiler = SamplingProfiler(interval=0.002, keep=5)
+    profiler.start()
+    started = time.perf_counter()
+    busy_wait(0.1)
+    profiler.capture("/slow", "GET", started, time.perf_counter())
+    profiler.stop()
+
+    capture = profiler.captures[0]
+    assert capture["samples"] > 0
+    assert "busy_wait" in capture["collapsed"]
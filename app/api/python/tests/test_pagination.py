@@ -0,0 +1,32 @@
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from ..pagination import decode_cursor, encode_cursor, keyset_where, next_cursor
+
+def test_cursor_round_trips_datetimes():
+    created = datetime(2024, 5, 1, 12, 30)
+    cursor = encode_cursor("createdAt", created, "asset-1")
+    assert decode_cursor(cursor, "createdAt") == (created, "asset-1")
+
+def test_cursor_rejects_other_sort_and_garbage():
+    cursor = encode_cursor("name", "Pump", "asset-1")
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, "value")
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", "name")
+
+def test_keyset_where_breaks_ties_on_id():
+    cursor = encode_cursor("value", 100.0, "asset-9")
+    where = keyset_where({"type": "VEHICLE"}, "value", "desc", cursor)
+    assert where == {
+        "AND": [
+            {"type": "VEHICLE"},
+            {"OR": [{"value": {"lt": 100.0}}, {"value": 100.0, "id": {"lt": "asset-9"}}]}
+        ]
+    }
+
+def test_next_cursor_only_when_more_rows_exist():
+    rows = [SimpleNamespace(id=f"a{i}", name=f"n{i}") for i in range(3)]
+    assert next_cursor(rows, 3, "name") is None
+    assert decode_cursor(next_cursor(rows, 2, "name"), "name") == ("n1", "a1")
@@ -0,0 +1,91 @@
+from datetime import datetime
+import os
+import subprocess
+import sys
+import pytest
+from starlette.requests import Request
+from ..pdf import PdfCache, cached_file_response, render_pdf, shutdown_renderer
+
+def make_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    })
+
+@pytest.mark.asyncio
+async def test_renders_in_process_pool():
+    pdf = await render_pdf({
+        "title": "Asset Management Policy Report",
+        "sections": [{"heading": "Executive Summary", "content": "All good."}],
+        "asset_name": "Pump Station 4",
+        "report_type": "POLICY",
+        "generated": "2025-01-01 00:00:00",
+        "status": "COMPLETED"
+    })
+    shutdown_renderer()
+    assert pdf.startswith(b"%PDF")
+
+@pytest.mark.asyncio
+async def test_cache_key_changes_with_updated_at(tmp_path):
+    cache = PdfCache(str(tmp_path))
+    first = cache.key("r1", datetime(2025, 1, 1))
+    await cache.put(first, b"%PDF-1")
+
+    assert await cache.get(first) == b"%PDF-1"
+    assert await cache.get(cache.key("r1", datetime(2025, 1, 2))) is None
+
+def test_conditional_and_range_requests():
+    content = bytes(range(100))
+    etag = '"abc"'
+
+    assert cached_file_response(make_request(if_none_match='"abc"'), None, etag, "application/pdf").status_code == 304
+
+    partial = cached_file_response(make_request(range="bytes=10-19"), content, etag, "application/pdf")
+    assert partial.status_code == 206
+    assert partial.body == content[10:20]
+    assert partial.headers["content-range"] == "bytes 10-19/100"
+
+    suffix = cached_file_response(make_request(range="bytes=-5"), content, etag, "application/pdf")
+    assert suffix.body == content[95:]
+
+    stale = cached_file_response(make_request(range="bytes=0-9", if_range='"old"'), content, etag, "application/pdf")
+    assert stale.status_code == 200
+    assert stale.body == content
+
+    assert cached_file_response(make_request(range="bytes=200-"), content, etag, "application/pdf").status_code == 416
+
+def test_import_does_not_load_reportlab():
+    # A fresh interpreter: this one may already have rendered a PDF
+    package = __package__.rsplit(".", 1)[0]
+    check = f"import sys, {package}.pdf; sys.exit('reportlab' in sys.modules)"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    assert subprocess.run([sys.executable, "-c", check], env=env).returncode == 0
+
+@pytest.mark.asyncio
+async def test_cache_evicts_stale_then_least_recently_used(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=25, max_age=3600, evict_every=1)
+    keys = [cache.key(f"r{n}", datetime(2025, 1, 1)) for n in range(4)]
+    for age, key in zip((7200, 30, 20), keys):
+        await cache.put(key, b"x" * 10)
+        os.utime(cache.path(key), (0, os.path.getmtime(cache.path(key)) - age))
+
+    # The expired file goes first; reading r1 makes r2 the least recently used
+    assert await cache.get(keys[1]) == b"x" * 10
+    await cache.put(keys[3], b"x" * 10)
+
+    assert await cache.get(keys[0]) is None
+    assert await cache.get(keys[2]) is None
+    assert await cache.get(keys[1]) is not None and await cache.get(keys[3]) is not None
+
+@pytest.mark.asyncio
+async def test_cache_evicts_every_n_writes(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=15, max_age=3600, evict_every=3)
+    for n in range(2):
+        await cache.put(cache.key(f"r{n}", datetime(2025, 1, 1)), b"x" * 10)
+    # Over the cap, but no pass has run yet
+    assert len(os.listdir(tmp_path)) == 2
+
+    await cache.put(cache.key("r2", datetime(2025, 1, 1)), b"x" * 10)
+    assert len(os.listdir(tmp_path)) == 1
@@ -0,0 +1,130 @@
+import random
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from ..projections import (
+    AssetColumns, aggregate_assets, project_budget, project_from_aggregates, project_scenarios
+)
+
+def make_assets(count, seed=7):
+    rng = random.Random(seed)
+    conditions = ["EXCELLENT", "GOOD", "FAIR", "POOR", "CRITICAL"]
+    return [
+        SimpleNamespace(
+            id=f"asset-{i}",
+            name=f"Asset {i}",
+            value=rng.uniform(1_000, 5_000_000),
+            purchaseDate=datetime(rng.randint(1960, 2025), 1, 1),
+            expectedLifespan=rng.randint(5, 60),
+            condition=rng.choice(conditions),
+            departmentId=f"dept-{i % 3}",
+            type=rng.choice(["BUILDING", "VEHICLE"])
+        )
+        for i in range(count)
+    ]
+
+def reference_projection(assets, current_year, years):
+    """The original per-asset loop from get_budget_projections."""
+    projections = []
+    for year in range(current_year, current_year + years):
+        yearly_projection = {
+            "year": year,
+            "total_budget_needed": 0,
+            "maintenance_cost": 0,
+            "replacement_cost": 0,
+            "assets_requiring_attention": []
+        }
+        for asset in assets:
+            asset_age = year - asset.purchaseDate.year
+            remaining_life = asset.expectedLifespan - asset_age
+            maintenance_factor = {
+                "EXCELLENT": 0.01,
+                "GOOD": 0.02,
+                "FAIR": 0.04,
+                "POOR": 0.08,
+                "CRITICAL": 0.15
+            }
+            yearly_projection["maintenance_cost"] += asset.value * maintenance_factor[asset.condition]
+            if remaining_life <= 0:
+                yearly_projection["replacement_cost"] += asset.value * 1.03 ** (year - current_year)
+                yearly_projection["assets_requiring_attention"].append({
+                    "id": asset.id,
+                    "name": asset.name,
+                    "type": "replacement",
+                    "estimated_cost": asset.value * 1.03 ** (year - current_year)
+                })
+        yearly_projection["total_budget_needed"] = (
+            yearly_projection["maintenance_cost"] +
+            yearly_projection["replacement_cost"]
+        )
+        projections.append(yearly_projection)
+    return projections
+
+def test_projection_matches_reference_loop_exactly():
+    assets = make_assets(2_000)
+    expected = reference_projection(assets, 2025, 20)
+    actual = project_budget(AssetColumns.from_assets(assets), 2025, 20)
+    assert actual == expected
+
+def test_projection_of_empty_inventory():
+    expected = reference_projection([], 2025, 3)
+    actual = project_budget(AssetColumns.from_assets([]), 2025, 3)
+    assert actual == expected
+
+def test_scenarios_apply_inflation_and_condition_factors():
+    columns = AssetColumns.from_assets(make_assets(500))
+    baseline, stressed = project_scenarios(columns, 2025, 10, [
+        {"name": "baseline"},
+        {"name": "stressed", "inflation_rate": 0.06, "maintenance_factors": {"POOR": 0.2}}
+    ])
+
+    assert baseline["projections"] == project_budget(columns, 2025, 10)
+    assert stressed["maintenance_factors"]["POOR"] == 0.2
+    for base, stress in zip(baseline["projections"], stressed["projections"]):
+        assert stress["maintenance_cost"] > base["maintenance_cost"]
+        assert stress["replacement_cost"] >= base["replacement_cost"]
+
+def as_groups(aggregates):
+    return [
+        {"dueYear": key[3], "condition": key[2], **totals}
+        for key, totals in aggregates.items()
+        if totals["assetCount"]
+    ]
+
+def test_aggregated_projection_matches_live_engine():
+    assets = make_assets(2_000)
+    live = project_budget(AssetColumns.from_assets(assets), 2025, 20)
+    materialized = project_from_aggregates(as_groups(aggregate_assets(assets)), 2025, 20)
+
+    for expected, actual in zip(live, materialized):
+        assert actual["year"] == expected["year"]
+        assert actual["maintenance_cost"] == pytest.approx(expected["maintenance_cost"])
+        assert actual["replacement_cost"] == pytest.approx(expected["replacement_cost"])
+        assert actual["assets_requiring_replacement"] == len(expected["assets_requiring_attention"])
+
+def test_aggregate_deltas_cancel_out():
+    assets = make_assets(50)
+    totals = aggregate_assets(assets)
+    for key, delta in aggregate_assets(assets[:20], sign=-1).items():
+        totals[key]["value"] += delta["value"]
+        totals[key]["assetCount"] += delta["assetCount"]
+
+    remaining = project_from_aggregates(as_groups(totals), 2025, 5)
+    expected = project_from_aggregates(as_groups(aggregate_assets(assets[20:])), 2025, 5)
+    for actual, wanted in zip(remaining, expected):
+        assert actual["total_budget_needed"] == pytest.approx(wanted["total_budget_needed"])
+        assert actual["assets_requiring_replacement"] == wanted["assets_requiring_replacement"]
+
+def test_maintenance_history_replaces_condition_factor_where_recorded():
+    assets = make_assets(10)
+    for i, asset in enumerate(assets):
+        asset.maintenanceSummary = SimpleNamespace(cost12Months=1_000.0 if i < 4 else 0.0)
+    columns = AssetColumns.from_assets(assets)
+
+    by_condition = project_budget(columns, 2025, 1)[0]
+    by_history = project_budget(columns, 2025, 1, use_maintenance_history=True)[0]
+    factors = {"EXCELLENT": 0.01, "GOOD": 0.02, "FAIR": 0.04, "POOR": 0.08, "CRITICAL": 0.15}
+    expected = 4 * 1_000.0 + sum(asset.value * factors[asset.condition] for asset in assets[4:])
+
+    assert by_history["maintenance_cost"] == pytest.approx(expected)
+    assert by_history["replacement_cost"] == by_condition["replacement_cost"]
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+import json
+from ..prompt_builder import (
+    build_prompt, compact_asset, estimate_raw_tokens, estimate_tokens, grouped_statistics, maintenance_statistics
+)
+
+NOW = datetime(2024, 6, 1)
+
+
+def make_asset(logs=2000, plans=40):
+    start = NOW - timedelta(days=logs * 3)
+    return {
+        "id": "asset-1",
+        "name": "Pump Station 4",
+        "type": "INFRASTRUCTURE",
+        "status": "ACTIVE",
+        "location": "Harbour Rd",
+        "coordinates": {"lat": 49.3, "lng": -123.1},
+        "value": 2_500_000.0,
+        "purchaseDate": "1998-04-01 00:00:00+00:00",
+        "condition": "FAIR",
+        "expectedLifespan": 40,
+        "manufacturer": "Acme",
+        "serialNumber": "SN-1",
+        "notes": "Seasonal flooding. " * 20,
+        "attachments": [f"https://files.example.com/{n}.jpg" for n in range(10)],
+        "riskLevel": "MEDIUM",
+        "priority": "HIGH",
+        "userId": "user-1",
+        "departmentId": "dept-1",
+        "department": {"id": "dept-1", "name": "Public Works", "code": "PW", "budget": 5_000_000.0},
+        "maintenanceLogs": [
+            {
+                "id": f"log-{n}",
+                "date": str(start + timedelta(days=n * 3)),
+                "type": ["PREVENTIVE", "CORRECTIVE", "INSPECTION"][n % 3],
+                "description": f"Replaced seal and checked pressure on line {n}. " * 4,
+                "cost": 100.0 + n % 50,
+                "performedBy": "Crew 2",
+                "contractor": None,
+                "parts": [{"name": "seal", "qty": 2}],
+                "images": [],
+                "assetId": "asset-1"
+            }
+            for n in range(logs)
+        ],
+        "financialPlans": [
+            {
+                "id": f"plan-{n}",
+                "year": 1990 + n,
+                "budget": 50_000.0,
+                "allocated": 40_000.0,
+                "spent": 30_000.0,
+                "fundingSource": "capital",
+                "description": "Replacement reserve contribution. " * 10,
+                "status": "APPROVED" if n % 2 else "COMPLETED",
+                "assetId": "asset-1"
+            }
+            for n in range(plans)
+        ]
+    }
+
+
+def test_maintenance_statistics():
+    logs = [
+        {"date": "2024-01-10 00:00:00", "type": "PREVENTIVE", "cost": 100.0},
+        {"date": "2023-01-10 00:00:00", "type": "CORRECTIVE", "cost": 250.0},
+        {"date": "2022-01-10 00:00:00", "type": "PREVENTIVE", "cost": 50.0}
+    ]
+    stats = maintenance_statistics(logs, NOW)
+    assert stats["count"] == 3
+    assert stats["total_cost"] == 400.0
+    assert stats["cost_12_months"] == 100.0
+    assert stats["by_type"]["PREVENTIVE"] == {"count": 2, "cost": 150.0}
+    assert stats["by_year"]["2023"] == {"count": 1, "cost": 250.0}
+    assert (stats["first_date"], stats["last_date"]) == ("2022-01-10", "2024-01-10")
+    assert maintenance_statistics([], NOW)["count"] == 0
+
+
+def test_grouped_statistics_match_log_statistics():
+    logs = make_asset(logs=200)["maintenanceLogs"]
+    since = NOW - timedelta(days=365)
+    groups = {}
+    for log in logs:
+        date = datetime.fromisoformat(log["date"])
+        group = groups.setdefault((log["type"], date.year), {
+            "type": log["type"], "year": date.year, "count": 0, "cost": 0.0, "cost12Months": 0.0,
+            "firstDate": log["date"], "lastDate": log["date"]
+        })
+        group["count"] += 1
+        group["cost"] += log["cost"]
+        group["cost12Months"] += log["cost"] if date >= since else 0.0
+        group["firstDate"] = min(group["firstDate"], log["date"])
+        group["lastDate"] = max(group["lastDate"], log["date"])
+
+    assert grouped_statistics(list(groups.values())) == maintenance_statistics(logs, NOW)
+    assert grouped_statistics([]) == maintenance_statistics([], NOW)
+
+
+def test_compact_payload_uses_loaded_statistics():
+    asset = make_asset(logs=10)
+    statistics = maintenance_statistics(make_asset(logs=500)["maintenanceLogs"], NOW)
+    compact = compact_asset({**asset, "maintenanceStatistics": statistics}, "POLICY", NOW)
+
+    assert compact["maintenance"]["count"] == 500
+    assert len(compact["maintenance"]["recent"]) == 10
+    assert "recent" not in statistics
+
+
+def test_compact_payload_selects_fields_per_report_type():
+    asset = make_asset(logs=30, plans=5)
+    policy = compact_asset(asset, "POLICY", NOW)
+    financial = compact_asset(asset, "FINANCIAL", NOW)
+
+    assert "attachments" not in policy and "serialNumber" not in policy
+    assert policy["purchaseDate"] == "1998-04-01"
+    assert "plans" not in policy["financial_plans"]
+    assert financial["financial_plans"]["plans"][0]["year"] == 1994
+    assert "budget" in financial["department"] and "budget" not in policy["department"]
+    assert len(policy["maintenance"]["recent"]) == 10
+    assert policy["maintenance"]["recent"][0]["date"] >= policy["maintenance"]["recent"][-1]["date"]
+
+
+def test_prompt_fits_budget():
+    asset = make_asset()
+    prompt = build_prompt("Write a report.", asset, "FINANCIAL", budget=1500, now=NOW)
+    assert prompt.tokens <= 1500
+    assert prompt.tokens == estimate_tokens(prompt.text)
+    assert estimate_raw_tokens("Write a report.", asset) > 20 * prompt.tokens
+    assert prompt.reductions and not prompt.over_budget
+
+    payload = json.loads(prompt.text.split("Asset details: ", 1)[1])
+    assert payload["maintenance"]["count"] == 2000
+
+
+def test_small_assets_are_not_reduced():
+    prompt = build_prompt("Write a report.", make_asset(logs=5, plans=2), "STRATEGY", budget=6000, now=NOW)
+    assert prompt.reductions == []
+    assert len(json.loads(prompt.text.split("Asset details: ", 1)[1])["maintenance"]["recent"]) == 5
+
+
+def test_raw_tokens_extrapolate_unloaded_logs():
+    asset = make_asset(logs=2000)
+    recent = {**asset, "maintenanceLogs": asset["maintenanceLogs"][-10:]}
+    recent["maintenanceStatistics"] = maintenance_statistics(asset["maintenanceLogs"], NOW)
+
+    full = estimate_raw_tokens("Write a report.", asset)
+    assert abs(estimate_raw_tokens("Write a report.", recent) - full) < full * 0.05
+
+
+def test_over_budget_is_flagged():
+    prompt = build_prompt("Write a report.", make_asset(), "POLICY", budget=10, now=NOW)
+    assert prompt.over_budget
+    assert prompt.tokens > 10
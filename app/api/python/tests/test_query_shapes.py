@@ -0,0 +1,28 @@
+import os
+import re
+from ..query_shapes import INDEXES, QUERY_SHAPES
+
+SCHEMA = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "prisma", "schema.prisma")
+
+def schema_index_names():
+    """Prisma's generated names for every @@index in the schema."""
+    with open(SCHEMA) as f:
+        schema = f.read()
+    names = set()
+    for model, body in re.findall(r"^model (\w+) \{(.*?)^\}", schema, re.S | re.M):
+        for fields in re.findall(r"@@index\(\[(.*?)\]\)", body):
+            columns = [re.sub(r"\(.*\)", "", field).strip() for field in fields.split(",")]
+            names.add(f"{model}_{'_'.join(columns)}_idx")
+    return names
+
+def test_catalog_indexes_match_schema():
+    assert set(INDEXES) == schema_index_names()
+
+def test_every_shape_names_a_known_index():
+    for shape in QUERY_SHAPES:
+        index = shape["index"]
+        # Primary keys and @unique constraints come with their own indexes
+        assert index in INDEXES or index.endswith(("_pkey", "_key")), shape["name"]
+        if shape["sql"]:
+            placeholders = set(re.findall(r"\$(\d+)", shape["sql"]))
+            assert len(placeholders) == len(shape["params"]), shape["name"]
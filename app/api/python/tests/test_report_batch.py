@@ -0,0 +1,199 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import asyncio
+import json
+import pytest
+from .. import report_batch, report_cache as report_cache_module
+from ..models import BatchReportRequest
+from ..report_cache import ReportCache
+
+
+def make_asset(n):
+    return SimpleNamespace(
+        id=f"asset-{n:03d}",
+        dict=lambda: {"id": f"asset-{n:03d}", "name": f"Asset {n}", "maintenanceLogs": [], "financialPlans": []}
+    )
+
+
+class StubReports:
+    """Stand-in for db.complianceReport: create_many stores rows, find_many finds them by fingerprint."""
+
+    def __init__(self):
+        self.rows = []
+        self.created = []
+
+    async def create_many(self, data):
+        self.created.append(data)
+        for item in data:
+            self.rows.append(SimpleNamespace(
+                id=f"report-{len(self.rows)}",
+                fingerprint=item["fingerprint"],
+                createdAt=datetime.now(timezone.utc)
+            ))
+        return len(data)
+
+    async def find_many(self, where, order):
+        wanted = where["fingerprint"]["in"]
+        return [row for row in self.rows if row.fingerprint in wanted]
+
+
+class StubAssets:
+    """Stand-in for db.asset.find_many that pages through `assets` by id and records each page."""
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.pages = []
+
+    async def find_many(self, where, take, order, include):
+        last_id = where.get("id", {}).get("gt")
+        page = [asset for asset in self.assets if last_id is None or asset.id > last_id][:take]
+        self.pages.append([asset.id for asset in page])
+        return page
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    def install(assets=()):
+        stub = SimpleNamespace(asset=StubAssets(list(assets)), complianceReport=StubReports())
+        monkeypatch.setattr(report_batch, "db", stub)
+        monkeypatch.setattr(report_cache_module, "db", stub)
+        return stub
+    return install
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    async def generate_report_content(asset_payload, report_type):
+        calls.append((asset_payload["id"], report_type))
+        return {"title": f"{report_type} {asset_payload['id']}"}
+
+    async def load_maintenance_statistics(asset_ids):
+        return {asset_id: {"count": 0} for asset_id in asset_ids}
+
+    async def invalidate(*tags):
+        pass
+
+    monkeypatch.setattr(report_batch, "generate_report_content", generate_report_content)
+    monkeypatch.setattr(report_batch, "load_maintenance_statistics", load_maintenance_statistics)
+    monkeypatch.setattr(report_batch, "report_cache", ReportCache(maxsize=64, max_age=3600))
+    monkeypatch.setattr(report_batch.response_cache, "invalidate", invalidate)
+    return calls
+
+
+async def collect(chunk):
+    return [item async for item in chunk]
+
+
+@pytest.mark.asyncio
+async def test_batch_loads_assets_in_chunks(stub_db, generated, monkeypatch):
+    stub = stub_db([make_asset(n) for n in range(5)])
+    monkeypatch.setattr(report_batch, "BATCH_CHUNK_SIZE", 2)
+
+    response = await report_batch.generate_report_batch(
+        BatchReportRequest(report_types=["POLICY"]), user={"role": "admin"}
+    )
+    lines = [json.loads(line) async for line in response.body_iterator]
+
+    assert stub.asset.pages == [["asset-000", "asset-001"], ["asset-002", "asset-003"], ["asset-004"]]
+    assert [line["asset_id"] for line in lines[:-1]] == [f"asset-{n:03d}" for n in range(5)]
+    assert lines[-1] == {"summary": {"ok": 5, "cached": 0, "error": 0}}
+
+
+@pytest.mark.asyncio
+async def test_chunk_splits_cached_and_generated(stub_db, generated):
+    stub = stub_db()
+    assets = [make_asset(n) for n in range(3)]
+    statistics = {asset.id: {"count": 0} for asset in assets}
+
+    first = await collect(report_batch._process_chunk(assets[:1], statistics, ["POLICY"], False))
+    assert [item["cached"] for item in first] == [False]
+
+    items = await collect(report_batch._process_chunk(assets, statistics, ["POLICY"], False))
+    by_asset = {item["asset_id"]: item for item in items}
+
+    assert by_asset["asset-000"]["cached"] and by_asset["asset-000"]["report_id"] == first[0]["report_id"]
+    assert not by_asset["asset-001"]["cached"] and not by_asset["asset-002"]["cached"]
+    assert generated == [("asset-000", "POLICY"), ("asset-001", "POLICY"), ("asset-002", "POLICY")]
+    # Only the misses were inserted, in one create_many
+    assert [len(batch) for batch in stub.complianceReport.created] == [1, 2]
+
+    forced = await collect(report_batch._process_chunk(assets[:1], statistics, ["POLICY"], True))
+    assert [item["cached"] for item in forced] == [False]
+    assert len(generated) == 4
+
+
+@pytest.mark.asyncio
+async def test_chunk_recovers_ids_after_create_many(stub_db, generated):
+    stub = stub_db()
+    assets = [make_asset(n) for n in range(2)]
+    statistics = {asset.id: {"count": 0} for asset in assets}
+
+    items = await collect(report_batch._process_chunk(assets, statistics, ["POLICY", "FINANCIAL"], False))
+
+    rows = {row.fingerprint: row.id for row in stub.complianceReport.rows}
+    assert len(items) == 4 and all(item["status"] == "ok" for item in items)
+    assert {item["report_id"] for item in items} == set(rows.values())
+    saved = {(item["assetId"], item["reportType"]) for item in stub.complianceReport.created[0]}
+    assert saved == {(item["asset_id"], item["report_type"]) for item in items}
+
+    for fingerprint, report_id in rows.items():
+        assert (await report_batch.report_cache.get(fingerprint))["id"] == report_id
+
+
+@pytest.mark.asyncio
+async def test_closing_chunk_cancels_pending_generations(stub_db, monkeypatch):
+    stub_db()
+    started = []
+    cancelled = []
+
+    async def generate_report_content(asset_payload, report_type):
+        started.append(asset_payload["id"])
+        if asset_payload["id"] == "asset-000":
+            return {"title": "fast"}
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(asset_payload["id"])
+            raise
+
+    monkeypatch.setattr(report_batch, "generate_report_content", generate_report_content)
+    monkeypatch.setattr(report_batch, "report_cache", ReportCache(maxsize=64, max_age=3600))
+    assets = [make_asset(n) for n in range(3)]
+    statistics = {asset.id: {"count": 0} for asset in assets}
+
+    chunk = report_batch._process_chunk(assets, statistics, ["POLICY"], False)
+    iteration = asyncio.ensure_future(chunk.__anext__())
+    await asyncio.sleep(0.05)
+    assert set(started) == {"asset-000", "asset-001", "asset-002"}
+
+    iteration.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await iteration
+    await chunk.aclose()
+
+    assert sorted(cancelled) == ["asset-001", "asset-002"]
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_is_reported_per_item(stub_db, generated, monkeypatch):
+    stub = stub_db()
+
+    async def generate_report_content(asset_payload, report_type):
+        if asset_payload["id"] == "asset-001":
+            raise RuntimeError("model unavailable")
+        return {"title": "ok"}
+
+    monkeypatch.setattr(report_batch, "generate_report_content", generate_report_content)
+    assets = [make_asset(n) for n in range(2)]
+    statistics = {asset.id: {"count": 0} for asset in assets}
+
+    items = await collect(report_batch._process_chunk(assets, statistics, ["POLICY"], False))
+    by_asset = {item["asset_id"]: item for item in items}
+
+    assert by_asset["asset-000"]["status"] == "ok"
+    assert by_asset["asset-001"] == {
+        "asset_id": "asset-001", "report_type": "POLICY", "status": "error", "error": "model unavailable"
+    }
+    assert len(stub.complianceReport.created[0]) == 1
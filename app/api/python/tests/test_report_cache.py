@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from .. import ai_reports, report_cache as report_cache_module
+from ..report_cache import ReportCache, report_fingerprint, serialize_asset
+
+TEMPLATE = {"system_prompt": "Write a policy report."}
+
+
+def make_asset(log_ids, plan_ids):
+    return {
+        "id": "asset-1",
+        "name": "Pump Station 4",
+        "purchaseDate": datetime(1998, 4, 1, tzinfo=timezone.utc),
+        "maintenanceLogs": [{"id": log_id, "cost": 100.0} for log_id in log_ids],
+        "financialPlans": [{"id": plan_id, "year": 2030} for plan_id in plan_ids]
+    }
+
+
+def make_report(fingerprint, age=0.0, content=None):
+    return SimpleNamespace(
+        id=f"report-{fingerprint}-{age}",
+        fingerprint=fingerprint,
+        content=content or {"title": fingerprint},
+        createdAt=datetime.now(timezone.utc) - timedelta(seconds=age)
+    )
+
+
+class StubReports:
+    """Stand-in for db.complianceReport that records the fingerprints it was asked for."""
+
+    def __init__(self, reports):
+        self.reports = reports
+        self.queries = []
+
+    async def find_first(self, where, order):
+        self.queries.append([where["fingerprint"]])
+        matches = [report for report in self.reports if report.fingerprint == where["fingerprint"]]
+        return max(matches, key=lambda report: report.createdAt) if matches else None
+
+    async def find_many(self, where, order):
+        wanted = where["fingerprint"]["in"]
+        self.queries.append(list(wanted))
+        matches = [report for report in self.reports if report.fingerprint in wanted]
+        return sorted(matches, key=lambda report: report.createdAt)
+
+
+@pytest.fixture
+def stub_reports(monkeypatch):
+    def install(reports):
+        stub = StubReports(reports)
+        monkeypatch.setattr(report_cache_module, "db", SimpleNamespace(complianceReport=stub))
+        return stub
+    return install
+
+
+def test_fingerprint_ignores_relation_order():
+    first = serialize_asset(make_asset(["log-1", "log-2", "log-3"], ["plan-a", "plan-b"]))
+    second = serialize_asset(make_asset(["log-3", "log-1", "log-2"], ["plan-b", "plan-a"]))
+
+    assert first == second
+    assert report_fingerprint(first, "POLICY", TEMPLATE, "model") == report_fingerprint(second, "POLICY", TEMPLATE, "model")
+
+
+def test_fingerprint_changes_with_inputs():
+    payload = serialize_asset(make_asset(["log-1"], ["plan-a"]))
+    changed = serialize_asset(make_asset(["log-1", "log-2"], ["plan-a"]))
+    base = report_fingerprint(payload, "POLICY", TEMPLATE, "model")
+
+    assert report_fingerprint(changed, "POLICY", TEMPLATE, "model") != base
+    assert report_fingerprint(payload, "RISK", TEMPLATE, "model") != base
+    assert report_fingerprint(payload, "POLICY", {"system_prompt": "Other"}, "model") != base
+    assert report_fingerprint(payload, "POLICY", TEMPLATE, "other-model") != base
+
+
+def test_fingerprint_changes_with_prompt_settings(monkeypatch):
+    payload = serialize_asset(make_asset(["log-1"], ["plan-a"]))
+    base = report_fingerprint(payload, "POLICY", TEMPLATE, "model")
+    monkeypatch.setattr(report_cache_module, "PROMPT_SETTINGS", {
+        **report_cache_module.PROMPT_SETTINGS,
+        "recent_logs": report_cache_module.PROMPT_SETTINGS["recent_logs"] + 1
+    })
+
+    assert report_fingerprint(payload, "POLICY", TEMPLATE, "model") != base
+
+
+@pytest.mark.asyncio
+async def test_get_falls_back_to_database_then_memory(stub_reports):
+    stub = stub_reports([make_report("fp-1", age=60), make_report("fp-1", age=10, content={"title": "newest"})])
+    cache = ReportCache(maxsize=8, max_age=3600)
+
+    first = await cache.get("fp-1")
+    second = await cache.get("fp-1")
+
+    assert first["content"] == {"title": "newest"}
+    assert second == first
+    assert stub.queries == [["fp-1"]]
+    assert cache.stats()["db_hits"] == 1
+    assert await cache.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_put_is_served_without_database(stub_reports):
+    stub = stub_reports([])
+    cache = ReportCache(maxsize=8, max_age=3600)
+    cache.put("fp-1", {"id": "r1", "content": {"title": "fresh"}, "generated_at": datetime.now(timezone.utc)})
+
+    assert (await cache.get("fp-1"))["id"] == "r1"
+    assert stub.queries == []
+
+
+@pytest.mark.asyncio
+async def test_get_many_queries_only_missing_fingerprints(stub_reports):
+    stub = stub_reports([
+        make_report("fp-2", age=30),
+        make_report("fp-2", age=5, content={"title": "newest"}),
+        make_report("fp-3")
+    ])
+    cache = ReportCache(maxsize=8, max_age=3600)
+    cache.put("fp-1", {"id": "r1", "content": {"title": "memory"}, "generated_at": datetime.now(timezone.utc)})
+
+    found = await cache.get_many(["fp-1", "fp-2", "fp-3", "fp-4"])
+
+    assert stub.queries == [["fp-2", "fp-3", "fp-4"]]
+    assert set(found) == {"fp-1", "fp-2", "fp-3"}
+    assert found["fp-2"]["content"] == {"title": "newest"}
+
+    assert set(await cache.get_many(["fp-1", "fp-2", "fp-3"])) == {"fp-1", "fp-2", "fp-3"}
+    assert len(stub.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_force_skips_cached_report(monkeypatch):
+    cached = {"id": "r1", "content": {"title": "cached"}, "generated_at": datetime.now(timezone.utc)}
+    generated = []
+
+    async def load_report_inputs(asset_id, report_type):
+        return {"id": asset_id}, "fp-1"
+
+    async def generate_report_content(asset_payload, report_type):
+        generated.append(asset_payload["id"])
+        return {"title": "fresh"}
+
+    cache = ReportCache(maxsize=8, max_age=3600)
+    cache.put("fp-1", cached)
+    monkeypatch.setattr(ai_reports, "report_cache", cache)
+    monkeypatch.setattr(ai_reports, "load_report_inputs", load_report_inputs)
+    monkeypatch.setattr(ai_reports, "generate_report_content", generate_report_content)
+
+    content, fingerprint, hit = await ai_reports.resolve_report_content("asset-1", "POLICY")
+    assert (content, fingerprint, hit) == ({"title": "cached"}, "fp-1", cached)
+    assert generated == []
+
+    content, fingerprint, hit = await ai_reports.resolve_report_content("asset-1", "POLICY", force=True)
+    assert (content, fingerprint, hit) == ({"title": "fresh"}, "fp-1", None)
+    assert generated == ["asset-1"]
@@ -0,0 +1,48 @@
+import json
+from ..report_stream import SectionStreamParser
+
+REPORT = {
+    "title": "Asset Management Policy Report",
+    "sections": [
+        {"heading": "Executive Summary", "content": "Braces {like} these and \"quotes\" ]"},
+        {"heading": "Risk Management", "content": "Nested [lists] stay inside the string"}
+    ]
+}
+
+def test_emits_each_section_as_soon_as_it_closes():
+    text = json.dumps(REPORT)
+    parser = SectionStreamParser()
+    emitted = []
+    first_at = None
+    for i in range(0, len(text), 7):
+        completed = parser.feed(text[i:i + 7])
+        if completed and first_at is None:
+            first_at = i
+        emitted.extend(completed)
+
+    assert emitted == REPORT["sections"]
+    assert first_at < text.index("Risk Management")
+    assert parser.result() == REPORT
+
+def test_ignores_preamble_and_objects_outside_sections():
+    text = 'Here is the report:\n{"meta": {"heading": "x"}, ' + json.dumps(REPORT)[1:]
+    parser = SectionStreamParser()
+    emitted = parser.feed(text)
+
+    assert emitted == REPORT["sections"]
+    assert parser.result()["title"] == REPORT["title"]
+
+def test_truncated_output_falls_back_to_completed_sections():
+    text = json.dumps(REPORT)
+    parser = SectionStreamParser()
+    parser.feed(text[:text.index("Risk Management")])
+
+    assert parser.result() == {"title": REPORT["title"], "sections": REPORT["sections"][:1]}
+    assert not parser.complete
+
+def test_complete_output_is_marked_complete():
+    parser = SectionStreamParser()
+    parser.feed(json.dumps(REPORT))
+
+    assert parser.result() == REPORT
+    assert parser.complete
@@ -34,7 +34,8 @@ async def test_get_reports():
         
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
+        assert isinstance(data["items"], list)
+        assert "next_cursor" in data
 
 @pytest.mark.asyncio
 async def test_get_report():
@@ -0,0 +1,59 @@
+import sys
+import pytest
+from starlette.requests import Request
+from .. import response_cache
+from ..response_cache import MemoryBackend, ResponseCache
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"id": "a1", "version": self.calls}
+
+@pytest.mark.asyncio
+async def test_hits_until_tag_is_invalidated():
+    cache = ResponseCache(MemoryBackend())
+    load = Loader()
+    admin = {"role": "admin"}
+
+    first = await cache.respond(make_request(), "asset", {"id": "a1"}, admin, ["assets"], load)
+    second = await cache.respond(make_request(), "asset", {"id": "a1"}, admin, ["assets"], load)
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert second.body == first.body
+    assert load.calls == 1
+
+    await cache.invalidate("assets")
+    third = await cache.respond(make_request(), "asset", {"id": "a1"}, admin, ["assets"], load)
+    assert third.headers["x-cache"] == "MISS"
+    assert b'"version":2' in third.body
+    assert cache.stats()["routes"]["asset"]["hit_ratio"] == pytest.approx(1 / 3)
+
+@pytest.mark.asyncio
+async def test_roles_do_not_share_entries_and_etag_gives_304():
+    cache = ResponseCache(MemoryBackend())
+    load = Loader()
+
+    admin = await cache.respond(make_request(), "report", {"id": "r1"}, {"role": "admin"}, ["reports"], load)
+    finance = await cache.respond(make_request(), "report", {"id": "r1"}, {"role": "finance_director"}, ["reports"], load)
+    assert finance.headers["x-cache"] == "MISS"
+    assert load.calls == 2
+
+    etag = admin.headers["etag"]
+    revalidated = await cache.respond(make_request(etag), "report", {"id": "r1"}, {"role": "admin"}, ["reports"], load)
+    assert revalidated.status_code == 304
+    assert revalidated.body == b""
+    assert cache.stats()["not_modified"] == 1
+
+def test_redis_backend_without_the_package_fails_clearly(monkeypatch):
+    # None in sys.modules makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_BACKEND", "redis")
+    with pytest.raises(RuntimeError, match="redis package"):
+        response_cache._backend()
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+from ..projections import CONDITIONS, MAINTENANCE_FACTORS, AssetColumns
+from ..risk import (
+    RISK_HORIZON_YEARS, assess_risk, failure_probability, risk_level, run_simulation,
+    shutdown_simulator, simulate_portfolio, weibull_parameters
+)
+from .. import risk
+from .test_projections import make_assets
+
+
+def test_same_seed_same_result():
+    columns = AssetColumns.from_assets(make_assets(300))
+    first = simulate_portfolio(columns, 2024, 5, trials=500, seed=11)
+    assert simulate_portfolio(columns, 2024, 5, trials=500, seed=11) == first
+    assert simulate_portfolio(columns, 2024, 5, trials=500, seed=12) != first
+
+
+def test_process_pool_matches_in_process():
+    columns = AssetColumns.from_assets(make_assets(300))
+    try:
+        pooled = asyncio.run(run_simulation(columns, 2024, 5, trials=500, seed=11))
+    finally:
+        shutdown_simulator()
+    assert pooled == simulate_portfolio(columns, 2024, 5, trials=500, seed=11)
+
+
+def test_pool_bounds_blocks_in_flight(monkeypatch):
+    # 19 blocks through a window of 4 still sum in block order
+    monkeypatch.setattr(risk, "BLOCK_SIZE", 16)
+    monkeypatch.setattr(risk, "RISK_SIMULATION_WORKERS", 2)
+    columns = AssetColumns.from_assets(make_assets(300))
+    try:
+        pooled = asyncio.run(run_simulation(columns, 2024, 5, trials=200, seed=5))
+    finally:
+        shutdown_simulator()
+    assert pooled == simulate_portfolio(columns, 2024, 5, trials=200, seed=5)
+
+
+def test_bands_are_ordered():
+    columns = AssetColumns.from_assets(make_assets(300))
+    for year in simulate_portfolio(columns, 2024, 8, trials=500)["projections"]:
+        for name in ("total", "maintenance", "replacement"):
+            assert year[f"{name}_p10"] <= year[f"{name}_p50"] <= year[f"{name}_p90"]
+
+
+def test_replacement_probability_matches_distribution():
+    # One asset, so P(replaced in the first year) is just its CDF at 1
+    asset = SimpleNamespace(
+        id="a", name="A", value=1000.0, purchaseDate=datetime(2014, 1, 1), expectedLifespan=12, condition="POOR"
+    )
+    columns = AssetColumns.from_assets([asset])
+    result = simulate_portfolio(columns, 2024, 1, trials=20_000, seed=3)
+    expected = float(failure_probability(np.array([10.0]), np.array([12.0]), np.array([3]), within_years=1)[0])
+    assert abs(result["projections"][0]["expected_replacements"] - expected) < 0.02
+    assert abs(result["projections"][0]["replacement_mean"] - 1000.0 * expected) < 20
+
+
+def test_replacement_lowers_maintenance():
+    columns = AssetColumns.from_assets(make_assets(50))
+    result = simulate_portfolio(columns, 2024, 3, trials=100)
+    baseline = float(sum(
+        value * MAINTENANCE_FACTORS[CONDITIONS[condition]] for value, condition in zip(columns.value, columns.condition)
+    ))
+    # A replaced asset drops to the EXCELLENT factor, so maintenance never rises
+    assert all(year["maintenance_p90"] <= baseline + 1e-6 for year in result["projections"])
+
+
+def test_zero_lifespan_renewals_terminate():
+    asset = SimpleNamespace(
+        id="a", name="A", value=1000.0, purchaseDate=datetime(2020, 1, 1), expectedLifespan=0, condition="GOOD"
+    )
+    result = simulate_portfolio(AssetColumns.from_assets([asset]), 2024, 5, trials=100)
+    # Replaced many times a year, but the simulation finishes
+    assert result["projections"][0]["expected_replacements"] > 1
+
+
+def test_worse_condition_fails_sooner():
+    condition = np.arange(len(CONDITIONS))
+    probability = failure_probability(np.full(len(CONDITIONS), 10.0), np.full(len(CONDITIONS), 20.0), condition)
+    assert np.all(np.diff(probability) > 0)
+    scale, shape = weibull_parameters(np.array([50.0]), np.array([0.0]), np.array([4]))
+    assert scale[0] > 0 and shape[0] > 0
+
+
+def test_risk_levels():
+    assert risk_level(0.0) == "LOW"
+    assert risk_level(0.2) == "MEDIUM"
+    assert risk_level(0.5) == "HIGH"
+    assert risk_level(0.8) == "CRITICAL"
+    assert risk_level(1.0) == "CRITICAL"
+
+    new = SimpleNamespace(purchaseDate=datetime(2024, 1, 1), expectedLifespan=40, condition="EXCELLENT")
+    worn = SimpleNamespace(purchaseDate=datetime(1990, 1, 1), expectedLifespan=30, condition="CRITICAL")
+    assert assess_risk([new, worn], 2024) == ["LOW", "CRITICAL"]
+    assert RISK_HORIZON_YEARS > 0
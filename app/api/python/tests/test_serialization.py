@@ -0,0 +1,54 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+import numpy as np
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from ..models import AssetListItem, FinancialPlanItem
+from ..serialization import FastJSONResponse, dumps, lean
+from ..benchmarks.serialization import make_assets, make_plans
+
+def test_lean_keeps_only_schema_fields_including_nested():
+    asset = make_assets(1)[0]
+    item = lean(AssetListItem, asset)
+
+    assert set(item) == set(AssetListItem.__fields__)
+    assert "notes" not in item and "attachments" not in item
+    assert set(item["department"]) == {"id", "name", "code"}
+    assert item["maintenanceSummary"]["logCount"] == 12
+
+def test_lean_handles_lists_missing_relations_and_dicts():
+    plans = make_plans(make_assets(2))
+    plans[1].asset = None
+    items = lean(FinancialPlanItem, plans)
+
+    assert items[0]["asset"]["id"] == "asset-00000000"
+    assert items[1]["asset"] is None
+    assert lean(FinancialPlanItem, {"id": "p1"})["year"] is None
+
+def test_dumps_matches_the_standard_encoder():
+    class Color(str, Enum):
+        RED = "RED"
+
+    value = {
+        "when": datetime(2024, 1, 2, 3, 4, 5, 678000),
+        "color": Color.RED,
+        "amount": Decimal("1.5"),
+        "counts": np.array([1, 2]),
+        "asset": make_assets(1)[0]
+    }
+    expected = jsonable_encoder({**value, "counts": [1, 2]})
+
+    assert json.loads(dumps(value)) == expected
+
+def test_fast_json_response_renders_with_orjson():
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/now")
+    async def now():
+        return {"at": datetime(2024, 1, 1)}
+
+    response = TestClient(app).get("/now")
+    assert response.json() == {"at": "2024-01-01T00:00:00"}
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useCallback } from 'react';
 import { useRouter } from 'next/navigation';
 import { Button } from '@/components/ui/button';
 import { Card } from '@/components/ui/card';
@@ -30,15 +30,15 @@ import { useToast } from '@/hooks/use-toast';
 import { FileText, Loader2, Plus, Download, Eye, MoreHorizontal, ArrowUpDown } from 'lucide-react';
 import { format } from 'date-fns';
 
+const REPORTS_PAGE_SIZE = 100;
+
 interface Report {
   id: string;
   reportType: string;
   status: string;
   createdAt: string;
   assetId: string;
-  content: {
-    title: string;
-  };
+  title: string;
 }
 
 type SortField = 'createdAt' | 'reportType' | 'status';
@@ -46,6 +46,8 @@ type SortOrder = 'asc' | 'desc';
 
 export default function ReportsPage() {
   const [reports, setReports] = useState<Report[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedAsset, setSelectedAsset] = useState('');
   const [reportType, setReportType] = useState('');
   const [isGenerating, setIsGenerating] = useState(false);
@@ -59,25 +61,61 @@ export default function ReportsPage() {
   const { toast } = useToast();
   const router = useRouter();
 
+  // One keyset page; the status filter is applied by the API so later pages are not missed
+  const fetchReportsPage = useCallback(
+    async (cursor: string | null) => {
+      const params = new URLSearchParams({ take: String(REPORTS_PAGE_SIZE) });
+      if (cursor) params.set('cursor', cursor);
+      if (statusFilter) params.set('status', statusFilter);
+      const response = await fetch(`/api/reports?${params}`);
+      if (!response.ok) throw new Error('Failed to fetch reports');
+      return (await response.json()) as { items: Report[]; next_cursor: string | null };
+    },
+    [statusFilter]
+  );
+
+  const loadReports = useCallback(async () => {
+    try {
+      const data = await fetchReportsPage(null);
+      setReports(data.items);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching reports:', error);
+      toast({
+        title: 'Error',
+        description: 'Failed to load reports',
+        variant: 'destructive',
+      });
+    } finally {
+      setLoading(false);
+    }
+  }, [fetchReportsPage, toast]);
+
+  const loadMoreReports = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await fetchReportsPage(nextCursor);
+      setReports((current) => [...current, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching reports:', error);
+      toast({
+        title: 'Error',
+        description: 'Failed to load more reports',
+        variant: 'destructive',
+      });
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchReports = async () => {
-      try {
-        const response = await fetch('/api/reports');
-        if (!response.ok) throw new Error('Failed to fetch reports');
-        const data = await response.json();
-        setReports(data);
-      } catch (error) {
-        console.error('Error fetching reports:', error);
-        toast({
-          title: 'Error',
-          description: 'Failed to load reports',
-          variant: 'destructive',
-        });
-      } finally {
-        setLoading(false);
-      }
-    };
+    setLoading(true);
+    loadReports();
+  }, [loadReports]);
 
+  useEffect(() => {
     const fetchAssets = async () => {
       try {
         const response = await fetch('/api/assets');
@@ -89,9 +127,8 @@ export default function ReportsPage() {
       }
     };
 
-    fetchReports();
     fetchAssets();
-  }, [toast]);
+  }, []);
 
   const generateReport = async () => {
     if (!selectedAsset || !reportType) {
@@ -125,9 +162,7 @@ export default function ReportsPage() {
       });
 
       // Refresh reports list
-      const reportsResponse = await fetch('/api/reports');
-      const reportsData = await reportsResponse.json();
-      setReports(reportsData);
+      await loadReports();
 
       // Reset form
       setSelectedAsset('');
@@ -190,10 +225,9 @@ export default function ReportsPage() {
   const filteredAndSortedReports = reports
     .filter((report) => {
       const matchesSearch =
-        report.content.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
+        (report.title ?? '').toLowerCase().includes(searchTerm.toLowerCase()) ||
         report.reportType.toLowerCase().includes(searchTerm.toLowerCase());
-      const matchesStatus = !statusFilter || report.status === statusFilter;
-      return matchesSearch && matchesStatus;
+      return matchesSearch;
     })
     .sort((a, b) => {
       const order = sortOrder === 'asc' ? 1 : -1;
@@ -327,7 +361,7 @@ export default function ReportsPage() {
             ) : (
               filteredAndSortedReports.map((report) => (
                 <TableRow key={report.id}>
-                  <TableCell className="font-medium">{report.content.title}</TableCell>
+                  <TableCell className="font-medium">{report.title}</TableCell>
                   <TableCell>{report.reportType}</TableCell>
                   <TableCell>
                     <span
@@ -370,6 +404,15 @@ export default function ReportsPage() {
           </TableBody>
         </Table>
       </Card>
+
+      {nextCursor && !loading && (
+        <div className="mt-6 flex justify-center">
+          <Button variant="outline" onClick={loadMoreReports} disabled={loadingMore}>
+            {loadingMore && <Loader2 className="mr-2 size-4 animate-spin" />}
+            Load More
+          </Button>
+        </div>
+      )}
     </div>
   );
 }